@@ -12,13 +12,13 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent / "backend"))
 
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
 # Import the main app from backend
-from main import app as backend_app
+from main import app as backend_app, install_loop_monitor
+from media import CachedStaticFiles
 
 # Create a wrapper app that serves the frontend
 app = FastAPI(title="AI Kinetic Video Agent")
@@ -32,10 +32,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Attribute event-loop stalls to endpoints and projects (LOOP_MONITOR=1)
+install_loop_monitor(app)
+
 # Mount backend static files (assets, audio, scripts)
 public_dir = Path(__file__).parent / "backend" / "public"
 public_dir.mkdir(parents=True, exist_ok=True)
-app.mount("/public", StaticFiles(directory=str(public_dir)), name="public")
+app.mount("/public", CachedStaticFiles(directory=str(public_dir)), name="public")
 
 # Include all backend routes (API endpoints)
 app.include_router(backend_app.router)
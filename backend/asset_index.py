@@ -0,0 +1,125 @@
+import os
+import json
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from journal import sha256_file
+
+
+class AssetIndex:
+    """Write-time index of the PNG assets in one directory
+
+    Writers call ``record`` after publishing a file, so listings read a small
+    JSON file instead of globbing and hashing the directory. The index lives
+    next to the directory (``<dir>_index.json``) so updating it does not touch
+    the directory's mtime; if the directory changed behind the index's back
+    (manual copy, older code paths) it is rebuilt once from a scan.
+    """
+
+    _cache: Dict[str, "AssetIndex"] = {}
+    _cache_lock = threading.Lock()
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.index_path = self.directory.parent / f"{self.directory.name}_index.json"
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, dict]] = None
+        self._loaded_mtime: Optional[int] = None
+
+    @classmethod
+    def for_directory(cls, directory: Path) -> "AssetIndex":
+        """Shared instance per directory so in-memory entries are reused across requests"""
+        key = str(Path(directory).resolve())
+        with cls._cache_lock:
+            if key not in cls._cache:
+                cls._cache[key] = cls(directory)
+            return cls._cache[key]
+
+    @classmethod
+    def forget(cls, directory: Path):
+        """Drop the cached instance, e.g. after the directory is deleted"""
+        with cls._cache_lock:
+            cls._cache.pop(str(Path(directory).resolve()), None)
+
+    def _dir_mtime(self) -> Optional[int]:
+        try:
+            return self.directory.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _is_stale(self) -> bool:
+        dir_mtime = self._dir_mtime()
+        if dir_mtime is None:
+            return False
+        try:
+            return self.index_path.stat().st_mtime_ns < dir_mtime
+        except FileNotFoundError:
+            return True
+
+    def _rebuild(self):
+        entries = {}
+        if self.directory.exists():
+            for path in self.directory.glob("*.png"):
+                stat = path.stat()
+                entries[path.name] = {
+                    "sha256": sha256_file(path),
+                    "size": stat.st_size,
+                    "mtime": stat.st_mtime,
+                }
+        self._entries = entries
+        self._write()
+
+    def _write(self):
+        if not self.directory.parent.exists():
+            return
+        tmp_path = self.index_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self._entries, f)
+        os.replace(tmp_path, self.index_path)
+        self._loaded_mtime = self.index_path.stat().st_mtime_ns
+
+    def _ensure_loaded(self, check_stale: bool = True):
+        if (check_stale or self._entries is None) and self._is_stale():
+            self._rebuild()
+            return
+        if not self.index_path.exists():
+            self._entries = {}
+            return
+        mtime = self.index_path.stat().st_mtime_ns
+        if self._entries is None or mtime != self._loaded_mtime:
+            with open(self.index_path, "r") as f:
+                self._entries = json.load(f)
+            self._loaded_mtime = mtime
+
+    def record(self, path: Path, sha256: Optional[str] = None):
+        """Add or refresh one asset after it has been written"""
+        with self._lock:
+            # The write we are recording bumped the directory mtime; do not rescan for it
+            self._ensure_loaded(check_stale=False)
+            stat = path.stat()
+            self._entries[path.name] = {
+                "sha256": sha256 or sha256_file(path),
+                "size": stat.st_size,
+                "mtime": stat.st_mtime,
+            }
+            self._write()
+
+    def remove(self, name: str):
+        with self._lock:
+            self._ensure_loaded(check_stale=False)
+            if self._entries.pop(name, None) is not None:
+                self._write()
+
+    def entries(self, offset: int = 0, limit: Optional[int] = None) -> List[dict]:
+        """Sorted ``{"name", "sha256", "size", "mtime"}`` entries, optionally paginated"""
+        with self._lock:
+            self._ensure_loaded()
+            names = sorted(self._entries)
+            end = None if limit is None else offset + limit
+            return [{"name": name, **self._entries[name]} for name in names[offset:end]]
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._entries)
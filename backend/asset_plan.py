@@ -0,0 +1,108 @@
+import re
+import hashlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+GOOGLE_AVATAR_MODEL = "gemini-2.5-flash-image"
+TOGETHER_MODEL = "black-forest-labs/FLUX.1-schnell-Free"
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Case- and whitespace-insensitive form of a prompt, used as the dedup key"""
+    return _WHITESPACE_RE.sub(" ", prompt or "").strip().lower().rstrip(".")
+
+
+def provider_for(role: str) -> Tuple[str, str]:
+    """The (provider, model) ``Builder._generate_image`` routes a role to"""
+    if role == "avatar":
+        return "google", GOOGLE_AVATAR_MODEL
+    return "together", TOGETHER_MODEL
+
+
+def asset_key(prompt: str, role: str, model: str) -> str:
+    return hashlib.sha256(f"{normalize_prompt(prompt)}\0{role}\0{model}".encode()).hexdigest()[:16]
+
+
+def plan_assets(
+    script: dict,
+    has_google: bool,
+    is_saved: Optional[Callable[[str], bool]] = None,
+) -> Dict:
+    """Group a script's image elements into unique assets before any provider call
+
+    Elements that share a (normalized prompt, role, model) become one asset,
+    generated once under the id of the first element that asked for it and
+    fanned out to the rest. An id reused with a different prompt would
+    overwrite the other asset's file, so it gets a suffixed id instead.
+    ``is_saved`` reports which assets need no provider call on this run;
+    ``has_google`` only decides whether avatars can be generated at all.
+    """
+    assets: Dict[str, Dict] = {}
+    claimed_ids: Dict[str, str] = {}
+    warnings: List[str] = []
+    elements = 0
+
+    for scene_idx, scene in enumerate(script.get("scenes", [])):
+        if not isinstance(scene, dict) or not isinstance(scene.get("elements"), list):
+            continue
+        for element_idx, element in enumerate(scene["elements"]):
+            if not isinstance(element, dict) or element.get("type") != "image":
+                continue
+            element_id = element.get("id", f"element_{scene_idx}")
+            prompt = element.get("prompt", "")
+            if not prompt:
+                warnings.append(f"No prompt provided for {element_id} in scene {scene_idx + 1}, skipping")
+                continue
+            role = element.get("role", "avatar")
+            provider, model = provider_for(role)
+            key = asset_key(prompt, role, model)
+            elements += 1
+
+            if key not in assets:
+                asset_id = element_id
+                if claimed_ids.get(asset_id, key) != key:
+                    asset_id = f"{element_id}-{key[:6]}"
+                    warnings.append(
+                        f"Element id {element_id} in scene {scene_idx + 1} reuses an id with a different prompt; "
+                        f"generating it as {asset_id}"
+                    )
+                claimed_ids[asset_id] = key
+                assets[key] = {
+                    "key": key,
+                    "asset_id": asset_id,
+                    "prompt": prompt,
+                    "role": role,
+                    "provider": provider,
+                    "model": model,
+                    "references": [],
+                }
+            assets[key]["references"].append({
+                "scene_index": scene_idx,
+                "element_index": element_idx,
+                "element_id": element_id,
+            })
+
+    provider_calls: Dict[str, int] = {}
+    for asset in assets.values():
+        asset["saved"] = bool(is_saved and is_saved(asset["asset_id"]))
+        if not asset["saved"]:
+            provider_calls[asset["provider"]] = provider_calls.get(asset["provider"], 0) + 1
+
+    if provider_calls.get("google") and not has_google:
+        warnings.append(f"{provider_calls['google']} avatar asset(s) need GOOGLE_API_KEY, which is not set")
+
+    unique = len(assets)
+    return {
+        "assets": list(assets.values()),
+        "stats": {
+            "elements": elements,
+            "unique_assets": unique,
+            "deduplicated": elements - unique,
+            "dedup_ratio": round(elements / unique, 2) if unique else 1.0,
+            "already_saved": sum(1 for asset in assets.values() if asset["saved"]),
+            "provider_calls": sum(provider_calls.values()),
+            "provider_calls_by_provider": provider_calls,
+        },
+        "warnings": warnings,
+    }
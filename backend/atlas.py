@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import io
+import os
+import hashlib
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+from lazy_imports import lazy
+from render_bundle import REMOTION_DIR
+from storage import atomic_write_bytes
+
+ATLAS_DIR = REMOTION_DIR / "public" / "atlases"
+
+# Build texture atlases after asset generation (renderers fall back to the PNGs without one)
+ATLAS_ENABLED = os.getenv("ASSET_ATLAS", "0") not in ("", "0", "false")
+# Page edge in pixels; 4096 stays within every browser's texture limits
+PAGE_SIZE = int(os.getenv("ATLAS_PAGE_SIZE", "4096"))
+# Transparent gutter around each asset so filtering never samples a neighbour
+PADDING = int(os.getenv("ATLAS_PADDING", "4"))
+
+
+class SkylinePacker:
+    """Bottom-left skyline bin packing into one fixed-size page
+
+    The skyline is the list of ``(x, y, width)`` segments forming the top edge
+    of everything placed so far; each rectangle goes where its top edge ends up
+    lowest, then leftmost. Fast and tight enough for a few dozen sprites.
+    """
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.skyline: List[Tuple[int, int, int]] = [(0, 0, width)]
+        self.used_area = 0
+
+    def _fit(self, index: int, w: int, h: int) -> Optional[int]:
+        """Lowest y at which a w x h rect starting at segment ``index`` fits"""
+        x = self.skyline[index][0]
+        if x + w > self.width:
+            return None
+        y, remaining = 0, w
+        while remaining > 0:
+            if index >= len(self.skyline):
+                return None
+            y = max(y, self.skyline[index][1])
+            if y + h > self.height:
+                return None
+            remaining -= self.skyline[index][2]
+            index += 1
+        return y
+
+    def insert(self, w: int, h: int) -> Optional[Tuple[int, int]]:
+        best = None
+        for index, (x, _, _) in enumerate(self.skyline):
+            y = self._fit(index, w, h)
+            if y is not None and (best is None or (y + h, x) < best[0]):
+                best = ((y + h, x), index, x, y)
+        if best is None:
+            return None
+        _, index, x, y = best
+
+        # The new segment covers [x, x + w); trim whatever it overlaps to its right
+        self.skyline.insert(index, (x, y + h, w))
+        nxt = index + 1
+        while nxt < len(self.skyline):
+            sx, sy, sw = self.skyline[nxt]
+            overlap = x + w - sx
+            if overlap <= 0:
+                break
+            if sw <= overlap:
+                del self.skyline[nxt]
+                continue
+            self.skyline[nxt] = (sx + overlap, sy, sw - overlap)
+            break
+
+        merged = [self.skyline[0]]
+        for segment in self.skyline[1:]:
+            if segment[1] == merged[-1][1]:
+                merged[-1] = (merged[-1][0], merged[-1][1], merged[-1][2] + segment[2])
+            else:
+                merged.append(segment)
+        self.skyline = merged
+        self.used_area += w * h
+        return x, y
+
+
+def bleed_alpha(rgba: np.ndarray, iterations: int) -> np.ndarray:
+    """Spread opaque colours into neighbouring fully transparent pixels
+
+    Alpha is untouched, so nothing visible changes, but bilinear sampling at
+    sprite edges blends towards the sprite's own colour instead of black.
+    """
+    np = lazy.get("numpy")
+    rgb = rgba[..., :3].astype(np.float32)
+    known = rgba[..., 3] > 0
+    height, width = known.shape
+    for _ in range(iterations):
+        if known.all():
+            break
+        padded_rgb = np.pad(rgb * known[..., None], ((1, 1), (1, 1), (0, 0)))
+        padded_known = np.pad(known, 1).astype(np.float32)
+        total = np.zeros_like(rgb)
+        count = np.zeros(known.shape, dtype=np.float32)
+        for dy in (0, 1, 2):
+            for dx in (0, 1, 2):
+                if dy == 1 and dx == 1:
+                    continue
+                total += padded_rgb[dy:dy + height, dx:dx + width]
+                count += padded_known[dy:dy + height, dx:dx + width]
+        grown = ~known & (count > 0)
+        rgb[grown] = total[grown] / count[grown][:, None]
+        known = known | grown
+    out = rgba.copy()
+    out[..., :3] = np.round(rgb).astype(np.uint8)
+    return out
+
+
+def _fit_size(width: int, height: int, max_w: int, max_h: int) -> Tuple[int, int]:
+    """Downscale (never upscale) to fit within max_w x max_h, keeping the aspect ratio"""
+    scale = min(1.0, max_w / width, max_h / height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def build_atlas(
+    assets: Dict[str, Path],
+    output_dir: Path,
+    public_prefix: str,
+    max_size: Tuple[int, int],
+    page_size: int = PAGE_SIZE,
+    padding: int = PADDING,
+) -> Dict:
+    """Pack ``{local_path: file}`` into atlas pages under ``output_dir``
+
+    Each asset is first downscaled to ``max_size`` (the largest box a layout can
+    give it), then packed tallest-first with ``padding`` pixels of bled gutter.
+    Returns the index stored as final_config["atlas"]: page files (relative to
+    remotion/public, named by content hash) and one rect per local path.
+    """
+    np = lazy.get("numpy")
+    Image = lazy.get("PIL.Image")
+    page_limit = page_size - 2 * padding
+    sprites = []
+    for local_path, file in sorted(assets.items()):
+        with Image.open(file) as img:
+            img = img.convert("RGBA")
+            size = _fit_size(img.width, img.height, min(max_size[0], page_limit), min(max_size[1], page_limit))
+            if size != img.size:
+                img = img.resize(size, Image.LANCZOS)
+            sprites.append((local_path, np.asarray(img)))
+    sprites.sort(key=lambda item: (item[1].shape[0], item[1].shape[1]), reverse=True)
+
+    packers: List[SkylinePacker] = []
+    placements = []
+    for local_path, pixels in sprites:
+        h, w = pixels.shape[:2]
+        for page, packer in enumerate(packers):
+            spot = packer.insert(w + 2 * padding, h + 2 * padding)
+            if spot:
+                break
+        else:
+            packers.append(SkylinePacker(page_size, page_size))
+            page = len(packers) - 1
+            spot = packers[page].insert(w + 2 * padding, h + 2 * padding)
+        placements.append((local_path, pixels, page, spot))
+
+    # Crop each page to the area actually used
+    extents = [[0, 0] for _ in packers]
+    for _, pixels, page, (x, y) in placements:
+        extents[page][0] = max(extents[page][0], x + pixels.shape[1] + 2 * padding)
+        extents[page][1] = max(extents[page][1], y + pixels.shape[0] + 2 * padding)
+    canvases = [np.zeros((height, width, 4), dtype=np.uint8) for width, height in extents]
+
+    rects = {}
+    for local_path, pixels, page, (x, y) in placements:
+        h, w = pixels.shape[:2]
+        gutter = np.pad(bleed_alpha(pixels, padding), ((padding, padding), (padding, padding), (0, 0)), mode="edge")
+        if padding:
+            # The gutter carries colour for filtering but stays invisible
+            gutter[:padding, :, 3] = 0
+            gutter[-padding:, :, 3] = 0
+            gutter[:, :padding, 3] = 0
+            gutter[:, -padding:, 3] = 0
+        canvases[page][y:y + h + 2 * padding, x:x + w + 2 * padding] = gutter
+        rects[local_path] = {"page": page, "x": x + padding, "y": y + padding, "w": w, "h": h}
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    pages = []
+    for index, canvas in enumerate(canvases):
+        image = Image.fromarray(canvas, "RGBA")
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        data = buffer.getvalue()
+        name = f"atlas-{index}-{hashlib.sha256(data).hexdigest()[:12]}.png"
+        if not (output_dir / name).exists():
+            atomic_write_bytes(output_dir / name, data, fsync=False)
+        pages.append({"src": f"{public_prefix}/{name}", "width": canvas.shape[1], "height": canvas.shape[0]})
+
+    # Pages from earlier builds are no longer referenced
+    current = {Path(page["src"]).name for page in pages}
+    for stale in output_dir.glob("atlas-*.png"):
+        if stale.name not in current:
+            stale.unlink(missing_ok=True)
+
+    fill = sum(p.used_area for p in packers) / max(1, sum(w * h for w, h in extents))
+    return {"pages": pages, "padding": padding, "rects": rects, "fill": round(fill, 3)}
+
+
+def element_assets(scenes: List[dict], assets_dir: Path) -> Dict[str, Path]:
+    """Distinct ``local_path -> project asset file`` referenced by the scenes"""
+    found = {}
+    for scene in scenes:
+        for element in scene.get("elements", []):
+            local_path = element.get("local_path")
+            if local_path and local_path not in found:
+                file = assets_dir / Path(local_path).name
+                if file.is_file():
+                    found[local_path] = file
+    return found
+
+
+def build_project_atlas(project_id: str, final_config: dict, assets_dir: Path) -> Optional[Dict]:
+    """Atlas index for a project's final config, or None when it has no assets to pack"""
+    assets = element_assets(final_config.get("scenes", []), assets_dir)
+    if not assets:
+        return None
+    settings = final_config.get("project_settings") or {}
+    max_size = (settings.get("width", 1920), settings.get("height", 1080))
+    return build_atlas(assets, ATLAS_DIR / project_id, f"atlases/{project_id}", max_size)
@@ -0,0 +1,355 @@
+from __future__ import annotations
+
+import os
+import json
+import math
+import time
+import shutil
+import struct
+import subprocess
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+from journal import sha256_file
+from lazy_imports import lazy
+
+ANALYSIS_VERSION = 2
+SAMPLE_RATE = 16000
+# Envelope frames per second (10 ms hop)
+ENVELOPE_RATE = 100
+# Frames quieter than this relative to the track's peak RMS count as silence
+SILENCE_THRESHOLD_DB = -35.0
+MIN_SILENCE_SECONDS = 0.2
+# Scene cuts move at most this far to land in a pause, for projects that opt in
+# with project_settings.snap_to_silence (true, or a maximum shift in seconds)
+DEFAULT_SNAP_SECONDS = 0.3
+# WAV format tags (for WAVE_FORMAT_EXTENSIBLE, the first two bytes of the SubFormat GUID)
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_IEEE_FLOAT = 3
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+AUDIO_CACHE_DIR = Path(__file__).parent / "cache" / "audio"
+
+
+def _wav_pcm(path: Path) -> Optional[Tuple[np.ndarray, int, float, float]]:
+    """Memory-map the samples of a PCM or float WAV as (frames, channels) without decoding
+
+    Returns (pcm, sample_rate, scale, bias) so that ``(pcm - bias) * scale`` is
+    in [-1, 1], or None for compressed or unusual WAVs.
+    """
+    np = lazy.get("numpy")
+    with open(path, "rb") as f:
+        riff, _, wave_id = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or wave_id != b"WAVE":
+            return None
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                return None
+            chunk_id, size = struct.unpack("<4sI", header)
+            if chunk_id == b"fmt ":
+                fmt = f.read(size)
+                f.seek(size & 1, 1)
+            elif chunk_id == b"data":
+                offset = f.tell()
+                break
+            else:
+                f.seek(size + (size & 1), 1)
+    if fmt is None or len(fmt) < 16:
+        return None
+    format_tag, channels, sample_rate, _, _, bits = struct.unpack("<HHIIHH", fmt[:16])
+    if format_tag == WAVE_FORMAT_EXTENSIBLE:
+        # cbSize, valid bits and channel mask precede the SubFormat GUID
+        if len(fmt) < 26:
+            return None
+        format_tag = struct.unpack("<H", fmt[24:26])[0]
+    if format_tag == WAVE_FORMAT_PCM and bits in (8, 16, 32):
+        dtype = {8: np.uint8, 16: np.dtype("<i2"), 32: np.dtype("<i4")}[bits]
+        scale, bias = 1.0 / 2 ** (bits - 1), 128.0 if bits == 8 else 0.0
+    elif format_tag == WAVE_FORMAT_IEEE_FLOAT and bits in (32, 64):
+        dtype = np.dtype("<f4") if bits == 32 else np.dtype("<f8")
+        scale, bias = 1.0, 0.0
+    else:
+        return None
+    frames = min(size, path.stat().st_size - offset) // (channels * bits // 8)
+    pcm = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(frames, channels))
+    return pcm, sample_rate, scale, bias
+
+
+def decode_audio(path: Path) -> Tuple[np.ndarray, int]:
+    """Decode a compressed file to mono float32 samples with ffmpeg, falling back to librosa"""
+    np = lazy.get("numpy")
+    if shutil.which("ffmpeg"):
+        result = subprocess.run(
+            ["ffmpeg", "-v", "error", "-i", str(path), "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "-"],
+            capture_output=True,
+            check=True,
+        )
+        return np.frombuffer(result.stdout, dtype="<i2").astype(np.float32) / 32768, SAMPLE_RATE
+    samples, rate = lazy.get("librosa").load(str(path), sr=SAMPLE_RATE, mono=True)
+    return samples.astype(np.float32), rate
+
+
+def rms_envelope(pcm: np.ndarray, sample_rate: int, scale: float = 1.0, bias: float = 0.0,
+                 rate: int = ENVELOPE_RATE, block_windows: int = 2000) -> np.ndarray:
+    """RMS of the mono downmix at ``rate`` windows per second
+
+    ``pcm`` is (frames, channels), possibly memory-mapped integers. It is
+    processed in blocks of ``block_windows`` windows so the float copy stays
+    cache-sized instead of materialising the whole track.
+    """
+    np = lazy.get("numpy")
+    if pcm.ndim == 1:
+        pcm = pcm[:, None]
+    hop = max(1, sample_rate // rate)
+    frames = len(pcm)
+    windows = math.ceil(frames / hop)
+    envelope = np.empty(windows, dtype=np.float32)
+    block = hop * block_windows
+    for first in range(0, frames, block):
+        chunk = pcm[first:first + block]
+        channels = chunk.shape[1]
+        # Add channels one column at a time; a strided sum over axis 1 is far slower
+        mono = chunk[:, 0].astype(np.float32)
+        for channel in range(1, channels):
+            mono += chunk[:, channel]
+        if bias:
+            mono -= bias * channels
+        mono *= scale / channels
+        count = math.ceil(len(mono) / hop)
+        if len(mono) < count * hop:
+            mono = np.concatenate([mono, np.zeros(count * hop - len(mono), dtype=np.float32)])
+        squares = mono.reshape(count, hop)
+        envelope[first // hop:first // hop + count] = np.sqrt(np.einsum("ij,ij->i", squares, squares) / hop)
+    return envelope
+
+
+def silence_segments(envelope: np.ndarray, rate: int = ENVELOPE_RATE,
+                     threshold_db: float = SILENCE_THRESHOLD_DB,
+                     min_seconds: float = MIN_SILENCE_SECONDS) -> np.ndarray:
+    """(start, end) seconds of every pause at least ``min_seconds`` long, as an (n, 2) array"""
+    np = lazy.get("numpy")
+    peak = float(envelope.max()) if len(envelope) else 0.0
+    if peak <= 0:
+        return np.array([[0.0, len(envelope) / rate]], dtype=np.float32) if len(envelope) else np.zeros((0, 2), np.float32)
+    db = 20 * np.log10(np.maximum(envelope / peak, 1e-10))
+    silent = np.concatenate(([0], (db < threshold_db).astype(np.int8), [0]))
+    edges = np.diff(silent)
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    keep = (ends - starts) >= min_seconds * rate
+    return (np.stack([starts[keep], ends[keep]], axis=1) / rate).astype(np.float32)
+
+
+class AudioAnalysis:
+    """Cached waveform analysis of one audio file
+
+    ``envelope.npy`` (RMS per 10 ms) and ``silences.npy`` are memory-mapped on
+    load, so scene snapping and word checks never decode the audio again.
+    """
+
+    def __init__(self, directory: Path, meta: dict):
+        np = lazy.get("numpy")
+        self.directory = Path(directory)
+        self.meta = meta
+        self.envelope = np.load(self.directory / "envelope.npy", mmap_mode="r")
+        self.silences = np.load(self.directory / "silences.npy", mmap_mode="r")
+
+    @property
+    def duration(self) -> float:
+        return self.meta["duration"]
+
+    @property
+    def rate(self) -> int:
+        return self.meta["envelope_rate"]
+
+    @classmethod
+    def load(cls, directory: Path) -> Optional["AudioAnalysis"]:
+        meta_path = Path(directory) / "meta.json"
+        if not meta_path.exists():
+            return None
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+        if meta.get("version") != ANALYSIS_VERSION:
+            return None
+        return cls(directory, meta)
+
+    def peaks(self, points: int) -> List[float]:
+        """Envelope maxima over ``points`` equal spans, for drawing a waveform"""
+        np = lazy.get("numpy")
+        envelope = np.asarray(self.envelope)
+        points = min(points, len(envelope))
+        if points <= 0:
+            return []
+        edges = (np.arange(points) * len(envelope)) // points
+        return np.round(np.maximum.reduceat(envelope, edges).astype(np.float64), 4).tolist()
+
+    def summary(self) -> dict:
+        np = lazy.get("numpy")
+        silences = np.asarray(self.silences)
+        return {
+            "duration": round(self.duration, 3),
+            "silence_count": int(len(silences)),
+            "silence_seconds": round(float((silences[:, 1] - silences[:, 0]).sum()), 3) if len(silences) else 0.0,
+            "envelope_rate": self.rate,
+            "analysis_seconds": self.meta.get("analysis_seconds"),
+        }
+
+
+def find_project_audio(project_dir: Path) -> Optional[Path]:
+    """The audio file stored in a project's audio/ directory, if any"""
+    audio_dir = Path(project_dir) / "audio"
+    if not audio_dir.is_dir():
+        return None
+    files = sorted(p for p in audio_dir.iterdir() if p.is_file())
+    return files[0] if files else None
+
+
+def analyze_audio(audio_path: Path, directory: Optional[Path] = None) -> AudioAnalysis:
+    """Analyze ``audio_path`` into ``directory``, reusing a previous result for the same content
+
+    Results are also kept in a content-addressed cache (the default
+    ``directory``), so the upload check and the project that is then created
+    from the same file decode it only once.
+    """
+    np = lazy.get("numpy")
+    audio_path = Path(audio_path)
+    digest = sha256_file(audio_path)
+    directory = Path(directory) if directory else AUDIO_CACHE_DIR / digest[:16]
+
+    existing = AudioAnalysis.load(directory)
+    if existing and existing.meta.get("sha256") == digest:
+        return existing
+
+    cached_dir = AUDIO_CACHE_DIR / digest[:16]
+    cached = AudioAnalysis.load(cached_dir)
+    if cached and cached.meta.get("sha256") == digest and cached_dir.resolve() != directory.resolve():
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in ("envelope.npy", "silences.npy", "meta.json"):
+            shutil.copy2(cached_dir / name, directory / name)
+        return AudioAnalysis.load(directory)
+
+    start = time.perf_counter()
+    wav = _wav_pcm(audio_path) if audio_path.suffix.lower() == ".wav" else None
+    if wav:
+        pcm, sample_rate, scale, bias = wav
+        envelope = rms_envelope(pcm, sample_rate, scale, bias)
+        frames = len(pcm)
+        del pcm
+    else:
+        samples, sample_rate = decode_audio(audio_path)
+        envelope = rms_envelope(samples, sample_rate)
+        frames = len(samples)
+    silences = silence_segments(envelope)
+    meta = {
+        "version": ANALYSIS_VERSION,
+        "sha256": digest,
+        "source": audio_path.name,
+        "duration": frames / sample_rate,
+        "sample_rate": sample_rate,
+        "envelope_rate": ENVELOPE_RATE,
+        "peak_rms": float(envelope.max()) if len(envelope) else 0.0,
+        "silence_threshold_db": SILENCE_THRESHOLD_DB,
+        "analysis_seconds": round(time.perf_counter() - start, 3),
+    }
+
+    for target in {directory.resolve(), cached_dir.resolve()}:
+        target.mkdir(parents=True, exist_ok=True)
+        np.save(target / "envelope.npy", envelope)
+        np.save(target / "silences.npy", silences)
+        tmp_path = target / "meta.json.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f, indent=2)
+        # meta.json last: its presence marks a complete analysis
+        os.replace(tmp_path, target / "meta.json")
+    return AudioAnalysis(directory, meta)
+
+
+def snap_scene_boundaries(scenes: List[dict], analysis: AudioAnalysis,
+                          max_shift: float = DEFAULT_SNAP_SECONDS) -> Tuple[List[dict], List[dict]]:
+    """Move scene cuts into the nearest pause within ``max_shift`` seconds
+
+    Returns (scenes, adjustments). Each cut moves to the midpoint of the
+    nearest silence; the scene keeps its end, and a previous scene that ended
+    exactly at the old cut is stretched or shortened to meet it.
+    """
+    np = lazy.get("numpy")
+    silences = np.asarray(analysis.silences)
+    if len(scenes) < 2 or not len(silences):
+        return scenes, []
+
+    midpoints = silences.mean(axis=1)
+    starts = np.array([s.get("start", 0) for s in scenes[1:]], dtype=np.float64)
+    right = np.clip(np.searchsorted(midpoints, starts), 0, len(midpoints) - 1)
+    left = np.clip(right - 1, 0, len(midpoints) - 1)
+    nearest = np.where(np.abs(midpoints[left] - starts) <= np.abs(midpoints[right] - starts), left, right)
+    targets = midpoints[nearest]
+    shifts = targets - starts
+
+    snapped = [dict(s) for s in scenes]
+    adjustments = []
+    for offset in np.flatnonzero((np.abs(shifts) <= max_shift) & (np.abs(shifts) >= 1e-3)):
+        i = int(offset) + 1
+        scene, previous = snapped[i], snapped[i - 1]
+        old_start = scene.get("start", 0)
+        new_start = round(float(targets[offset]), 3)
+        end = old_start + scene.get("duration", 0)
+        if new_start >= end or new_start <= previous.get("start", 0):
+            continue
+        scene["start"] = new_start
+        scene["duration"] = round(end - new_start, 3)
+        if abs(previous.get("start", 0) + previous.get("duration", 0) - old_start) < 1e-3:
+            previous["duration"] = round(new_start - previous.get("start", 0), 3)
+        adjustments.append({"scene_id": scene.get("id"), "from": old_start, "to": new_start})
+    return snapped, adjustments
+
+
+def _word_times(subtitles: List[dict]) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    np = lazy.get("numpy")
+    labels, starts, ends = [], [], []
+    for s_index, subtitle in enumerate(subtitles):
+        words = [w for line in subtitle.get("lines") or [] for w in line.get("words", [])]
+        words += subtitle.get("words") or []
+        for word in words:
+            labels.append(f"subtitles[{s_index}] '{word.get('text', '')}'")
+            starts.append(word.get("start", 0))
+            ends.append(word.get("end", word.get("start", 0)))
+        for item in subtitle.get("items") or []:
+            labels.append(f"subtitles[{s_index}] '{item.get('text', '')}'")
+            starts.append(item.get("start", 0))
+            ends.append(item.get("start", 0))
+    return labels, np.array(starts, dtype=np.float64), np.array(ends, dtype=np.float64)
+
+
+def validate_word_times(subtitles: List[dict], analysis: AudioAnalysis, tolerance: float = 0.05) -> Dict:
+    """Check subtitle word timings against the audio; returns {'valid', 'errors', 'warnings'}
+
+    Errors: times outside the track or ending before they start. Warnings:
+    words that sit entirely inside a detected pause (likely mistimed).
+    """
+    np = lazy.get("numpy")
+    errors, warnings = [], []
+    labels, starts, ends = _word_times(subtitles)
+    if not labels:
+        return {"valid": True, "errors": errors, "warnings": warnings}
+
+    for i in np.flatnonzero(starts < 0):
+        errors.append(f"{labels[i]} starts before the audio ({starts[i]:.2f}s)")
+    for i in np.flatnonzero(ends > analysis.duration + tolerance):
+        errors.append(f"{labels[i]} ends at {ends[i]:.2f}s, after the audio ends ({analysis.duration:.2f}s)")
+    for i in np.flatnonzero(ends < starts):
+        errors.append(f"{labels[i]} ends ({ends[i]:.2f}s) before it starts ({starts[i]:.2f}s)")
+
+    silences = np.asarray(analysis.silences)
+    if len(silences):
+        index = np.searchsorted(silences[:, 0], starts, side="right") - 1
+        valid_index = np.clip(index, 0, None)
+        in_pause = (index >= 0) & (ends > starts) & (ends <= silences[valid_index, 1] + 1e-3)
+        for i in np.flatnonzero(in_pause):
+            warnings.append(f"{labels[i]} ({starts[i]:.2f}-{ends[i]:.2f}s) falls entirely in a pause")
+
+    return {"valid": len(errors) == 0, "errors": errors, "warnings": warnings}
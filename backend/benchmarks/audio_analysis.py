@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark the upload-time audio analysis stage on a synthetic speech-like
+track: decode + RMS envelope + silence detection, then a cached reload and
+scene snapping / word validation against the memory-mapped result.
+
+Usage: python benchmarks/audio_analysis.py [minutes]
+"""
+
+import sys
+import time
+import wave
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import audio_analysis
+from audio_analysis import analyze_audio, snap_scene_boundaries, validate_word_times
+
+
+def synthetic_track(path: Path, minutes: float, rate: int = 44100):
+    """Bursts of noise ("words") separated by pauses, as 16-bit stereo WAV"""
+    rng = np.random.default_rng(0)
+    total = int(minutes * 60 * rate)
+    envelope = np.zeros(total, dtype=np.float32)
+    t = 0
+    while t < total:
+        talk = int(rng.uniform(1.0, 4.0) * rate)
+        envelope[t:t + talk] = 0.5
+        t += talk + int(rng.uniform(0.25, 0.8) * rate)
+    samples = (rng.standard_normal(total).astype(np.float32) * envelope * 0.5 * 32767).astype("<i2")
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(np.repeat(samples, 2).tobytes())
+
+
+def main():
+    minutes = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        audio_analysis.AUDIO_CACHE_DIR = tmp / "cache"
+        track = tmp / "track.wav"
+        synthetic_track(track, minutes)
+        print(f"Track: {minutes:.0f} min, {track.stat().st_size / 1e6:.0f} MB WAV")
+
+        start = time.perf_counter()
+        analysis = analyze_audio(track, tmp / "analysis")
+        cold = time.perf_counter() - start
+        print(f"Cold analysis:   {cold * 1000:7.1f} ms  ({analysis.summary()['silence_count']} pauses)")
+
+        start = time.perf_counter()
+        analysis = analyze_audio(track, tmp / "analysis")
+        print(f"Cached reload:   {(time.perf_counter() - start) * 1000:7.1f} ms (hash check + mmap)")
+
+        scenes = [{"id": f"s{i}", "start": i * 6.0, "duration": 6.0} for i in range(int(minutes * 10))]
+        words = [{"text": "w", "start": t, "end": t + 0.3} for t in np.arange(0, minutes * 60 - 1, 0.4)]
+        subtitles = [{"id": "sub", "words": words, "container_end": minutes * 60}]
+        start = time.perf_counter()
+        _, adjustments = snap_scene_boundaries(scenes, analysis)
+        result = validate_word_times(subtitles, analysis)
+        print(f"Snap + validate: {(time.perf_counter() - start) * 1000:7.1f} ms  "
+              f"({len(adjustments)} cuts snapped, {len(words)} words, {len(result['warnings'])} in pauses)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Python compositor's rasterization on a synthetic project: two
+scenes with animated avatars/props plus composed subtitles, rendered to raw
+frames (no ffmpeg) at the requested scale.
+
+--ffmpeg also renders the project end to end through render_video (frames
+piped into ffmpeg, H.264 encode), and --remotion renders the same props with
+the Remotion CLI, so the two engines' fps can be compared on one machine.
+
+Usage: python benchmarks/compositor.py [seconds] [scale] [--ffmpeg] [--remotion]
+"""
+
+import sys
+import json
+import time
+import shutil
+import asyncio
+import tempfile
+import subprocess
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import compositor
+from compositor import Compositor
+
+
+def synthetic_assets(directory: Path):
+    """An opaque 'avatar' and a translucent 'prop' with transparent margins"""
+    Image = compositor.lazy.get("PIL.Image")
+    directory.mkdir(parents=True, exist_ok=True)
+    avatar = np.zeros((1200, 900, 4), dtype=np.uint8)
+    avatar[100:1100, 150:750] = (200, 40, 40, 255)
+    Image.fromarray(avatar).save(directory / "avatar.png")
+    prop = np.zeros((600, 600, 4), dtype=np.uint8)
+    prop[50:550, 50:550] = (40, 40, 200, 200)
+    Image.fromarray(prop).save(directory / "prop.png")
+
+
+def synthetic_config(seconds: float, folder: str) -> dict:
+    half = seconds / 2
+    return {
+        "project_settings": {"fps": 30, "width": 1920, "height": 1080},
+        "scenes": [
+            {"id": "s1", "start": 0, "duration": half, "layout": "avatar_right_text_left", "elements": [
+                {"role": "avatar", "local_path": f"{folder}/avatar.png", "anim_enter": "slide_up", "anim_idle": "shake"},
+            ]},
+            {"id": "s2", "start": half, "duration": half, "layout": "avatar_center_props_sides", "elements": [
+                {"role": "avatar", "local_path": f"{folder}/avatar.png"},
+                {"role": "prop", "local_path": f"{folder}/prop.png", "anim_enter": "drop_down"},
+                {"role": "prop", "local_path": f"{folder}/prop.png", "anim_idle": "still"},
+            ]},
+        ],
+        "subtitles": [{
+            "mode": "composed_stack",
+            "container_end": half,
+            "lines": [
+                {"style": "normal", "words": [{"text": "render", "start": 0.2}, {"text": "without", "start": 0.4}]},
+                {"style": "highlight_red", "words": [{"text": "chrome", "start": 0.6}]},
+            ],
+        }],
+    }
+
+
+async def _spawn(*cmd, cwd, **kwargs):
+    return await asyncio.create_subprocess_exec(*cmd, cwd=cwd, start_new_session=True, **kwargs)
+
+
+async def _no_progress(done, total):
+    pass
+
+
+def bench_ffmpeg(config: dict, frames: int, scale: float, out_dir: Path):
+    """Compositor -> ffmpeg pipe -> MP4, as the python engine renders"""
+    output = out_dir / "compositor.mp4"
+    start = time.perf_counter()
+    comp = Compositor(config, frames, scale)
+    asyncio.run(compositor.render_video(comp, output, None, _spawn, _no_progress))
+    elapsed = time.perf_counter() - start
+    print(f"python engine: {elapsed:.2f}s end to end ({frames / elapsed:.1f} fps), "
+          f"{output.stat().st_size / 1e6:.1f} MB")
+
+
+def bench_remotion(config: dict, frames: int, scale: float, out_dir: Path):
+    """The same props rendered by the Remotion CLI, as the remotion engine renders (bundling included)"""
+    props = out_dir / "props.json"
+    props.write_text(json.dumps({"videoData": config, "durationInFrames": frames}))
+    output = out_dir / "remotion.mp4"
+    cmd = ["npm", "run", "render-bundle", "--", "src/index.tsx", "MainComposition", str(output),
+           "--props", str(props), "--scale", str(scale)]
+    start = time.perf_counter()
+    result = subprocess.run(cmd, cwd=str(compositor.REMOTION_DIR), capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0 or not output.exists():
+        print(f"remotion engine: failed ({result.stderr.strip()[-500:]})")
+        return
+    print(f"remotion engine: {elapsed:.2f}s end to end ({frames / elapsed:.1f} fps), "
+          f"{output.stat().st_size / 1e6:.1f} MB")
+
+
+def main():
+    flags = {arg for arg in sys.argv[1:] if arg.startswith("--")}
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    seconds = float(args[0]) if len(args) > 0 else 10
+    scale = float(args[1]) if len(args) > 1 else 1.0
+    folder = "_benchmark_compositor"
+    directory = compositor.PUBLIC_DIR / folder
+    synthetic_assets(directory)
+    try:
+        config = synthetic_config(seconds, folder)
+        reasons = [r for r in compositor.unsupported_features(config) if "ffmpeg" not in r]
+        if reasons:
+            print(f"Unsupported: {reasons}")
+            return
+        frames = int(seconds * 30)
+
+        start = time.perf_counter()
+        comp = Compositor(config, frames, scale)
+        setup = time.perf_counter() - start
+
+        start = time.perf_counter()
+        comp.render_frames(0, frames)
+        elapsed = time.perf_counter() - start
+        print(f"{frames} frames at {comp.width}x{comp.height}: setup {setup:.2f}s, "
+              f"raster {elapsed:.2f}s ({frames / elapsed:.1f} fps), {comp.reused_frames} frames reused")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            if "--ffmpeg" in flags:
+                if shutil.which("ffmpeg"):
+                    bench_ffmpeg(config, frames, scale, Path(tmp))
+                else:
+                    print("python engine: ffmpeg is not installed")
+            if "--remotion" in flags:
+                bench_remotion(config, frames, scale, Path(tmp))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
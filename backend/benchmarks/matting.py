@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Benchmark the matting tiers on the sample project's assets: each matted PNG is
+flattened onto white (what the image provider returns) and matted again with
+every tier. Reports median latency and mask IoU against the full tier and
+against the shipped alpha.
+
+Without rembg installed only the mask upsampling is compared: the assets'
+alpha (made crisp) is reduced to model resolution and brought back with
+LANCZOS (what rembg does) and with the guided refine of the fast tiers.
+
+The model-free background key runs either way: how many assets it keys
+confidently, its latency and its IoU against the shipped alpha.
+
+Usage: python benchmarks/matting.py [assets_dir] [runs]
+       python benchmarks/matting.py --quantize out.onnx   # int8 lite model for MATTING_LITE_MODEL_PATH
+"""
+
+import io
+import os
+import sys
+import time
+import statistics
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import matting
+from lazy_imports import lazy
+
+SAMPLE_ASSETS = Path(__file__).resolve().parent.parent / "projects" / "5942b1de" / "assets"
+
+
+def flatten(path: Path, crisp: bool = False):
+    """The asset over white as PNG bytes, plus its alpha as ground truth"""
+    Image = lazy.get("PIL.Image")
+    rgba = np.asarray(Image.open(path).convert("RGBA")).copy()
+    if crisp:
+        rgba[..., 3] = np.where(rgba[..., 3] > 127, 255, 0)
+    alpha = rgba[..., 3].astype(np.float32)[..., None] / 255
+    rgb = (rgba[..., :3] * alpha + 255 * (1 - alpha) + 0.5).astype(np.uint8)
+    out = io.BytesIO()
+    Image.fromarray(rgb).save(out, format="PNG")
+    return out.getvalue(), rgba[..., 3]
+
+
+def alpha_of(png: bytes) -> np.ndarray:
+    return np.asarray(lazy.get("PIL.Image").open(io.BytesIO(png)).convert("RGBA"))[..., 3]
+
+
+def iou(mask: np.ndarray, reference: np.ndarray) -> float:
+    a, b = mask > 127, reference > 127
+    union = (a | b).sum()
+    return float((a & b).sum() / union) if union else 1.0
+
+
+def edge_error(mask: np.ndarray, reference: np.ndarray) -> float:
+    """Mean absolute alpha error (0-255) within 4px of the reference edge"""
+    from PIL import Image, ImageFilter
+
+    solid = Image.fromarray(np.where(reference > 127, 255, 0).astype(np.uint8))
+    band = np.asarray(solid.filter(ImageFilter.FIND_EDGES).filter(ImageFilter.MaxFilter(9))) > 0
+    return float(np.abs(mask[band].astype(np.float32) - reference[band]).mean())
+
+
+def bench_tiers(files, runs: int):
+    inputs = [flatten(path) for path in files]
+    baseline = [alpha_of(matting.remove_background(png, "full")) for png, _ in inputs]
+    print(f"{'tier':6s} {'median ms':>10s} {'IoU vs full':>12s} {'IoU vs shipped':>15s}")
+    for tier in matting.TIERS:
+        matting.remove_background(inputs[0][0], tier)  # load the tier's model
+        times, vs_full, vs_shipped = [], [], []
+        for (png, shipped), reference in zip(inputs, baseline):
+            for _ in range(runs):
+                start = time.perf_counter()
+                output = matting.remove_background(png, tier)
+                times.append(time.perf_counter() - start)
+            mask = alpha_of(output)
+            vs_full.append(iou(mask, reference))
+            vs_shipped.append(iou(mask, shipped))
+        print(f"{tier:6s} {statistics.median(times) * 1000:10.0f} {np.mean(vs_full):12.4f} {np.mean(vs_shipped):15.4f}")
+
+
+def bench_upsampling(files, runs: int):
+    Image = lazy.get("PIL.Image")
+    print(f"rembg not installed; comparing mask upsampling only ({matting.FAST_SIZE}px masks, crisp ground truth)")
+    print(f"{'upsample':10s} {'median ms':>10s} {'IoU':>8s} {'edge err':>9s}")
+    results = {"lanczos": ([], [], []), "guided": ([], [], [])}
+    for path in files:
+        png, truth = flatten(path, crisp=True)
+        image = Image.open(io.BytesIO(png)).convert("RGB")
+        small = image.copy()
+        small.thumbnail((matting.FAST_SIZE, matting.FAST_SIZE), Image.BILINEAR)
+        # Stand-in for the model's output: the true mask at inference resolution
+        low = Image.fromarray(truth).resize(small.size, Image.BOX)
+        for name in results:
+            times, ious, edges = results[name]
+            for _ in range(runs):
+                start = time.perf_counter()
+                if name == "lanczos":
+                    mask = np.asarray(low.resize(image.size, Image.LANCZOS))
+                else:
+                    mask = matting.guided_upsample(np.asarray(image), np.asarray(small), np.asarray(low))
+                times.append(time.perf_counter() - start)
+            ious.append(iou(mask, truth))
+            edges.append(edge_error(mask, truth))
+    for name, (times, ious, edges) in results.items():
+        print(f"{name:10s} {statistics.median(times) * 1000:10.1f} {np.mean(ious):8.4f} {np.mean(edges):9.1f}")
+
+
+def bench_key(files, runs: int):
+    print("background key (no model)")
+    print(f"{'asset':24s} {'median ms':>10s} {'IoU':>8s}  result")
+    keyed, times = 0, []
+    for path in files:
+        png, shipped = flatten(path)
+        samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            output, metrics = matting.chroma_key_png(png)
+            samples.append(time.perf_counter() - start)
+        times.extend(samples)
+        if output:
+            keyed += 1
+            result = f"{iou(alpha_of(output), shipped):8.4f}  keyed"
+        else:
+            result = f"{'':8s}  model needed (low contrast edge {metrics.get('low_contrast_edge')})"
+        print(f"{path.name[:24]:24s} {statistics.median(samples) * 1000:10.0f} {result}")
+    print(f"keyed {keyed}/{len(files)}, median {statistics.median(times) * 1000:.0f} ms")
+
+
+def quantize(target: Path):
+    """Write an int8 (dynamic quantization) copy of the lite model"""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    model = os.getenv("MATTING_LITE_MODEL", "u2netp")
+    lazy.get("rembg").new_session(model)  # downloads the model if needed
+    source = Path(os.getenv("U2NET_HOME", Path.home() / ".u2net")) / f"{model}.onnx"
+    quantize_dynamic(str(source), str(target), weight_type=QuantType.QUInt8)
+    print(f"{source} ({source.stat().st_size / 1e6:.1f} MB) -> {target} ({target.stat().st_size / 1e6:.1f} MB)")
+    print(f"Use it with MATTING_TIER_PROP=lite MATTING_LITE_MODEL_PATH={target}")
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == "--quantize":
+        quantize(Path(sys.argv[2]))
+        return
+    assets = Path(sys.argv[1]) if len(sys.argv) > 1 else SAMPLE_ASSETS
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    files = sorted(assets.glob("*.png"))
+    print(f"{len(files)} assets from {assets}, {runs} run(s) each")
+    bench_key(files, runs)
+    print()
+    try:
+        lazy.get("rembg")
+    except ImportError:
+        bench_upsampling(files, runs)
+        return
+    bench_tiers(files, runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark cold start of the API: import time and peak RSS of `import main`
+(lazy, as shipped, versus eagerly importing the registered heavy modules),
+and wall time from process spawn to the first healthy /api/health response.
+
+Usage: python benchmarks/startup.py [runs]
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import statistics
+import subprocess
+import urllib.request
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+IMPORT_PROBE = """
+import sys, time, json, resource
+start = time.perf_counter()
+import main
+eager = sys.argv[1] == "eager"
+if eager:
+    from lazy_imports import lazy
+    for name in ("httpx", "PIL.Image", "google.genai"):
+        try:
+            lazy.get(name)
+        except Exception:
+            pass
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))
+"""
+
+
+def measure_import(mode: str) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE, mode],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_first_healthy(timeout: float = 60.0) -> float:
+    port = free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        env={**os.environ, "PREWARM_IMPORTS": ""},
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/health", timeout=1) as resp:
+                    if resp.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.02)
+        raise TimeoutError("server did not become healthy")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    for mode in ("lazy", "eager"):
+        samples = [measure_import(mode) for _ in range(runs)]
+        secs = statistics.median(s["seconds"] for s in samples)
+        rss = statistics.median(s["max_rss_kb"] for s in samples) / 1024
+        print(f"import main ({mode:5}): {secs * 1000:8.1f} ms   peak RSS {rss:7.1f} MiB")
+
+    healthy = statistics.median(measure_first_healthy() for _ in range(runs))
+    print(f"spawn -> first healthy /api/health: {healthy * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-frame scene/subtitle lookup: linear scans (what the Remotion
+layers did) versus the precomputed timeline index from timeline.py.
+
+Usage: python benchmarks/timeline_lookup.py [minutes] [fps]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from timeline import build_timeline_index, lookup
+
+
+def synthetic_script(minutes: float, words_per_second: float = 2.5):
+    """Scenes every ~6s and three-word subtitle containers covering the whole track"""
+    total = minutes * 60
+    scenes = []
+    t = 0.0
+    while t < total:
+        scenes.append({"id": f"scene_{len(scenes)}", "start": round(t, 3), "duration": 6.0, "layout": "avatar_right_text_left"})
+        t += 6.0
+
+    subtitles = []
+    word_len = 1 / words_per_second
+    t = 0.0
+    while t < total:
+        words = [{"text": "word", "start": round(t + i * word_len, 3), "end": round(t + (i + 1) * word_len, 3)} for i in range(3)]
+        subtitles.append({
+            "id": f"sub_{len(subtitles)}",
+            "mode": "composed_stack",
+            "container_end": round(t + 3 * word_len, 3),
+            "lines": [{"style": "normal", "words": words}],
+        })
+        t += 3 * word_len
+    return scenes, subtitles, total
+
+
+def linear_lookup(scenes, subtitles, frame, fps):
+    """Equivalent of the per-frame scans in VisualLayer/TextLayer"""
+    active_scenes = [i for i, s in enumerate(scenes) if s["start"] * fps <= frame < (s["start"] + s["duration"]) * fps]
+    active_subtitles = []
+    for i, sub in enumerate(subtitles):
+        first = sub["lines"][0]["words"][0]["start"]
+        if first * fps <= frame < sub["container_end"] * fps:
+            scene = next((s for s in scenes if s["start"] <= first < s["start"] + s["duration"]), None)
+            active_subtitles.append((i, scene["id"] if scene else None))
+    return active_scenes, active_subtitles
+
+
+def main():
+    minutes = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    fps = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    scenes, subtitles, total = synthetic_script(minutes)
+    frames = int(total * fps)
+    words = sum(len(line["words"]) for sub in subtitles for line in sub["lines"])
+    print(f"{minutes:g} min @ {fps}fps: {frames} frames, {len(scenes)} scenes, {len(subtitles)} subtitles, {words} words")
+
+    start = time.perf_counter()
+    index = build_timeline_index(scenes, subtitles, fps)
+    build_s = time.perf_counter() - start
+    print(f"index build:   {build_s * 1000:8.1f} ms")
+
+    # Sample frames for the linear scan; a full pass takes minutes on long tracks
+    step = max(1, frames // 2000)
+    sample = range(0, frames, step)
+    start = time.perf_counter()
+    for frame in sample:
+        linear_lookup(scenes, subtitles, frame, fps)
+    linear_per_frame = (time.perf_counter() - start) / len(sample)
+
+    start = time.perf_counter()
+    for frame in range(frames):
+        lookup(index["scenes"], frame)
+        for i in lookup(index["subtitles"], frame):
+            index["subtitle_scene"][i]
+    indexed_per_frame = (time.perf_counter() - start) / frames
+
+    print(f"linear scan:   {linear_per_frame * 1e6:8.2f} us/frame  ({linear_per_frame * frames:.2f} s per render)")
+    print(f"indexed:       {indexed_per_frame * 1e6:8.2f} us/frame  ({indexed_per_frame * frames:.3f} s per render)")
+    print(f"speedup:       {linear_per_frame / indexed_per_frame:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,13 +4,26 @@ import asyncio
 import time
 from pathlib import Path
 from typing import Callable, Optional, Dict, List
-import httpx
-from PIL import Image
 from io import BytesIO
 import base64
-from project_manager import ProjectManager
-from google import genai
-from google.genai import types
+from journal import AssetJournal, GENERATED, MATTED, SAVED, sha256_bytes
+from asset_index import AssetIndex
+from timeline import build_timeline_index
+from schema_validator import validate_motion_tables, validate_timeline_index
+from motion import build_motion_tables
+from atlas import ATLAS_ENABLED, build_project_atlas
+from lazy_imports import lazy
+from asset_plan import plan_assets
+from matting import KEY_ROLES, chroma_key_png, remove_background, tier_for
+from storage import atomic_write_json, link_file
+from audio_analysis import (
+    DEFAULT_SNAP_SECONDS,
+    AudioAnalysis,
+    analyze_audio,
+    find_project_audio,
+    snap_scene_boundaries,
+    validate_word_times,
+)
 
 
 class Builder:
@@ -19,12 +32,16 @@ class Builder:
     def __init__(
         self,
         project_id: str,
+        project_dir: Path,
         log_callback: Optional[Callable[[str], None]] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
     ):
         self.project_id = project_id
-        self.project_manager = ProjectManager()
-        self.project_dir = self.project_manager.get_project_dir(project_id)
+        # The app's ProjectManager owns the registry; the builder only needs the folder
+        self.project_dir = Path(project_dir)
         self.log_callback = log_callback or (lambda x: print(x))
+        # Called with (assets done, total assets) after each unique asset is in place
+        self.progress_callback = progress_callback or (lambda done, total: None)
 
         self.status = "idle"
         self.error = None
@@ -32,6 +49,10 @@ class Builder:
         self.total_assets = 0
         self.final_config = None
 
+        # Checkpoint journal so interrupted runs resume where they stopped
+        self.journal = AssetJournal(self.project_dir)
+        self.asset_index = AssetIndex.for_directory(self.project_dir / "assets")
+
         # Load script from project directory
         script_path = self.project_dir / "input_script.json"
         with open(script_path, "r") as f:
@@ -47,7 +68,7 @@ class Builder:
         # Initialize Google Gemini client for avatar generation
         self.google_api_key = os.getenv("GOOGLE_API_KEY")
         if self.google_api_key:
-            self.genai_client = genai.Client(api_key=self.google_api_key)
+            self.genai_client = lazy.get("google.genai").Client(api_key=self.google_api_key)
             # Base avatar path for consistency
             self.base_avatar_path = Path(__file__).parent / "public" / "assets" / "image" / "avatars" / "avatar.png"
         else:
@@ -55,20 +76,22 @@ class Builder:
             print("Warning: GOOGLE_API_KEY not set, will use Together.ai for all images")
 
     def _count_assets(self):
-        """Count total assets to generate (NEW SCHEMA ONLY)"""
-        count = 0
-        
-        # New schema: count elements with type 'image'
-        if 'scenes' in self.script:
-            for scene in self.script.get("scenes", []):
-                for element in scene.get("elements", []):
-                    if element.get("type") == "image":
-                        count += 1
-        else:
+        """Count unique assets to generate (NEW SCHEMA ONLY)"""
+        if 'scenes' not in self.script:
             # No valid schema found
             raise ValueError("Invalid script format: Missing 'scenes' array. Please use new JSON schema with 'scenes' and 'subtitles'.")
-        
-        self.total_assets = count
+
+        # Elements sharing a prompt, role and model are generated once
+        self.asset_plan = self._plan_generation()
+        self.total_assets = self.asset_plan["stats"]["unique_assets"]
+
+    def _plan_generation(self) -> Dict:
+        """Deduplicated generation plan for the current script"""
+        def _is_saved(asset_id: str) -> bool:
+            asset_path = self._asset_path(asset_id)
+            return self.journal.is_saved(asset_id, asset_path) or asset_path.exists()
+
+        return plan_assets(self.script, bool(os.getenv("GOOGLE_API_KEY")), _is_saved)
 
     async def _log(self, message: str):
         """Log message and notify via callback"""
@@ -79,8 +102,32 @@ class Builder:
 
     async def _check_file_exists(self, asset_id: str) -> bool:
         """Check if asset already exists (idempotency)"""
-        asset_path = self.project_dir / "assets" / f"{asset_id}.png"
-        return asset_path.exists()
+        return self._asset_path(asset_id).exists()
+
+    def _asset_path(self, asset_id: str) -> Path:
+        return self.project_dir / "assets" / f"{asset_id}.png"
+
+    async def _save_asset(self, image_bytes: bytes, asset_id: str, **journal_extra):
+        """Atomically publish final asset bytes and journal them as saved"""
+        # The write, journal fsync and index update are disk work; keep them off the loop
+        await asyncio.to_thread(self._write_asset, image_bytes, asset_id, journal_extra)
+        self.generated_assets.append(asset_id)
+
+    def _write_asset(self, image_bytes: bytes, asset_id: str, journal_extra: Dict):
+        asset_path = self._asset_path(asset_id)
+        asset_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = asset_path.with_suffix(".png.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(image_bytes)
+        os.replace(tmp_path, asset_path)
+
+        # Verify the file was written
+        if not asset_path.exists() or asset_path.stat().st_size == 0:
+            raise IOError("Failed to write output file")
+
+        digest = sha256_bytes(image_bytes)
+        self.journal.record_saved(asset_id, asset_path, digest, **journal_extra)
+        self.asset_index.record(asset_path, digest)
 
     async def _generate_avatar_google(self, prompt: str, asset_id: str, max_retries: int = 3) -> Optional[bytes]:
         """Generate avatar using Google Gemini 2.5 Flash Image with base avatar for consistency"""
@@ -98,7 +145,7 @@ class Builder:
                     return None
 
                 # Load base avatar image
-                base_avatar = Image.open(self.base_avatar_path)
+                base_avatar = lazy.get("PIL.Image").open(self.base_avatar_path)
                 
                 # Enhanced prompt for avatar consistency
                 enhanced_prompt = f"Create avatar based on this person with transparent background: {prompt}. Maintain facial features and appearance consistency with the base image. 2D flat vector art style, clean design.avatar should cover full body(no half avatar image)"
@@ -164,13 +211,13 @@ class Builder:
             together_bearer_token = os.getenv("TOGETHER_BEARER_TOKEN")
             if not together_bearer_token:
                 await self._log(f"Warning: TOGETHER_BEARER_TOKEN not set, using placeholder image")
-                img = Image.new("RGBA", (1024, 768), color=(73, 109, 137, 255))
+                img = lazy.get("PIL.Image").new("RGBA", (1024, 768), color=(73, 109, 137, 255))
                 img_bytes = BytesIO()
                 img.save(img_bytes, format="PNG")
                 return img_bytes.getvalue()
 
             # Call Together.ai FLUX API
-            async with httpx.AsyncClient(timeout=60.0) as client:
+            async with lazy.get("httpx").AsyncClient(timeout=60.0) as client:
                 response = await client.post(
                     "https://api.together.xyz/v1/images/generations",
                     headers={
@@ -236,13 +283,14 @@ class Builder:
             await self._log(f"Error generating image for {asset_id}: {str(e)}")
             return None
 
-    async def _remove_background(self, image_bytes: bytes, asset_id: str) -> bool:
+    async def _remove_background(self, image_bytes: bytes, asset_id: str, role: str = "avatar") -> bool:
         """
         Remove background from image using rembg library
         
         Args:
             image_bytes: Raw image data as bytes
             asset_id: Unique identifier for the asset (used for logging)
+            role: Asset role; picks the matting quality tier (see matting.tier_for)
             
         Returns:
             bool: True if background was successfully removed or fallback was used, False on critical error
@@ -252,36 +300,41 @@ class Builder:
             return False
             
         try:
-            # Import rembg here to handle cases where it's not installed
-            try:
-                from rembg import remove, new_session
-            except ImportError as import_err:
-                await self._log("Error: rembg library not installed. Please install it with 'pip install rembg'")
-                return False
+            # Props on a plain background are keyed without a model when the key is confident
+            keyed = None
+            if role in KEY_ROLES:
+                try:
+                    keyed, metrics = await asyncio.to_thread(chroma_key_png, image_bytes)
+                except Exception as e:
+                    metrics = {"error": str(e)}
+                if keyed is None:
+                    await self._log(f"[DEBUG] Background key not confident for {asset_id} ({metrics}), using rembg")
+
+            if keyed is None:
+                # Load rembg lazily to handle cases where it's not installed
+                try:
+                    lazy.get("rembg")
+                except ImportError as import_err:
+                    await self._log("Error: rembg library not installed. Please install it with 'pip install rembg'")
+                    return False
 
-            await self._log(f"[DEBUG] Starting background removal for {asset_id}...")
+            tier = tier_for(role, self.script.get("project_settings"))
+            await self._log(f"[DEBUG] Starting background removal for {asset_id} ({'key' if keyed else tier + ' tier'})...")
             
             # Process the image with rembg
             try:
-                # Use a session for better performance with multiple images
-                session = new_session()
-                output_bytes = remove(image_bytes, session=session)
+                # Sessions (and ONNX models) are shared across images; inference runs off the loop
+                output_bytes = keyed or await asyncio.to_thread(remove_background, image_bytes, tier)
                 
                 if not output_bytes:
                     await self._log(f"Warning: Empty output from rembg for {asset_id}")
                     raise ValueError("Empty output from rembg")
                 
+                await asyncio.to_thread(self.journal.record_matted, asset_id, output_bytes)
+
                 # Save the output image
-                asset_path = self.project_dir / "assets" / f"{asset_id}.png"
                 try:
-                    with open(asset_path, "wb") as f:
-                        f.write(output_bytes)
-                    
-                    # Verify the file was written
-                    if not asset_path.exists() or asset_path.stat().st_size == 0:
-                        raise IOError("Failed to write output file")
-                        
-                    self.generated_assets.append(asset_id)
+                    await self._save_asset(output_bytes, asset_id)
                     await self._log(f"✓ Successfully processed and saved {asset_id} with transparent background")
                     return True
                     
@@ -293,11 +346,7 @@ class Builder:
                 await self._log(f"Error during background removal for {asset_id}: {str(process_err)}")
                 # Fallback: save original image if rembg fails
                 try:
-                    asset_path = self.project_dir / "assets" / f"{asset_id}.png"
-                    with open(asset_path, "wb") as f:
-                        f.write(image_bytes)
-                    
-                    self.generated_assets.append(asset_id)
+                    await self._save_asset(image_bytes, asset_id, fallback=True)
                     await self._log(f"✓ Saved original image for {asset_id} (background removal failed)")
                     return True
                 except Exception as fallback_err:
@@ -308,22 +357,52 @@ class Builder:
             await self._log(f"Unexpected error in _remove_background for {asset_id}: {str(e)}")
             return False
 
+    def _adopt_asset(self, asset_id: str, asset_path: Path):
+        self.journal.record_saved(asset_id, asset_path, adopted=True)
+        self.asset_index.record(asset_path, self.journal.entries[asset_id]["sha256"])
+
     async def _generate_with_retry(
         self, prompt: str, asset_id: str, role: str = "avatar", max_retries: int = 3
     ) -> bool:
-        """Generate asset with exponential backoff retry logic"""
+        """Generate asset with exponential backoff retry logic, resuming from the journal"""
+        asset_path = self._asset_path(asset_id)
+        if await asyncio.to_thread(self.journal.is_saved, asset_id, asset_path):
+            await self._log(f"Asset {asset_id} already saved (journal), skipping generation")
+            self.generated_assets.append(asset_id)
+            return True
+
+        if asset_path.exists() and self.journal.state(asset_id) in (None, SAVED):
+            # Produced before journaling or replaced by hand; adopt the file on disk
+            await asyncio.to_thread(self._adopt_asset, asset_id, asset_path)
+            await self._log(f"Asset {asset_id} already exists, recorded in journal")
+            self.generated_assets.append(asset_id)
+            return True
+
+        await asyncio.to_thread(self.journal.mark_pending, asset_id, prompt, role)
+
         for attempt in range(max_retries):
             try:
-                image_bytes = await self._generate_image(prompt, asset_id, role)
-                if image_bytes is None:
-                    if role == "avatar":
-                        # Avatar generation failed - don't retry
-                        return False
-                    else:
-                        # Prop already exists or cached
-                        return True
-
-                success = await self._remove_background(image_bytes, asset_id)
+                checkpoint_state, image_bytes = await asyncio.to_thread(self.journal.resume_bytes, asset_id)
+                if checkpoint_state == MATTED:
+                    await self._log(f"Resuming {asset_id} from matted checkpoint")
+                    await self._save_asset(image_bytes, asset_id)
+                    await self._log(f"✓ Saved {asset_id} from checkpoint")
+                    return True
+
+                if checkpoint_state == GENERATED:
+                    await self._log(f"Resuming {asset_id} from generated checkpoint, skipping provider call")
+                else:
+                    image_bytes = await self._generate_image(prompt, asset_id, role)
+                    if image_bytes is None:
+                        if role == "avatar":
+                            # Avatar generation failed - don't retry
+                            return False
+                        else:
+                            # Prop already exists or cached
+                            return True
+                    await asyncio.to_thread(self.journal.record_generated, asset_id, image_bytes)
+
+                success = await self._remove_background(image_bytes, asset_id, role)
                 if success:
                     return True
 
@@ -355,54 +434,47 @@ class Builder:
             if 'subtitles' not in self.script:
                 raise ValueError("Invalid script format: Missing 'subtitles' array. Please use the new JSON schema with 'scenes' and 'subtitles'.")
 
-            # Process scenes and elements
             for scene_idx, scene in enumerate(self.script.get("scenes", [])):
+                if not isinstance(scene, dict):
+                    await self._log(f"Warning: Scene {scene_idx + 1} is not a valid dictionary, skipping")
+                elif not isinstance(scene.get("elements"), list):
+                    await self._log(f"Warning: Scene {scene_idx + 1} has no valid elements, skipping")
+
+            # Planning verifies saved assets against their journaled hashes
+            self.asset_plan = await asyncio.to_thread(self._plan_generation)
+            self.total_assets = self.asset_plan["stats"]["unique_assets"]
+            stats = self.asset_plan["stats"]
+            for warning in self.asset_plan["warnings"]:
+                await self._log(f"Warning: {warning}")
+            await self._log(
+                f"Asset plan: {stats['elements']} image elements -> {stats['unique_assets']} unique assets "
+                f"(dedup ratio {stats['dedup_ratio']}x, {stats['provider_calls']} provider calls)"
+            )
+
+            scenes = self.script["scenes"]
+            for done, asset in enumerate(self.asset_plan["assets"], start=1):
+                asset_id = asset["asset_id"]
                 try:
-                    if not isinstance(scene, dict):
-                        await self._log(f"Warning: Scene {scene_idx + 1} is not a valid dictionary, skipping")
-                        continue
-                        
-                    await self._log(f"Processing scene {scene_idx + 1}...")
-                    
-                    # Ensure scene has elements array
-                    if "elements" not in scene or not isinstance(scene["elements"], list):
-                        await self._log(f"Warning: Scene {scene_idx + 1} has no valid elements, skipping")
-                        continue
-
-                    for element in scene["elements"]:
-                        if not isinstance(element, dict):
-                            await self._log(f"Warning: Element in scene {scene_idx + 1} is not a valid dictionary, skipping")
-                            continue
-                            
-
-                        # Only process image elements
-                        if element.get("type") != "image":
-                            continue
-                            
-
-                        asset_id = element.get("id", f"element_{scene_idx}")
-                        prompt = element.get("prompt", "")
-                        role = element.get("role", "avatar")  # Get role from element
-
-                        if not prompt:
-                            await self._log(f"Warning: No prompt provided for {asset_id} in scene {scene_idx + 1}, skipping")
-                            continue
-
-                        await self._log(f"Generating image asset: {asset_id} (role: {role})")
-                        success = await self._generate_with_retry(prompt, asset_id, role)
-                        if not success:
-                            self.status = "error"
-                            self.error = f"Failed to generate {asset_id}"
-                            return
-                            
-
-                        # Update the element with the local path
-                        element["local_path"] = f"assets/{asset_id}.png"
-                        await self._log(f"Updated {asset_id} local_path: assets/{asset_id}.png")
-
-                except Exception as scene_error:
+                    shared = len(asset["references"])
+                    suffix = f", shared by {shared} elements" if shared > 1 else ""
+                    await self._log(f"Generating image asset: {asset_id} (role: {asset['role']}{suffix})")
+                    success = await self._generate_with_retry(asset["prompt"], asset_id, asset["role"])
+                    if not success:
+                        self.status = "error"
+                        self.error = f"Failed to generate {asset_id}"
+                        return
+
+                    # Fan the one generated file out to every element that asked for it
+                    local_path = f"assets/{asset_id}.png"
+                    for ref in asset["references"]:
+                        scenes[ref["scene_index"]]["elements"][ref["element_index"]]["local_path"] = local_path
+                    await self._log(f"Updated local_path of {shared} element(s) to {local_path}")
+                    self.progress_callback(done, self.total_assets)
+
+                except Exception as asset_error:
                     self.status = "error"
-                    self.error = f"Error processing scene {scene_idx + 1}: {str(scene_error)}"
+                    scene_idx = asset["references"][0]["scene_index"]
+                    self.error = f"Error processing {asset_id} (scene {scene_idx + 1}): {str(asset_error)}"
                     return
 
             await self._log("All assets generated successfully!")
@@ -419,8 +491,67 @@ class Builder:
             self.error = str(e)
             await self._log(f"Error: {str(e)}")
 
-    async def _build_final_config(self):
-        """Build final configuration with local paths for renderer (NEW SCHEMA ONLY)"""
+    def invalidate_assets(self, asset_ids: List[str]):
+        """Forget generated assets whose prompt or role changed so the next run regenerates them"""
+        prompts = {asset["asset_id"]: asset for asset in self.asset_plan["assets"]}
+        for asset_id in asset_ids:
+            asset = prompts.get(asset_id, {})
+            self.journal.invalidate(asset_id, asset.get("prompt", ""), asset.get("role", ""))
+            asset_path = self._asset_path(asset_id)
+            asset_path.unlink(missing_ok=True)
+            self.asset_index.remove(asset_path.name)
+        self.asset_plan = self._plan_generation()
+
+    def _reusable_atlas(self) -> Optional[Dict]:
+        """The previous config's atlas, if it still covers the current scenes unchanged"""
+        config_path = self.project_dir / "final_render.json"
+        if not config_path.exists():
+            return None
+        try:
+            with open(config_path, "r") as f:
+                previous = json.load(f)
+        except (OSError, ValueError):
+            return None
+        atlas = previous.get("atlas")
+        if not atlas or previous.get("project_settings") != self.script.get("project_settings"):
+            return None
+        rects = atlas.get("rects", {})
+        for asset in self.asset_plan["assets"]:
+            if f"assets/{asset['asset_id']}.png" not in rects:
+                return None
+        return atlas
+
+    async def rebuild_config(self, reuse_atlas: bool = True) -> bool:
+        """Rebuild the render config for an edited script without generating anything
+
+        Only possible when every planned asset is already saved; returns False
+        without touching anything otherwise. With ``reuse_atlas`` the previous
+        atlas is kept when it still covers every asset, so a text-only edit
+        does not repack images.
+        """
+        self.asset_plan = await asyncio.to_thread(self._plan_generation)
+        self.total_assets = self.asset_plan["stats"]["unique_assets"]
+        if any(not asset["saved"] for asset in self.asset_plan["assets"]):
+            return False
+
+        scenes = self.script["scenes"]
+        for asset in self.asset_plan["assets"]:
+            local_path = f"assets/{asset['asset_id']}.png"
+            for ref in asset["references"]:
+                scenes[ref["scene_index"]]["elements"][ref["element_index"]]["local_path"] = local_path
+        self.generated_assets = [asset["asset_id"] for asset in self.asset_plan["assets"]]
+
+        atlas = self._reusable_atlas() if reuse_atlas else None
+        await self._build_final_config(atlas=atlas)
+        await self._copy_assets_to_remotion()
+        self.status = "ready"
+        return True
+
+    async def _build_final_config(self, atlas: Optional[Dict] = None):
+        """Build final configuration with local paths for renderer (NEW SCHEMA ONLY)
+
+        ``atlas`` is an existing atlas index to keep instead of packing a new one.
+        """
         try:
             if not hasattr(self, 'script') or self.script is None:
                 raise ValueError("Script data is missing or invalid")
@@ -445,14 +576,61 @@ class Builder:
                 "subtitles": self.script["subtitles"],
             }
             await self._log("Using new schema format")
+
+            # Align scene cuts with pauses and sanity-check word times against the audio
+            analysis = await asyncio.to_thread(self._load_audio_analysis)
+            if analysis:
+                settings = final_config["project_settings"]
+                # Opt-in: snapping retimes scenes, which existing projects do not expect
+                snap = settings.get("snap_to_silence")
+                max_shift = DEFAULT_SNAP_SECONDS if snap is True else float(snap or 0)
+                if max_shift:
+                    final_config["scenes"], adjustments = snap_scene_boundaries(final_config["scenes"], analysis, max_shift)
+                    if adjustments:
+                        await self._log(f"✓ Snapped {len(adjustments)} scene boundaries to pauses (max shift {max_shift}s)")
+                word_check = validate_word_times(final_config["subtitles"], analysis)
+                for problem in word_check["errors"] + word_check["warnings"][:10]:
+                    await self._log(f"Warning: {problem}")
+                final_config["audio_duration"] = round(analysis.duration, 3)
+
+            # Precompute frame lookup tables so the renderer avoids per-frame scans
+            fps = final_config["project_settings"].get("fps", 30)
+            timeline = build_timeline_index(final_config["scenes"], final_config["subtitles"], fps)
+            validation_result = validate_timeline_index(
+                timeline, len(final_config["scenes"]), len(final_config["subtitles"])
+            )
+            if not validation_result["valid"]:
+                raise ValueError(f"Invalid timeline index: {'; '.join(validation_result['errors'])}")
+            final_config["timeline"] = timeline
+            await self._log(f"✓ Timeline index built ({len(timeline['words']['bounds'])} word boundaries at {fps}fps)")
+
+            # Evaluate the spring/entrance/idle curves once instead of on every rendered frame
+            motion = build_motion_tables(final_config["scenes"], final_config["subtitles"], fps)
+            validation_result = validate_motion_tables(motion)
+            if not validation_result["valid"]:
+                raise ValueError(f"Invalid motion tables: {'; '.join(validation_result['errors'])}")
+            final_config["motion"] = motion
+            await self._log(f"✓ Motion tables built ({len(motion['entrances'])} entrances, {len(motion['idles'])} idles over {motion['idle_frames']} frames)")
+
+            # Optional: pack the assets into a few texture atlases so renders fetch and decode less
+            if atlas:
+                final_config["atlas"] = atlas
+                await self._log(f"✓ Reusing atlas of {len(atlas['rects'])} assets")
+            elif ATLAS_ENABLED:
+                try:
+                    atlas = await asyncio.to_thread(build_project_atlas, self.project_id, final_config, self.project_dir / "assets")
+                    if atlas:
+                        final_config["atlas"] = atlas
+                        await self._log(f"✓ Packed {len(atlas['rects'])} assets into {len(atlas['pages'])} atlas page(s) ({atlas['fill']:.0%} filled)")
+                except Exception as e:
+                    await self._log(f"Warning: atlas packing failed, rendering from individual assets: {str(e)}")
             
             self.final_config = final_config
 
             # Save to file
             try:
                 config_path = self.project_dir / "final_render.json"
-                with open(config_path, "w") as f:
-                    json.dump(final_config, f, indent=2)
+                await asyncio.to_thread(atomic_write_json, config_path, final_config)
                 await self._log(f"✓ Final config saved to {config_path}")
             except Exception as e:
                 await self._log(f"Error saving final config: {str(e)}")
@@ -463,6 +641,20 @@ class Builder:
             await self._log(error_msg)
             raise ValueError(error_msg)
 
+    def _load_audio_analysis(self):
+        """Waveform analysis from upload time, computed now for projects created before it existed"""
+        analysis = AudioAnalysis.load(self.project_dir / "analysis")
+        if analysis:
+            return analysis
+        audio_file = find_project_audio(self.project_dir)
+        if not audio_file:
+            return None
+        try:
+            return analyze_audio(audio_file, self.project_dir / "analysis")
+        except Exception as e:
+            print(f"Audio analysis failed for {audio_file}: {str(e)}")
+            return None
+
     async def _copy_assets_to_remotion(self):
         """Copy generated assets to Remotion public directory"""
         try:
@@ -476,12 +668,12 @@ class Builder:
             # Create target directory if it doesn't exist
             target_dir.mkdir(parents=True, exist_ok=True)
             
-            # Copy all PNG files
+            # Hard-link all PNG files (copied where links are unavailable); unchanged ones are skipped
             assets_copied = 0
             for asset_file in source_dir.glob("*.png"):
                 target_file = target_dir / asset_file.name
-                import shutil
-                shutil.copy2(asset_file, target_file)
+                if not link_file(asset_file, target_file):
+                    continue
                 assets_copied += 1
                 await self._log(f"Copied {asset_file.name} to Remotion public directory")
             
@@ -499,8 +691,7 @@ class Builder:
                     remotion_audio_dir = project_root / "remotion" / "public" / "audio"
                     remotion_audio_dir.mkdir(parents=True, exist_ok=True)
                     audio_dest = remotion_audio_dir / audio_src.name
-                    import shutil
-                    shutil.copy2(audio_src, audio_dest)
+                    link_file(audio_src, audio_dest)
                     await self._log(f"✓ Copied audio to {audio_dest}")
                     
                     # Ensure final_config has the correct path for Remotion (relative to public)
@@ -509,11 +700,11 @@ class Builder:
                 else:
                     await self._log(f"Warning: Audio file not found at {audio_src}")
             
-            # Also copy final_render.json to remotion/props.json for preview
+            # Also copy final_render.json to remotion/props.json for Studio preview
+            # (renders pass their own props file and never read this one)
             if self.final_config:
                 props_file = project_root / "remotion" / "props.json"
-                with open(props_file, "w") as f:
-                    json.dump(self.final_config, f, indent=2)
+                atomic_write_json(props_file, {"videoData": self.final_config}, fsync=False)
                 await self._log(f"✓ Updated remotion/props.json for preview")
             
         except Exception as e:
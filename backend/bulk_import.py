@@ -0,0 +1,149 @@
+import os
+import re
+import json
+import base64
+import shutil
+import zipfile
+from pathlib import Path
+from typing import IO, Callable, Iterator, List, Optional
+
+from schema_validator import validate_new_schema
+from storage import atomic_write_bytes, atomic_writer
+
+# Largest single JSONL line / zip entry accepted (scripts with inline base64 audio)
+MAX_ITEM_BYTES = int(os.getenv("BULK_MAX_ITEM_MB", "64")) * 1024 * 1024
+# Largest upload spooled to disk for one bulk request
+MAX_UPLOAD_BYTES = int(os.getenv("BULK_MAX_UPLOAD_MB", "4096")) * 1024 * 1024
+AUDIO_EXTENSIONS = {".mp3", ".wav", ".m4a", ".ogg", ".flac", ".aac", ".webm"}
+
+_DATA_URL_RE = re.compile(r"data:audio/([^;]+);base64,(.+)", re.S)
+
+
+class ImportItem:
+    """One script from a bulk upload, with an optional way to write its audio"""
+
+    def __init__(self, index: int, ref: Optional[str] = None, script: Optional[dict] = None,
+                 audio_name: Optional[str] = None, write_audio: Optional[Callable[[Path], None]] = None,
+                 error: Optional[str] = None):
+        self.index = index
+        self.ref = ref
+        self.script = script
+        self.audio_name = audio_name
+        self.write_audio = write_audio
+        self.error = error
+
+
+def script_errors(script) -> List[str]:
+    """Schema problems with one script, mirroring the single-upload checks"""
+    if not isinstance(script, dict):
+        return ["script must be a JSON object"]
+    if "scenes" in script and "subtitles" in script:
+        return validate_new_schema(script)["errors"]
+    if "visual_track" in script and "text_track" in script:
+        return ["Old JSON schema detected. Please use the new schema with 'scenes' and 'subtitles'"]
+    missing = [field for field in ("scenes", "subtitles") if field not in script]
+    return [f"Missing required fields: {', '.join(missing)}"]
+
+
+def _decode_data_url(value: str):
+    """(filename, bytes) from a ``data:audio/<fmt>;base64,...`` URL like POST /api/projects takes"""
+    match = _DATA_URL_RE.match(value)
+    if not match:
+        raise ValueError("audio must be a data:audio/<format>;base64 URL")
+    return f"audio.{match.group(1)}", base64.b64decode(match.group(2))
+
+
+def _jsonl_item(index: int, line: bytes) -> ImportItem:
+    try:
+        entry = json.loads(line)
+    except ValueError as e:
+        return ImportItem(index, error=f"invalid JSON: {str(e)}")
+    if not isinstance(entry, dict):
+        return ImportItem(index, error="each line must be a JSON object")
+    # Either {"script": {...}, "audio": "data:...", "ref": "..."} or a bare script
+    script = entry.get("script") if "script" in entry else entry
+    ref = entry.get("ref") if "script" in entry else None
+    item = ImportItem(index, ref=ref, script=script)
+    audio = entry.get("audio") if "script" in entry else None
+    if audio:
+        try:
+            item.audio_name, data = _decode_data_url(audio)
+        except ValueError as e:
+            item.error = str(e)
+            return item
+        item.write_audio = lambda path: atomic_write_bytes(path, data)
+    return item
+
+
+def iter_jsonl(stream: IO[bytes]) -> Iterator[ImportItem]:
+    """Items from a JSONL file, reading one line at a time
+
+    Blank lines are skipped; a line over MAX_ITEM_BYTES is reported and
+    skipped without being buffered.
+    """
+    index = 0
+    while True:
+        line = stream.readline(MAX_ITEM_BYTES + 1)
+        if not line:
+            return
+        if len(line) > MAX_ITEM_BYTES and not line.endswith(b"\n"):
+            while True:
+                rest = stream.readline(1024 * 1024)
+                if not rest or rest.endswith(b"\n"):
+                    break
+            yield ImportItem(index, error=f"item larger than {MAX_ITEM_BYTES // (1024 * 1024)}MB")
+            index += 1
+            continue
+        if not line.strip():
+            continue
+        yield _jsonl_item(index, line)
+        index += 1
+
+
+def iter_zip(path: Path) -> Iterator[ImportItem]:
+    """Items from a zip of ``<name>.json`` scripts and their audio files
+
+    A script's audio is the entry named by its ``audio_path`` or, failing
+    that, an audio file with the same stem. Entries are read one at a time.
+    """
+    with zipfile.ZipFile(path) as archive:
+        infos = [
+            info for info in archive.infolist()
+            if not info.is_dir() and not info.filename.startswith("__MACOSX/")
+        ]
+        by_name = {Path(info.filename).name: info for info in infos}
+        audio_by_stem = {
+            str(Path(info.filename).with_suffix("")): info for info in infos
+            if Path(info.filename).suffix.lower() in AUDIO_EXTENSIONS
+        }
+        scripts = sorted((info for info in infos if info.filename.lower().endswith(".json")), key=lambda i: i.filename)
+
+        for index, info in enumerate(scripts):
+            ref = info.filename
+            if info.file_size > MAX_ITEM_BYTES:
+                yield ImportItem(index, ref=ref, error=f"item larger than {MAX_ITEM_BYTES // (1024 * 1024)}MB")
+                continue
+            try:
+                script = json.loads(archive.read(info))
+            except ValueError as e:
+                yield ImportItem(index, ref=ref, error=f"invalid JSON: {str(e)}")
+                continue
+            item = ImportItem(index, ref=ref, script=script)
+
+            audio_info = None
+            if isinstance(script, dict) and script.get("audio_path"):
+                audio_info = by_name.get(Path(str(script["audio_path"])).name)
+            audio_info = audio_info or audio_by_stem.get(str(Path(info.filename).with_suffix("")))
+            if audio_info is not None:
+                item.audio_name = Path(audio_info.filename).name
+
+                def write_audio(target: Path, audio_info=audio_info):
+                    with archive.open(audio_info) as src, atomic_writer(target) as dst:
+                        shutil.copyfileobj(src, dst, 1024 * 1024)
+
+                item.write_audio = write_audio
+            yield item
+
+
+def is_zip(path: Path) -> bool:
+    return zipfile.is_zipfile(path)
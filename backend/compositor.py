@@ -0,0 +1,725 @@
+from __future__ import annotations
+
+import os
+import re
+import json
+import math
+import shutil
+import asyncio
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+from lazy_imports import lazy
+from motion import (
+    ASSET_SPRING,
+    DEFAULT_ENTRANCE,
+    DEFAULT_IDLE,
+    ENTRANCES,
+    IDLES,
+    TEXT_SPRING,
+    entrance_params,
+    idle_params,
+    sample_table,
+    spring_curve,
+    table_params,
+    transform_origin,
+    usable_motion,
+)
+from render_bundle import REMOTION_DIR
+from render_queue import RenderError, kill_process_tree
+
+LAYOUTS_TS = REMOTION_DIR / "src" / "config" / "Layouts.ts"
+ANIMATIONS_TS = REMOTION_DIR / "src" / "config" / "Animations.ts"
+PUBLIC_DIR = REMOTION_DIR / "public"
+
+DEFAULT_WIDTH = 1920
+DEFAULT_HEIGHT = 1080
+BACKGROUND = (240, 240, 240)  # MainComposition's #f0f0f0
+
+# TextLayer.tsx: 'Arial Black, sans-serif', uppercase, 4px white shadow, line-height 1.1
+TEXT_COLORS = {"highlight_red": "#d92323", "highlight_green": "#23d923", "highlight_yellow": "#d9d923"}
+DEFAULT_TEXT_COLOR = "#333333"
+TEXT_SHADOW = 4
+LINE_HEIGHT = 1.1
+FONT_CANDIDATES = (
+    "/usr/share/fonts/truetype/msttcorefonts/Arial_Black.ttf",
+    "/usr/share/fonts/truetype/msttcorefonts/ariblk.ttf",
+    "C:/Windows/Fonts/ariblk.ttf",
+    "/Library/Fonts/Arial Black.ttf",
+    "/System/Library/Fonts/Supplemental/Arial Black.ttf",
+    # Headless Chrome on Linux falls back to the sans-serif default
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+    "/usr/share/fonts/dejavu/DejaVuSans-Bold.ttf",
+    "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf",
+)
+
+# Layout style properties the compositor knows how to place
+SUPPORTED_STYLE_KEYS = {
+    "position", "top", "left", "right", "bottom", "width", "height", "transform",
+    "zIndex", "display", "alignItems", "justifyContent", "padding",
+}
+FRAMES_PER_BATCH = 8
+SPRITE_CACHE_SIZE = 256
+
+_LENGTH_RE = re.compile(r"^(-?\d+(?:\.\d+)?)(%|px)?$")
+_TRANSLATE_X_RE = re.compile(r"^translateX\((-?\d+(?:\.\d+)?)%\)$")
+_layout_cache: Dict[str, object] = {}
+
+
+class Unsupported(Exception):
+    """Something in the config this engine cannot reproduce; Remotion renders it instead"""
+
+
+def _ts_object(path: Path, name: str) -> dict:
+    """Parse an exported object literal of plain values out of a TypeScript config file"""
+    text = path.read_text()
+    start = text.index("{", text.index(f"export const {name}"))
+    depth = 0
+    for end in range(start, len(text)):
+        depth += {"{": 1, "}": -1}.get(text[end], 0)
+        if depth == 0:
+            break
+    body = re.sub(r"//[^\n]*", "", text[start:end + 1])
+    body = re.sub(r'([{,]\s*)([A-Za-z_]\w*)\s*:', r'\1"\2":', body)
+    body = re.sub(r",(\s*[}\]])", r"\1", body)
+    return json.loads(body)
+
+
+def load_layouts() -> Dict[str, dict]:
+    """LAYOUTS from Layouts.ts, re-read when the file changes, so both engines share one source"""
+    mtime = LAYOUTS_TS.stat().st_mtime_ns
+    if _layout_cache.get("mtime") != mtime:
+        _layout_cache["layouts"] = _ts_object(LAYOUTS_TS, "LAYOUTS")
+        _layout_cache["mtime"] = mtime
+    return _layout_cache["layouts"]
+
+
+def _ts_animation_names(name: str) -> List[str]:
+    text = ANIMATIONS_TS.read_text()
+    match = re.search(rf"export const {name}\s*=\s*\{{(.*?)\n\}};", text, re.S)
+    return re.findall(r"^\s+(\w+)\s*:", match.group(1), re.M) if match else []
+
+
+def find_font() -> Optional[str]:
+    """COMPOSITOR_FONT, else the first installed candidate for 'Arial Black, sans-serif'"""
+    configured = os.getenv("COMPOSITOR_FONT")
+    if configured:
+        return configured if Path(configured).is_file() else None
+    return next((path for path in FONT_CANDIDATES if Path(path).is_file()), None)
+
+
+def _length(value, reference: float, unit: float) -> Optional[float]:
+    """CSS length in output pixels: percentages of ``reference``, px scaled by ``unit``"""
+    if value is None or value == "auto":
+        return None
+    if isinstance(value, (int, float)):
+        return value * unit
+    match = _LENGTH_RE.match(str(value).strip())
+    if not match:
+        raise Unsupported(f"CSS length '{value}'")
+    number = float(match.group(1))
+    return number / 100 * reference if match.group(2) == "%" else number * unit
+
+
+def _translate_x(style: dict) -> float:
+    """translateX percentage of the box's own width (the only layout transform used)"""
+    transform = style.get("transform")
+    if not transform:
+        return 0.0
+    match = _TRANSLATE_X_RE.match(transform.strip())
+    if not match:
+        raise Unsupported(f"layout transform '{transform}'")
+    return float(match.group(1)) / 100
+
+
+def _check_style(style: dict, where: str):
+    unknown = set(style) - SUPPORTED_STYLE_KEYS
+    if unknown:
+        raise Unsupported(f"{where}: style properties {', '.join(sorted(unknown))}")
+
+
+def _visible(style: Optional[dict]) -> bool:
+    return bool(style) and style.get("display") != "none"
+
+
+def _subtitle_start(subtitle: dict) -> float:
+    lines = subtitle.get("lines") or []
+    words = lines[0].get("words") if lines else None
+    return (words[0].get("start") if words else 0) or 0
+
+
+def _subtitle_scenes(final_config: dict, fps: float) -> List[Optional[int]]:
+    """Scene index per subtitle, as TextLayer.tsx resolves it"""
+    timeline = final_config.get("timeline")
+    if timeline and timeline.get("fps") == fps and "subtitle_scene" in timeline:
+        return timeline["subtitle_scene"]
+    scenes = final_config.get("scenes", [])
+    result = []
+    for subtitle in final_config.get("subtitles", []):
+        lines = subtitle.get("lines") or []
+        words = lines[0].get("words") if lines else None
+        index = None
+        if words:
+            first = words[0].get("start", 0)
+            index = next((i for i, s in enumerate(scenes) if s["start"] <= first < s["start"] + s["duration"]), None)
+        result.append(index)
+    return result
+
+
+def _placed_elements(scene: dict, layout: dict) -> List[Tuple[dict, dict]]:
+    """(element, slot style) pairs in VisualLayer.tsx order: avatars, then up to three props"""
+    elements = scene.get("elements", [])
+    placed = []
+    if layout.get("avatar"):
+        placed += [(e, layout["avatar"]) for e in elements if e.get("role") == "avatar"]
+    props = [e for e in elements if e.get("role") == "prop"]
+    for slot, element in zip(("prop", "prop_secondary", "prop_tertiary"), props):
+        if layout.get(slot):
+            placed.append((element, layout[slot]))
+    return [(element, style) for element, style in placed if _visible(style)]
+
+
+def _asset_path(element: dict) -> Path:
+    clean = re.sub(r"^public/", "", (element.get("local_path") or "").lstrip("/"))
+    return PUBLIC_DIR / clean
+
+
+def _atlas_rect(final_config: dict, element: dict) -> Optional[Tuple[Path, dict]]:
+    """(page file, rect) when the element is packed into the project's atlas"""
+    atlas = final_config.get("atlas")
+    rect = atlas["rects"].get(element.get("local_path")) if atlas else None
+    if rect is None:
+        return None
+    return PUBLIC_DIR / atlas["pages"][rect["page"]]["src"], rect
+
+
+def unsupported_features(final_config: dict) -> List[str]:
+    """Reasons this config needs Remotion; an empty list means the compositor can render it"""
+    reasons = []
+    if not shutil.which("ffmpeg"):
+        reasons.append("ffmpeg is not installed")
+    try:
+        layouts = load_layouts()
+    except (OSError, ValueError) as e:
+        return reasons + [f"could not read Layouts.ts: {e}"]
+    ts_entrances = set(_ts_animation_names("ENTRANCES"))
+    ts_idles = set(_ts_animation_names("IDLES"))
+
+    fps = (final_config.get("project_settings") or {}).get("fps", 30)
+    for scene in final_config.get("scenes", []):
+        layout = layouts.get(scene.get("layout"))
+        if layout is None:
+            reasons.append(f"scene {scene.get('id')}: unknown layout {scene.get('layout')}")
+            continue
+        try:
+            for slot, style in layout.items():
+                if _visible(style):
+                    _check_style(style, f"layout {scene['layout']}.{slot}")
+                    _translate_x(style)
+        except Unsupported as e:
+            reasons.append(str(e))
+        for element, _ in _placed_elements(scene, layout):
+            enter = element.get("anim_enter") or DEFAULT_ENTRANCE
+            idle = element.get("anim_idle") or DEFAULT_IDLE
+            if enter in ts_entrances and enter not in ENTRANCES:
+                reasons.append(f"entrance animation '{enter}'")
+            if idle in ts_idles and idle not in IDLES:
+                reasons.append(f"idle animation '{idle}'")
+            packed = _atlas_rect(final_config, element)
+            if not (packed[0] if packed else _asset_path(element)).is_file():
+                reasons.append(f"asset {element.get('local_path')} is missing")
+
+    scene_of = _subtitle_scenes(final_config, fps)
+    scenes = final_config.get("scenes", [])
+    needs_text = any(
+        index is not None and index < len(scenes) and _visible(layouts.get(scenes[index].get("layout"), {}).get("textZone"))
+        for index in scene_of
+    )
+    if needs_text and not find_font():
+        reasons.append("no font for subtitles (set COMPOSITOR_FONT)")
+    return sorted(set(reasons))
+
+
+class Sprite:
+    """Premultiplied RGBA pixels, stored as float32 so blending needs no per-frame conversion"""
+
+    __slots__ = ("rgb", "alpha", "width", "height")
+
+    def __init__(self, premultiplied: np.ndarray):
+        np = lazy.get("numpy")
+        data = premultiplied.astype(np.float32)
+        self.rgb = data[..., :3]
+        self.alpha = data[..., 3:4] / 255
+        self.height, self.width = premultiplied.shape[:2]
+
+    @classmethod
+    def from_image(cls, image) -> "Sprite":
+        np = lazy.get("numpy")
+        return cls(np.asarray(image.convert("RGBa")))
+
+
+class Layer:
+    """One drawable (an asset or a text box) with its per-frame transform tables
+
+    Positions follow CSS: the sprite's top-left sits at ``pos`` and is
+    transformed by ``p' = origin + offset + scale * R(angle) (p - origin)``.
+    """
+
+    def __init__(self, key, image, pos: Tuple[float, float], frames: np.ndarray, origin: np.ndarray,
+                 offset: np.ndarray, scale: np.ndarray, angle: np.ndarray, opacity: np.ndarray):
+        np = lazy.get("numpy")
+        self.key = key
+        self.image = image
+        self.sprite = Sprite.from_image(image)
+        self.pos = np.asarray(pos, dtype=np.float64)
+        self.first = int(frames[0]) if len(frames) else 0
+        self.last = int(frames[-1]) if len(frames) else -1
+        self.origin = origin
+        self.offset = offset
+        self.scale = scale
+        self.angle = angle
+        self.opacity = opacity
+
+
+class Compositor:
+    """Rasterizes MainComposition frames from final_render.json with NumPy and Pillow
+
+    Mirrors VisualLayer.tsx (layout slots, spring entrances, idles) and
+    TextLayer.tsx (composed_stack lines, word_by_word and vertical_list) so
+    template videos render without a browser. ``unsupported_features`` must be
+    empty for the config; anything else renders with Remotion.
+    """
+
+    def __init__(self, final_config: dict, duration_frames: int, scale: float = 1.0):
+        settings = final_config.get("project_settings") or {}
+        self.config = final_config
+        self.fps = settings.get("fps", 30)
+        self.unit = scale
+        # libx264 with yuv420p needs even dimensions
+        self.width = max(2, int(round(settings.get("width", DEFAULT_WIDTH) * scale / 2)) * 2)
+        self.height = max(2, int(round(settings.get("height", DEFAULT_HEIGHT) * scale / 2)) * 2)
+        self.duration_frames = duration_frames
+        self.layouts = load_layouts()
+        # Precomputed curves from _build_final_config, when built for this fps
+        self.motion = usable_motion(final_config.get("motion"), self.fps)
+        self.layers: List[Layer] = []
+        self._sprites: "OrderedDict[tuple, Tuple[Sprite, float, float]]" = OrderedDict()
+        self._fonts: Dict[int, object] = {}
+        self._previous_key = None
+        self._previous_frame: Optional[bytes] = None
+        self.reused_frames = 0
+        self._build_visual_layers()
+        self._build_text_layers()
+
+    # -- setup -----------------------------------------------------------
+
+    def _frames(self, start: float, duration: float) -> np.ndarray:
+        """Integer frames f with start <= f < start + duration, clipped to the video"""
+        np = lazy.get("numpy")
+        first = max(0, math.ceil(start))
+        last = min(self.duration_frames, math.ceil(start + duration))
+        return np.arange(first, max(first, last))
+
+    def _build_visual_layers(self):
+        np = lazy.get("numpy")
+        Image = lazy.get("PIL.Image")
+        W, H, u = self.width, self.height, self.unit
+        images, pages = {}, {}
+        for scene in self.config.get("scenes", []):
+            layout = self.layouts.get(scene.get("layout"))
+            if not layout:
+                continue
+            start = scene["start"] * self.fps
+            frames = self._frames(start, scene["duration"] * self.fps)
+            if not len(frames):
+                continue
+            local = frames - start  # useCurrentFrame() inside the scene's Sequence
+            for element, style in _placed_elements(scene, layout):
+                path = _asset_path(element)
+                if path not in images:
+                    packed = _atlas_rect(self.config, element)
+                    if packed:
+                        # One decode per atlas page instead of one per asset
+                        page, rect = packed
+                        if page not in pages:
+                            with Image.open(page) as img:
+                                pages[page] = img.convert("RGBA")
+                        x, y = rect["x"], rect["y"]
+                        images[path] = pages[page].crop((x, y, x + rect["w"], y + rect["h"]))
+                    else:
+                        with Image.open(path) as img:
+                            images[path] = img.convert("RGBA")
+                source = images[path]
+                aspect = source.width / source.height
+
+                h = _length(style.get("height"), H, u)
+                w = _length(style.get("width"), W, u)
+                if w is None and h is None:
+                    w, h = source.width * u, source.height * u
+                elif w is None:
+                    w = h * aspect
+                elif h is None:
+                    h = w / aspect
+                left, right = _length(style.get("left"), W, u), _length(style.get("right"), W, u)
+                top, bottom = _length(style.get("top"), H, u), _length(style.get("bottom"), H, u)
+                x = left if left is not None else (W - right - w if right is not None else 0)
+                y = top if top is not None else (H - bottom - h if bottom is not None else 0)
+
+                # object-fit: contain, centered in the box
+                fit = min(w / source.width, h / source.height)
+                fw, fh = max(1, round(source.width * fit)), max(1, round(source.height * fit))
+                image = source.resize((fw, fh), Image.LANCZOS)
+                pos = (x + (w - fw) / 2, y + (h - fh) / 2)
+
+                enter = element.get("anim_enter") or DEFAULT_ENTRANCE
+                idle = element.get("anim_idle") or DEFAULT_IDLE
+                spring, entrance, idles = self._asset_motion(enter, idle, local)
+                origin_y = y if transform_origin(enter) == "top" else y + h
+                origin = np.array([x + w / 2, origin_y])
+                # transform: translateX(layout) <entrance> <idle>, composed left to right
+                offset = np.stack([
+                    _translate_x(style) * w + entrance["tx"] * w + entrance["scale"] * idles["tx"] * u,
+                    entrance["ty"] * h + entrance["scale"] * idles["ty"] * u,
+                ], axis=1)
+                self.layers.append(Layer(
+                    key=(str(path), fw, fh), image=image, pos=pos, frames=frames,
+                    origin=np.broadcast_to(origin, (len(frames), 2)), offset=offset,
+                    scale=entrance["scale"], angle=idles["rotate"], opacity=np.clip(spring, 0, 1),
+                ))
+
+    def _asset_motion(self, enter: str, idle: str, local: np.ndarray):
+        """Spring, entrance and idle arrays for scene frames, from the tables when present"""
+        if self.motion is None:
+            spring = spring_curve(local, self.fps, **ASSET_SPRING)
+            return spring, entrance_params(enter, spring), idle_params(idle, local)
+        entrances, idles = self.motion["entrances"], self.motion["idles"]
+        spring = sample_table(self.motion["springs"]["asset"], local)
+        entrance = table_params(entrances.get(enter, entrances.get(DEFAULT_ENTRANCE, {})), local, 100)
+        return spring, entrance, table_params(idles.get(idle, idles.get(DEFAULT_IDLE, {})), local, 1)
+
+    def _text_spring(self, frames: np.ndarray) -> np.ndarray:
+        if self.motion is not None and "text" in self.motion["springs"]:
+            return sample_table(self.motion["springs"]["text"], frames)
+        return spring_curve(frames, self.fps, **TEXT_SPRING)
+
+    def _font(self, size: int):
+        if size not in self._fonts:
+            self._fonts[size] = lazy.get("PIL.ImageFont").truetype(find_font(), size=size)
+        return self._fonts[size]
+
+    def _text_image(self, text: str, size: float, color: str):
+        """A word rendered like TextLayer's spans: uppercase with a white drop shadow"""
+        Image = lazy.get("PIL.Image")
+        ImageDraw = lazy.get("PIL.ImageDraw")
+        font = self._font(max(1, round(size * self.unit)))
+        shadow = TEXT_SHADOW * self.unit
+        box_height = LINE_HEIGHT * size * self.unit
+        ascent, descent = font.getmetrics()
+        baseline = (box_height - (ascent + descent)) / 2 + ascent
+        width = font.getlength(text)
+        image = Image.new("RGBA", (math.ceil(width + shadow) + 2, math.ceil(box_height + shadow) + 2), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(image)
+        draw.text((shadow, baseline + shadow), text, font=font, fill="white", anchor="ls")
+        draw.text((0, baseline), text, font=font, fill=color, anchor="ls")
+        return image, width, box_height
+
+    def _text_layer(self, text, size, color, pos, box, frames, spring_start):
+        """Text box scaled by a spring about its own center, like ``transform: scale(spr)``"""
+        np = lazy.get("numpy")
+        image, _, _ = self._text_image(text.upper(), size, color)
+        bx, by, bw, bh = box
+        spring = self._text_spring(frames - spring_start)
+        count = len(frames)
+        self.layers.append(Layer(
+            key=("text", text.upper(), size, color), image=image, pos=pos, frames=frames,
+            origin=np.broadcast_to(np.array([bx + bw / 2, by + bh / 2]), (count, 2)),
+            offset=np.zeros((count, 2)), scale=spring, angle=np.zeros(count), opacity=np.ones(count),
+        ))
+
+    def _build_text_layers(self):
+        subtitles = self.config.get("subtitles") or []
+        if not subtitles:
+            return
+        W, H, u = self.width, self.height, self.unit
+        scenes = self.config.get("scenes", [])
+        for subtitle, scene_index in zip(subtitles, _subtitle_scenes(self.config, self.fps)):
+            if scene_index is None or scene_index >= len(scenes):
+                continue
+            layout_name = scenes[scene_index].get("layout")
+            zone = (self.layouts.get(layout_name) or {}).get("textZone")
+            if not _visible(zone):
+                continue
+
+            first_word = _subtitle_start(subtitle)
+            start = first_word * self.fps
+            duration = (subtitle.get("container_end", 0) - first_word) * self.fps
+            frames = self._frames(start, duration)
+            if not len(frames):
+                continue
+            text_only = layout_name == "text_full_center"
+            base_size = 150 if text_only else 80
+
+            # Zone box (content box, with its padding box for absolutely placed children)
+            pad_y, pad_x = 0.0, 0.0
+            if zone.get("padding"):
+                parts = str(zone["padding"]).split()
+                pad_y = _length(parts[0], W, u) or 0.0
+                pad_x = _length(parts[1] if len(parts) > 1 else parts[0], W, u) or 0.0
+            zone_w = _length(zone.get("width"), W, u)
+            zone_h = _length(zone.get("height"), H, u)
+            left, right = _length(zone.get("left"), W, u), _length(zone.get("right"), W, u)
+            top = _length(zone.get("top"), H, u)
+            if zone_w is None:
+                zone_w = W - (left or 0) - (right or 0) - 2 * pad_x
+            zone_x = left if left is not None else W - right - zone_w - 2 * pad_x
+            zone_y = top or 0.0
+
+            self._layout_lines(subtitle, frames, start, base_size, text_only,
+                               (zone_x + pad_x, zone_y + pad_y, zone_w, zone_h), zone)
+
+            # word_by_word / vertical_list children are absolutely filled into the zone's padding box
+            padding_box_w = zone_w + 2 * pad_x
+            style = subtitle.get("style") or ""
+            size = base_size + 20 if "highlight" in style else base_size
+            color = TEXT_COLORS.get(style, DEFAULT_TEXT_COLOR)
+            line_h = LINE_HEIGHT * size * u
+            if subtitle.get("mode") == "word_by_word":
+                for word in subtitle.get("words") or []:
+                    word_start = word.get("start", 0) * self.fps
+                    word_frames = self._frames(start + word_start, (word.get("end", 0) - word.get("start", 0)) * self.fps)
+                    word_frames = word_frames[word_frames < frames[-1] + 1]
+                    if len(word_frames):
+                        box = (zone_x + 10 * u, zone_y + 10 * u, padding_box_w - 20 * u, line_h)
+                        self._text_layer(word.get("text", ""), size, color, box[:2], box, word_frames, word_start)
+            if subtitle.get("mode") == "vertical_list":
+                for item in subtitle.get("items") or []:
+                    item_start = item.get("start", 0) * self.fps
+                    item_frames = self._frames(
+                        start + item_start, (subtitle.get("container_end", 0) - item.get("start", 0)) * self.fps
+                    )
+                    item_frames = item_frames[item_frames < frames[-1] + 1]
+                    if len(item_frames):
+                        box = (zone_x, zone_y + 10 * u, padding_box_w, line_h)
+                        self._text_layer(item.get("text", ""), size, color, box[:2], box, item_frames, item_start)
+
+    def _layout_lines(self, subtitle, frames, start, base_size, text_only, content_box, zone):
+        """Lay out composed_stack lines as flex items of the text zone"""
+        lines = subtitle.get("lines") or []
+        if not lines:
+            return
+        u = self.unit
+        cx, cy, cw, ch = content_box
+        margin_bottom = (20 if text_only else 10) * u
+        items = []
+        for line in lines:
+            style = line.get("style") or ""
+            size = base_size + 20 if "highlight" in style else base_size
+            color = TEXT_COLORS.get(style, DEFAULT_TEXT_COLOR)
+            words = []
+            for word in line.get("words") or []:
+                text = str(word.get("text", "")).upper()
+                words.append((text, self._font(max(1, round(size * u))).getlength(text)))
+            items.append({"size": size, "color": color, "words": words,
+                          "width": sum(w + 10 * u for _, w in words), "line_h": LINE_HEIGHT * size * u})
+
+        # Flex items shrink to share the zone when their words do not fit on one row
+        total = sum(item["width"] for item in items)
+        for item in items:
+            available = cw * item["width"] / total if total > cw else math.inf
+            rows, row, row_w = [], [], 0.0
+            for text, w in item["words"]:
+                if row and row_w + w + 10 * u > available:
+                    rows.append(row)
+                    row, row_w = [], 0.0
+                row.append((text, w))
+                row_w += w + 10 * u
+            rows.append(row)
+            item["rows"] = rows
+            item["width"] = min(item["width"], available)
+            item["height"] = len(rows) * item["line_h"] + margin_bottom
+
+        total = sum(item["width"] for item in items)
+        justify = zone.get("justifyContent")
+        gap = 0.0
+        x = cx
+        if justify == "center":
+            x = cx + (cw - total) / 2
+        elif justify == "space-between" and len(items) > 1:
+            gap = (cw - total) / (len(items) - 1)
+        for item in items:
+            y = cy
+            if zone.get("alignItems") == "center" and ch is not None:
+                y = cy + (ch - item["height"]) / 2
+            for row_index, row in enumerate(item["rows"]):
+                wx = x
+                wy = y + row_index * item["line_h"]
+                for text, w in row:
+                    box = (wx + 5 * u, wy, w, item["line_h"])
+                    self._text_layer(text, item["size"], item["color"], box[:2], box, frames, start)
+                    wx += w + 10 * u
+            x += item["width"] + gap
+
+    # -- rendering -------------------------------------------------------
+
+    def _transformed(self, layer: Layer, scale: float, angle: float) -> Tuple[Sprite, float, float]:
+        """Sprite scaled/rotated about its own top-left, with the offset of its new bounding box"""
+        np = lazy.get("numpy")
+        key = (layer.key, round(scale, 3), round(angle, 2))
+        cached = self._sprites.get(key)
+        if cached is not None:
+            self._sprites.move_to_end(key)
+            return cached
+        Image = lazy.get("PIL.Image")
+        scale, theta = key[1], math.radians(key[2])
+        cos, sin = math.cos(theta), math.sin(theta)
+        w, h = layer.image.size
+        corners = np.array([[0, 0], [w, 0], [0, h], [w, h]], dtype=np.float64)
+        mapped = scale * np.stack([corners[:, 0] * cos - corners[:, 1] * sin, corners[:, 0] * sin + corners[:, 1] * cos], axis=1)
+        min_x, min_y = mapped.min(axis=0)
+        out_w = max(1, math.ceil(mapped[:, 0].max() - min_x))
+        out_h = max(1, math.ceil(mapped[:, 1].max() - min_y))
+        # Inverse map from output pixels back into the source image
+        data = (
+            cos / scale, sin / scale, (cos * min_x + sin * min_y) / scale,
+            -sin / scale, cos / scale, (-sin * min_x + cos * min_y) / scale,
+        )
+        premultiplied = layer.image.convert("RGBa").transform((out_w, out_h), Image.AFFINE, data, resample=Image.BILINEAR)
+        result = (Sprite.from_image(premultiplied), min_x, min_y)
+        self._sprites[key] = result
+        if len(self._sprites) > SPRITE_CACHE_SIZE:
+            self._sprites.popitem(last=False)
+        return result
+
+    def _draw_ops(self, frame: int) -> List[tuple]:
+        np = lazy.get("numpy")
+        ops = []
+        for layer in self.layers:
+            if not layer.first <= frame <= layer.last:
+                continue
+            i = frame - layer.first
+            scale, opacity = float(layer.scale[i]), float(layer.opacity[i])
+            if scale <= 0.005 or opacity <= 0.002:
+                continue
+            angle = float(layer.angle[i])
+            origin = layer.origin[i]
+            # p' = origin + offset + s R (p - origin), for the sprite's top-left p = pos
+            rel = layer.pos - origin
+            theta = math.radians(angle)
+            rotated = np.array([rel[0] * math.cos(theta) - rel[1] * math.sin(theta),
+                                rel[0] * math.sin(theta) + rel[1] * math.cos(theta)])
+            top_left = origin + layer.offset[i] + scale * rotated
+            if abs(scale - 1) < 1e-3 and abs(angle) < 5e-3:
+                ops.append((layer, 1.0, 0.0, round(top_left[0]), round(top_left[1]), round(opacity, 3)))
+            else:
+                ops.append((layer, round(scale, 3), round(angle, 2), top_left[0], top_left[1], round(opacity, 3)))
+        return ops
+
+    def _blend(self, canvas: np.ndarray, sprite: Sprite, x: int, y: int, opacity: float):
+        np = lazy.get("numpy")
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + sprite.width, canvas.shape[1]), min(y + sprite.height, canvas.shape[0])
+        if x0 >= x1 or y0 >= y1:
+            return
+        sx, sy = x0 - x, y0 - y
+        rgb = sprite.rgb[sy:sy + y1 - y0, sx:sx + x1 - x0]
+        alpha = sprite.alpha[sy:sy + y1 - y0, sx:sx + x1 - x0]
+        region = canvas[y0:y1, x0:x1]
+        if opacity < 1:
+            blended = rgb * opacity + region * (1 - alpha * opacity)
+        else:
+            blended = rgb + region * (1 - alpha)
+        np.add(blended, 0.5, out=blended)
+        region[...] = blended.astype(np.uint8)
+
+    def render_frame(self, frame: int) -> bytes:
+        """Raw RGB24 bytes for one frame; identical consecutive frames are reused"""
+        np = lazy.get("numpy")
+        ops = self._draw_ops(frame)
+        resolved = []
+        for layer, scale, angle, x, y, opacity in ops:
+            if scale == 1.0 and angle == 0.0:
+                resolved.append((layer.sprite, int(x), int(y), opacity, layer.key))
+            else:
+                sprite, min_x, min_y = self._transformed(layer, scale, angle)
+                resolved.append((sprite, int(round(x + min_x)), int(round(y + min_y)), opacity, (layer.key, scale, angle)))
+        key = tuple((k, x, y, o) for _, x, y, o, k in resolved)
+        if key == self._previous_key and self._previous_frame is not None:
+            self.reused_frames += 1
+            return self._previous_frame
+
+        canvas = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        canvas[...] = BACKGROUND
+        for sprite, x, y, opacity, _ in resolved:
+            self._blend(canvas, sprite, x, y, opacity)
+        self._previous_key = key
+        self._previous_frame = canvas.tobytes()
+        return self._previous_frame
+
+    def render_frames(self, start: int, stop: int) -> List[bytes]:
+        return [self.render_frame(frame) for frame in range(start, stop)]
+
+
+def encoder_args(draft_settings: Optional[dict] = None) -> List[str]:
+    """x264 settings: near-lossless finals like Remotion's defaults, fast low-quality drafts"""
+    if draft_settings:
+        return ["-preset", draft_settings["preset"], "-crf", str(draft_settings["crf"])]
+    return ["-preset", "veryfast", "-crf", "18"]
+
+
+async def render_video(
+    compositor: Compositor,
+    output_file: Path,
+    audio_file: Optional[Path],
+    spawn: Callable[..., Awaitable[asyncio.subprocess.Process]],
+    on_progress: Callable[[int, int], Awaitable[None]],
+    draft_settings: Optional[dict] = None,
+):
+    """Stream raw frames into ffmpeg and mux the audio; raises RenderError on failure
+
+    Frames are rasterized in batches on a worker thread so the event loop
+    stays free while ffmpeg encodes in parallel.
+    """
+    total = compositor.duration_frames
+    cmd = [
+        "ffmpeg", "-y", "-v", "error",
+        "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{compositor.width}x{compositor.height}",
+        "-r", str(compositor.fps), "-i", "-",
+    ]
+    if audio_file and audio_file.is_file():
+        cmd += ["-i", str(audio_file), "-map", "0:v", "-map", "1:a", "-c:a", "aac", "-b:a", "192k"]
+    cmd += [
+        "-c:v", "libx264", *encoder_args(draft_settings), "-pix_fmt", "yuv420p", "-movflags", "+faststart",
+        "-t", f"{total / compositor.fps:.3f}", str(output_file),
+    ]
+    process = await spawn(
+        *cmd, cwd=str(output_file.parent),
+        stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE,
+    )
+    stderr_task = asyncio.create_task(process.stderr.read())
+    try:
+        try:
+            for batch_start in range(0, total, FRAMES_PER_BATCH):
+                batch_stop = min(total, batch_start + FRAMES_PER_BATCH)
+                frames = await asyncio.to_thread(compositor.render_frames, batch_start, batch_stop)
+                for data in frames:
+                    process.stdin.write(data)
+                await process.stdin.drain()
+                await on_progress(batch_stop, total)
+            process.stdin.close()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # ffmpeg exited early; its stderr says why
+        await process.wait()
+        stderr = (await stderr_task).decode(errors="replace").strip()
+    finally:
+        # Rasterizing failed or the job was cancelled: stop ffmpeg and the stderr reader with it
+        if process.returncode is None:
+            kill_process_tree(process)
+        if not stderr_task.done():
+            stderr_task.cancel()
+            await asyncio.gather(stderr_task, return_exceptions=True)
+    if process.returncode != 0 or not output_file.exists():
+        raise RenderError(stderr[-2000:] or f"ffmpeg exited with code {process.returncode}")
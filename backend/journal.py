@@ -0,0 +1,187 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+
+# Asset lifecycle states, in the order an asset moves through them
+PENDING = "pending"
+GENERATED = "generated"
+MATTED = "matted"
+SAVED = "saved"
+
+STATES = (PENDING, GENERATED, MATTED, SAVED)
+
+
+def sha256_bytes(data: bytes) -> str:
+    """Return the hex SHA-256 digest of a byte string"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def sha256_file(path: Path) -> Optional[str]:
+    """Return the hex SHA-256 digest of a file, or None if it cannot be read"""
+    try:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+    except OSError:
+        return None
+
+
+class AssetJournal:
+    """Append-only per-project journal of asset generation checkpoints
+
+    Every state transition is appended as one JSON line to
+    ``<project_dir>/journal.jsonl`` and fsync'd, so the latest entry per asset
+    survives crashes and server restarts. Intermediate bytes (raw provider
+    output and matted output) are kept under ``<project_dir>/checkpoints`` so a
+    resumed run never pays for the same provider call or matting pass twice.
+
+    Writes fsync, so async callers run them through ``asyncio.to_thread``;
+    appends are serialized, so concurrent assets may do so at once.
+    """
+
+    def __init__(self, project_dir: Path):
+        self.project_dir = Path(project_dir)
+        self.path = self.project_dir / "journal.jsonl"
+        self.checkpoint_dir = self.project_dir / "checkpoints"
+        self.entries: Dict[str, dict] = {}
+        # Last journaled hash per (asset, state), used to verify checkpoints
+        self.digests: Dict[str, Dict[str, str]] = {}
+        self._lock = threading.Lock()
+        self._replay()
+
+    def _replay(self):
+        """Rebuild the latest state per asset from the journal file"""
+        if not self.path.exists():
+            return
+        with open(self.path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-append; ignore it
+                    continue
+                if entry.get("state") in STATES and entry.get("asset_id"):
+                    self._index(entry)
+
+    def _index(self, entry: dict):
+        self.entries[entry["asset_id"]] = entry
+        if entry.get("sha256"):
+            self.digests.setdefault(entry["asset_id"], {})[entry["state"]] = entry["sha256"]
+
+    def _append(self, asset_id: str, state: str, sha256: Optional[str] = None, **extra) -> dict:
+        entry = {"ts": time.time(), "asset_id": asset_id, "state": state, "sha256": sha256}
+        entry.update(extra)
+        self.project_dir.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._index(entry)
+        return entry
+
+    def _checkpoint_path(self, asset_id: str, state: str) -> Path:
+        return self.checkpoint_dir / f"{asset_id}.{state}.png"
+
+    def _write_checkpoint(self, asset_id: str, state: str, data: bytes) -> str:
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        path = self._checkpoint_path(asset_id, state)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return sha256_bytes(data)
+
+    def _read_checkpoint(self, asset_id: str, state: str) -> Optional[bytes]:
+        path = self._checkpoint_path(asset_id, state)
+        expected_sha = self.digests.get(asset_id, {}).get(state)
+        if not path.exists() or not expected_sha:
+            return None
+        data = path.read_bytes()
+        if sha256_bytes(data) != expected_sha:
+            return None
+        return data
+
+    def state(self, asset_id: str) -> Optional[str]:
+        """Latest recorded state for an asset, or None if never seen"""
+        entry = self.entries.get(asset_id)
+        return entry["state"] if entry else None
+
+    def mark_pending(self, asset_id: str, prompt: str = "", role: str = ""):
+        """Record that an asset is planned, unless it already progressed further"""
+        if asset_id not in self.entries:
+            self._append(asset_id, PENDING, prompt=prompt, role=role)
+
+    def invalidate(self, asset_id: str, prompt: str = "", role: str = ""):
+        """Send an asset back to pending after its prompt or role changed
+
+        Its checkpoints belong to the old prompt, so they are dropped too.
+        """
+        self._append(asset_id, PENDING, prompt=prompt, role=role, invalidated=True)
+        self.digests.pop(asset_id, None)
+        for state in (GENERATED, MATTED):
+            self._checkpoint_path(asset_id, state).unlink(missing_ok=True)
+
+    def record_generated(self, asset_id: str, image_bytes: bytes) -> str:
+        """Checkpoint raw provider output before any post-processing"""
+        digest = self._write_checkpoint(asset_id, GENERATED, image_bytes)
+        self._append(asset_id, GENERATED, digest)
+        return digest
+
+    def record_matted(self, asset_id: str, image_bytes: bytes) -> str:
+        """Checkpoint background-removed output before it is published"""
+        digest = self._write_checkpoint(asset_id, MATTED, image_bytes)
+        self._append(asset_id, MATTED, digest)
+        return digest
+
+    def record_saved(self, asset_id: str, asset_path: Path, sha256: Optional[str] = None, **extra):
+        """Record that the final asset file is in place and drop its checkpoints"""
+        digest = sha256 or sha256_file(asset_path)
+        self._append(asset_id, SAVED, digest, path=str(asset_path.name), **extra)
+        for state in (GENERATED, MATTED):
+            self._checkpoint_path(asset_id, state).unlink(missing_ok=True)
+
+    def is_saved(self, asset_id: str, asset_path: Path) -> bool:
+        """True if the asset was saved and the file on disk still matches its hash"""
+        entry = self.entries.get(asset_id)
+        if not entry or entry["state"] != SAVED or not asset_path.exists():
+            return False
+        return entry.get("sha256") is None or sha256_file(asset_path) == entry["sha256"]
+
+    def resume_bytes(self, asset_id: str):
+        """Return (state, bytes) for the furthest intermediate checkpoint, if valid
+
+        Falls back from matted to generated bytes when a checkpoint is missing
+        or does not match the journaled hash.
+        """
+        entry = self.entries.get(asset_id)
+        if not entry:
+            return None, None
+        if entry["state"] == MATTED:
+            data = self._read_checkpoint(asset_id, MATTED)
+            if data is not None:
+                return MATTED, data
+        if entry["state"] in (GENERATED, MATTED):
+            data = self._read_checkpoint(asset_id, GENERATED)
+            if data is not None:
+                return GENERATED, data
+        return None, None
+
+    def summary(self) -> Dict[str, int]:
+        """Count of assets per latest state"""
+        counts = {state: 0 for state in STATES}
+        for entry in self.entries.values():
+            counts[entry["state"]] += 1
+        return counts
@@ -0,0 +1,107 @@
+import os
+import time
+import importlib
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+
+
+class LazyRegistry:
+    """Named, thread-safe lazy loaders for heavy SDKs and ML libraries
+
+    Provider SDKs (google.genai, httpx), numpy, PIL and the matting/audio
+    stacks (rembg + onnxruntime, librosa) are only imported the first time something
+    asks for them, so importing the API modules stays cheap. ``prewarm`` loads
+    a set of entries on a background thread once the server is up.
+    """
+
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._values: Dict[str, Any] = {}
+        self._errors: Dict[str, str] = {}
+        self._timings: Dict[str, float] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._registry_lock = threading.Lock()
+
+    def register(self, name: str, loader: Callable[[], Any]):
+        """Register a zero-argument loader under ``name``"""
+        with self._registry_lock:
+            self._loaders[name] = loader
+            self._locks.setdefault(name, threading.Lock())
+
+    def register_module(self, name: str, module: Optional[str] = None):
+        """Register a plain module import, e.g. ``register_module("httpx")``"""
+        self.register(name, lambda: importlib.import_module(module or name))
+
+    def get(self, name: str) -> Any:
+        """Load (once) and return the entry; import errors propagate to the caller"""
+        if name in self._values:
+            return self._values[name]
+        if name not in self._loaders:
+            raise KeyError(f"Unknown lazy import: {name}")
+        with self._locks[name]:
+            if name not in self._values:
+                start = time.perf_counter()
+                try:
+                    self._values[name] = self._loaders[name]()
+                except Exception as e:
+                    self._errors[name] = str(e)
+                    raise
+                self._errors.pop(name, None)
+                self._timings[name] = time.perf_counter() - start
+        return self._values[name]
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._values
+
+    def prewarm(self, names: Iterable[str]) -> threading.Thread:
+        """Load entries in a daemon thread; failures are recorded, not raised"""
+        names = [n for n in names if n in self._loaders]
+
+        def _run():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception as e:
+                    print(f"Prewarm of {name} failed: {str(e)}")
+
+        thread = threading.Thread(target=_run, name="lazy-prewarm", daemon=True)
+        thread.start()
+        return thread
+
+    def status(self) -> Dict[str, dict]:
+        """Load state, load time and last error per registered entry"""
+        return {
+            name: {
+                "loaded": name in self._values,
+                "load_seconds": round(self._timings[name], 3) if name in self._timings else None,
+                "error": self._errors.get(name),
+            }
+            for name in self._loaders
+        }
+
+    def names(self):
+        return list(self._loaders)
+
+
+lazy = LazyRegistry()
+
+lazy.register_module("httpx")
+lazy.register_module("numpy")
+lazy.register_module("PIL.Image")
+lazy.register_module("PIL.ImageDraw")
+lazy.register_module("PIL.ImageFont")
+lazy.register_module("google.genai")
+lazy.register_module("rembg")
+lazy.register_module("librosa")
+# Optional: only needed when SHARED_STATE_URL points at a Redis server
+lazy.register_module("redis")
+lazy.register_module("redis.asyncio")
+# Building a rembg session loads the ONNX model; share one across all images
+lazy.register("rembg_session", lambda: lazy.get("rembg").new_session())
+# Small model for the "lite" matting tier: u2netp by default, or a custom
+# (e.g. int8-quantized) u2net-layout ONNX graph
+lazy.register("rembg_session_lite", lambda: (
+    lazy.get("rembg").new_session("u2net_custom", model_path=os.environ["MATTING_LITE_MODEL_PATH"])
+    if os.getenv("MATTING_LITE_MODEL_PATH")
+    else lazy.get("rembg").new_session(os.getenv("MATTING_LITE_MODEL", "u2netp"))
+))
@@ -0,0 +1,244 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+import traceback
+import weakref
+import contextvars
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, List, Optional
+
+BACKEND_DIR = str(Path(__file__).parent.resolve())
+_THIS_FILE = str(Path(__file__).resolve())
+
+# ASGI scope of the request being handled in the current context
+REQUEST_SCOPE: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("request_scope", default=None)
+# Request scope per task, readable from the watchdog thread. Tasks created while
+# handling a request (generation, renders) inherit it through the task factory
+_task_scopes: "weakref.WeakKeyDictionary[asyncio.Task, dict]" = weakref.WeakKeyDictionary()
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _attribution(scope: Optional[dict]) -> Dict[str, Optional[str]]:
+    """Endpoint template and project id for a request scope"""
+    if not scope:
+        return {"endpoint": "background", "project_id": None}
+    route = scope.get("route")
+    path = getattr(route, "path", None) or scope.get("path", "")
+    method = scope.get("method") or scope.get("type", "").upper()
+    project_id = (scope.get("path_params") or {}).get("project_id")
+    if project_id is None and scope.get("query_string"):
+        for pair in scope["query_string"].decode(errors="replace").split("&"):
+            key, _, value = pair.partition("=")
+            if key == "project_id" and value:
+                project_id = value
+                break
+    return {"endpoint": f"{method} {path}", "project_id": project_id}
+
+
+class LoopMonitorMiddleware:
+    """Pure ASGI middleware that tags each request's task with its scope"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+        # Routing fills in scope["route"] and path_params later; the same dict is read at stall time
+        token = REQUEST_SCOPE.set(scope)
+        task = asyncio.current_task()
+        if task is not None:
+            _task_scopes[task] = scope
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            REQUEST_SCOPE.reset(token)
+            if task is not None:
+                _task_scopes.pop(task, None)
+
+
+class LoopMonitor:
+    """Samples event-loop lag and captures the stack of anything that blocks the loop
+
+    A coroutine wakes every ``interval`` seconds and records how late it
+    woke. A watchdog thread notices when those wake-ups stop for longer than
+    ``threshold`` and snapshots the loop thread's stack while it is still
+    blocked, together with the endpoint and project of the task running.
+    """
+
+    def __init__(self, threshold: float = 0.1, interval: float = 0.05, max_stalls: int = 200):
+        self.threshold = threshold
+        self.interval = interval
+        self.lags: Deque[float] = deque(maxlen=2000)
+        self.stalls: Deque[dict] = deque(maxlen=max_stalls)
+        self.by_endpoint: Dict[str, Dict] = {}
+        self.by_project: Dict[str, Dict] = {}
+        self.by_site: Dict[str, Dict] = {}
+        self.samples = 0
+        self.max_lag = 0.0
+        self.started_at: Optional[float] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._tick = time.perf_counter()
+        self._open_stall: Optional[dict] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional["LoopMonitor"]:
+        """Monitor configured by LOOP_MONITOR/LOOP_STALL_MS/LOOP_SAMPLE_MS, or None when disabled"""
+        if os.getenv("LOOP_MONITOR", "0") in ("", "0", "false"):
+            return None
+        return cls(
+            threshold=float(os.getenv("LOOP_STALL_MS", "100")) / 1000,
+            interval=float(os.getenv("LOOP_SAMPLE_MS", "50")) / 1000,
+        )
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self.started_at = time.time()
+        self._tick = time.perf_counter()
+        self._install_task_factory()
+        self._task = self._loop.create_task(self._sample())
+        threading.Thread(target=self._watch, name="loop-monitor", daemon=True).start()
+
+    def _install_task_factory(self):
+        previous = self._loop.get_task_factory()
+
+        def factory(loop, coro, **kwargs):
+            task = previous(loop, coro, **kwargs) if previous else asyncio.Task(coro, loop=loop, **kwargs)
+            scope = REQUEST_SCOPE.get()
+            if scope is not None:
+                _task_scopes[task] = scope
+            return task
+
+        self._loop.set_task_factory(factory)
+
+    def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+
+    async def _sample(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            lag = max(0.0, now - started - self.interval)
+            self.lags.append(lag)
+            self.samples += 1
+            self.max_lag = max(self.max_lag, lag)
+            with self._lock:
+                self._tick = now
+                if self._open_stall is not None:
+                    self._close_stall(self._open_stall, lag)
+                    self._open_stall = None
+
+    def _watch(self):
+        while not self._stop.wait(self.threshold / 4):
+            with self._lock:
+                blocked = time.perf_counter() - self._tick - self.interval
+                if blocked > self.threshold and self._open_stall is None:
+                    try:
+                        self._open_stall = self._capture(blocked)
+                    except Exception as e:
+                        print(f"Loop monitor failed to capture a stall: {str(e)}")
+
+    def _capture(self, blocked: float) -> dict:
+        """Snapshot the loop thread mid-stall (runs on the watchdog thread)"""
+        frame = sys._current_frames().get(self._loop_thread)
+        stack = traceback.extract_stack(frame)[-25:] if frame is not None else []
+        task = asyncio.current_task(self._loop) if self._loop else None
+        scope = _task_scopes.get(task) if task is not None else None
+        # The innermost frame in our own code is the call to fix
+        site = next(
+            (
+                f"{Path(f.filename).name}:{f.lineno} in {f.name}" for f in reversed(stack)
+                if f.filename.startswith(BACKEND_DIR) and f.filename != _THIS_FILE
+            ),
+            "unknown",
+        )
+        return {
+            "at": time.time(),
+            "detected_after_ms": round(blocked * 1000, 1),
+            "task": task.get_name() if task is not None else None,
+            "site": site,
+            "stack": [f"{f.filename}:{f.lineno} in {f.name}" + (f": {f.line}" if f.line else "") for f in stack],
+            **_attribution(scope),
+        }
+
+    def _close_stall(self, stall: dict, lag: float):
+        stall["blocked_ms"] = round(max(lag, stall["detected_after_ms"] / 1000) * 1000, 1)
+        self.stalls.append(stall)
+        for table, key in ((self.by_endpoint, stall["endpoint"]), (self.by_project, stall["project_id"]), (self.by_site, stall["site"])):
+            if key is None:
+                continue
+            entry = table.setdefault(key, {"stalls": 0, "blocked_ms_total": 0.0, "max_ms": 0.0})
+            entry["stalls"] += 1
+            entry["blocked_ms_total"] = round(entry["blocked_ms_total"] + stall["blocked_ms"], 1)
+            entry["max_ms"] = max(entry["max_ms"], stall["blocked_ms"])
+
+    @staticmethod
+    def _ranked(table: Dict[str, Dict]) -> List[Dict]:
+        rows = [{"key": key, **value} for key, value in table.items()]
+        return sorted(rows, key=lambda row: row["blocked_ms_total"], reverse=True)
+
+    def lag_stats(self) -> Dict[str, Optional[float]]:
+        lags = list(self.lags)
+
+        def ms(value):
+            return round(value * 1000, 2) if value is not None else None
+
+        return {
+            "samples": self.samples,
+            "p50_ms": ms(_percentile(lags, 0.5)),
+            "p99_ms": ms(_percentile(lags, 0.99)),
+            "max_ms": ms(self.max_lag),
+        }
+
+    def report(self, limit: int = 50) -> Dict:
+        """Lag percentiles, worst offenders by endpoint/project/call site and recent stalls"""
+        with self._lock:
+            recent = list(self.stalls)[-limit:]
+        return {
+            "enabled": True,
+            "threshold_ms": self.threshold * 1000,
+            "interval_ms": self.interval * 1000,
+            "started_at": self.started_at,
+            "lag": self.lag_stats(),
+            "stalls_total": sum(entry["stalls"] for entry in self.by_endpoint.values()),
+            "by_endpoint": self._ranked(self.by_endpoint),
+            "by_project": self._ranked(self.by_project),
+            "by_site": self._ranked(self.by_site),
+            "recent": list(reversed(recent)),
+        }
+
+    def prometheus(self) -> str:
+        """Prometheus text exposition of the lag and stall counters"""
+        stats = self.lag_stats()
+        lines = [
+            "# TYPE event_loop_lag_seconds summary",
+            f'event_loop_lag_seconds{{quantile="0.5"}} {(stats["p50_ms"] or 0) / 1000}',
+            f'event_loop_lag_seconds{{quantile="0.99"}} {(stats["p99_ms"] or 0) / 1000}',
+            f"event_loop_lag_seconds_count {self.samples}",
+            "# TYPE event_loop_lag_max_seconds gauge",
+            f"event_loop_lag_max_seconds {self.max_lag}",
+            "# TYPE event_loop_stalls_total counter",
+        ]
+        for endpoint, entry in self.by_endpoint.items():
+            lines.append(f'event_loop_stalls_total{{endpoint="{endpoint}"}} {entry["stalls"]}')
+        lines.append("# TYPE event_loop_blocked_seconds_total counter")
+        for endpoint, entry in self.by_endpoint.items():
+            lines.append(f'event_loop_blocked_seconds_total{{endpoint="{endpoint}"}} {entry["blocked_ms_total"] / 1000}')
+        return "\n".join(lines) + "\n"
@@ -1,12 +1,17 @@
 import os
 import json
+import math
+import time
+import hashlib
+import shutil
 import asyncio
+import tempfile
+import threading
 import subprocess
 from pathlib import Path
-from typing import Optional
-from fastapi import FastAPI, UploadFile, File, WebSocket, WebSocketDisconnect
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse, FileResponse
+from typing import Dict, List, Optional, Set
+from fastapi import FastAPI, UploadFile, File, WebSocket, WebSocketDisconnect, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import uvicorn
@@ -14,6 +19,34 @@ from builder import Builder
 from dotenv import load_dotenv
 from project_manager import ProjectManager
 from schema_validator import validate_new_schema
+from lazy_imports import lazy
+from asset_index import AssetIndex
+from asset_plan import plan_assets
+from script_diff import PatchError, apply_json_patch, diff_scripts
+from bulk_import import MAX_UPLOAD_BYTES, ImportItem, is_zip, iter_jsonl, iter_zip, script_errors
+from atlas import ATLAS_DIR, build_project_atlas
+from storage import atomic_write_bytes, atomic_write_json, link_file, read_json
+from storage_gc import GC_INTERVAL, StorageManager, touch
+from journal import AssetJournal
+from shared_state import WORKER_ID, Lease, create_state
+from loop_monitor import LoopMonitor, LoopMonitorMiddleware
+from project_events import RevisionWatch, project_event_stream, wait_for_revision
+from profiler import profile_dir, profiled
+from render_bundle import ENTRY_POINT, code_version, npm_command, use_bundle
+from audio_analysis import AudioAnalysis, analyze_audio, find_project_audio, validate_word_times
+from render_queue import FINISHED, SUCCEEDED, RenderError, RenderJob, RenderQueue
+from compositor import Compositor, render_video, unsupported_features
+from render_progress import ProgressTracker, drain_process, parse_progress_line, record_render_metrics, render_fps_summary
+from stills import plan_scene_stills, render_missing_stills, still_browsers, still_path
+from render_modes import (
+    apply_frame_stride,
+    build_contact_sheet,
+    draft_cache_key,
+    draft_cli_args,
+    draft_extension,
+    validate_draft_settings,
+)
+from media import IMMUTABLE, CachedStaticFiles, RangedFileResponse, describe_asset, etag_matches, serve_hashed_asset
 
 load_dotenv()
 
@@ -28,6 +61,26 @@ class GenerateRequest(BaseModel):
 class ProjectRequest(BaseModel):
     project_id: str
 
+class ProjectPatchRequest(BaseModel):
+    # Either a whole replacement script or an RFC 6902 JSON patch of the stored one
+    script: Optional[dict] = None
+    patch: Optional[List[dict]] = None
+    # Redo the invalidated work now (rebuild the render config or regenerate assets)
+    regenerate: bool = True
+
+class RenderRequest(BaseModel):
+    mode: str = "final"  # "final" or "draft"
+    # Draft-only settings
+    scale: float = 0.5
+    frame_stride: int = 3
+    format: str = "mp4"  # "mp4", "gif" or "contact_sheet"
+    preset: str = "ultrafast"
+    jpeg_quality: int = 50
+    crf: int = 35
+    contact_sheet_columns: int = 6
+    # "remotion", "python" (the NumPy compositor) or "auto"; defaults to RENDER_ENGINE
+    engine: Optional[str] = None
+
 
 # CORS middleware
 app.add_middleware(
@@ -38,31 +91,232 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Event-loop diagnostics (LOOP_MONITOR=1): lag sampling and stack capture of blocking calls
+loop_monitor = LoopMonitor.from_env()
+
+
+def install_loop_monitor(target: FastAPI):
+    """Tag requests with their endpoint and project for stall reports; apps wrapping this one call it too"""
+    if loop_monitor:
+        target.add_middleware(LoopMonitorMiddleware)
+
+
+install_loop_monitor(app)
+
 # Serve static files
 public_dir = Path(__file__).parent / "public"
 public_dir.mkdir(exist_ok=True)
-app.mount("/public", StaticFiles(directory=str(public_dir)), name="public")
+app.mount("/public", CachedStaticFiles(directory=str(public_dir)), name="public")
 
 # Global state
 builder: Optional[Builder] = None
 active_connections = []
-project_manager = ProjectManager()
+# SHARED_STATE_URL selects where state shared by API workers lives; unset keeps
+# everything in this process, which is only correct for a single worker
+shared_state = create_state()
+project_manager = ProjectManager(state=shared_state if shared_state.shared else None)
+# Long-poll and SSE clients wait here for a project's revision to change
+project_watch = RevisionWatch()
+
+
+# Projects changed since the last publish; a burst of writes (progress updates)
+# to one project goes out as a single message
+_revisions_pending: Set[str] = set()
+_revisions_lock = threading.Lock()
+_revisions_flushing = False
+
+
+def _publish_revisions():
+    """Publish pending revisions until none are left; runs off the event loop"""
+    global _revisions_flushing
+    while True:
+        with _revisions_lock:
+            if not _revisions_pending:
+                _revisions_flushing = False
+                return
+            project_ids = list(_revisions_pending)
+            _revisions_pending.clear()
+        for project_id in project_ids:
+            try:
+                shared_state.publish("project-revisions", {"origin": WORKER_ID, "project_id": project_id})
+            except Exception as e:
+                print(f"Error publishing revision of {project_id}: {str(e)}")
+
+
+def _project_changed(project_id: str):
+    global _revisions_flushing
+    project_watch.notify(project_id)
+    if not shared_state.shared:
+        return
+    with _revisions_lock:
+        _revisions_pending.add(project_id)
+        if _revisions_flushing:
+            return
+        _revisions_flushing = True
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    if loop is not None:
+        # The write happened on the loop; a Redis/SQLite round trip must not stall it
+        loop.run_in_executor(None, _publish_revisions)
+    else:
+        _publish_revisions()
+
+
+project_manager.on_change = _project_changed
+# Lease on a project's generation, refreshed while it runs; expires if the worker dies
+GENERATION_LOCK_TTL = 30
+
+
+def _on_render_evicted(path: Path):
+    """A project's final render was evicted to meet a quota; it must be rendered again"""
+    if path.name == "video.mp4" and path.parent.name == "output":
+        project_id = path.parent.parent.name
+        if project_manager.get_project(project_id):
+            project_manager.update_project(project_id, {"video_path": None})
+
+
+# Reference counts, dedup, orphan sweeps and render-output quotas for the media on disk
+storage_manager = StorageManager(
+    project_manager.base_dir,
+    lambda: [project["id"] for project in project_manager.get_all_projects()],
+    on_evict=_on_render_evicted,
+)
+
+
+def _generation_lock(project_id: str) -> str:
+    return f"generate:{project_id}"
+
+
+def _record_generation_status(project_id: str, current: Builder):
+    """Share the latest generation status so /api/status answers on any worker"""
+    shared_state.put("generation", "latest", {
+        "project_id": project_id,
+        "worker_id": WORKER_ID,
+        "status": current.status,
+        "generated_assets": len(current.generated_assets),
+        "total_assets": current.total_assets,
+        "error": current.error,
+    })
+
+
+def _profiling_requested(request: Optional[Request], project: dict) -> bool:
+    """Profile this execution? Opt-in per request (X-Profile header or ?profile=1) or per project"""
+    if request is not None:
+        flag = request.headers.get("x-profile") or request.query_params.get("profile")
+        if flag is not None:
+            return flag.lower() in ("1", "true", "yes", "on")
+    return bool(project.get("profile"))
 
 
-async def run_generation_with_update(project_id: str):
+def _record_profile(project_id: str, kind: str):
+    def on_saved(name: str, summary: dict):
+        project_manager.update_project(project_id, {"last_profile": {
+            "kind": kind,
+            "name": name,
+            "url": f"/api/projects/{project_id}/profiles/{name}",
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }})
+        asyncio.create_task(manager.broadcast({
+            "type": "profile", "project_id": project_id, "kind": kind, "name": name, "top": summary,
+        }))
+    return on_saved
+
+
+async def run_generation_with_update(project_id: str, lease: Optional[Lease] = None, profile: bool = False):
     """Run asset generation and update project status"""
-    global builder
+    current = builder
     try:
-        await builder.generate_all()
-        
-        # Copy assets to Remotion
-        await builder._copy_assets_to_remotion()
+        _record_generation_status(project_id, current)
+        async with profiled(profile, project_manager.get_project_dir(project_id), "generate",
+                            _record_profile(project_id, "generate")):
+            await current.generate_all()
+
+            if current.status == "error":
+                # Progress is journaled; a retry resumes from the failed asset
+                project_manager.update_project_status(project_id, "failed", error=current.error)
+                return
+
+            # Copy assets to Remotion
+            await current._copy_assets_to_remotion()
         
         # Update project status to completed
         project_manager.update_project_status(project_id, "completed")
         
     except Exception as e:
         project_manager.update_project_status(project_id, "failed", error=str(e))
+    finally:
+        _record_generation_status(project_id, current)
+        if lease:
+            await lease.release()
+
+
+async def _start_generation(project_id: str, profile: bool = False, lease: Optional[Lease] = None):
+    """Take the project's generation lease and start a Builder; returns an error response or None
+
+    A caller already holding the lease (an edit) passes it in; the generation
+    then owns it and releases it when done.
+    """
+    global builder
+
+    if lease is None:
+        lease = Lease(shared_state, _generation_lock(project_id), ttl=GENERATION_LOCK_TTL)
+        if not await lease.acquire():
+            return JSONResponse(status_code=409, content={
+                "error": "Generation already running for this project",
+                "worker_id": await asyncio.to_thread(shared_state.lock_owner, _generation_lock(project_id)),
+            })
+    try:
+        # Update project status
+        project_manager.update_project_status(project_id, "processing")
+
+        # Planning reads the script and hashes every asset; keep it off the loop
+        builder = await asyncio.to_thread(
+            Builder,
+            project_id=project_id,
+            project_dir=project_manager.get_project_dir(project_id),
+            log_callback=lambda msg: asyncio.create_task(
+                manager.broadcast({"type": "log", "message": msg, "project_id": project_id})
+            ),
+            progress_callback=lambda done, total: project_manager.update_progress(project_id, done, total),
+        )
+    except Exception:
+        await lease.release()
+        raise
+
+    # Run generation in background
+    task = asyncio.create_task(run_generation_with_update(project_id, lease, profile))
+    generation_tasks[project_id] = task
+    task.add_done_callback(lambda _: generation_tasks.pop(project_id, None))
+    return None
+
+
+# Projects queued by bulk imports start a few at a time instead of all at once
+GENERATION_CONCURRENCY = int(os.getenv("GENERATION_CONCURRENCY", "2"))
+generation_queue: "asyncio.Queue[str]" = asyncio.Queue()
+generation_tasks: Dict[str, asyncio.Task] = {}
+
+
+def _enqueue_generation(project_id: str):
+    project_manager.update_project_status(project_id, "queued")
+    generation_queue.put_nowait(project_id)
+
+
+async def _generation_worker():
+    while True:
+        project_id = await generation_queue.get()
+        try:
+            # Another worker (or a manual start) may have picked it up meanwhile
+            project = project_manager.get_project(project_id)
+            if project and project.get("status") == "queued" and await _start_generation(project_id, bool(project.get("profile"))) is None:
+                task = generation_tasks.get(project_id)
+                if task:
+                    await task
+        except Exception as e:
+            print(f"Queued generation of {project_id} failed to start: {str(e)}")
+        finally:
+            generation_queue.task_done()
 
 
 class ConnectionManager:
@@ -77,14 +331,193 @@ class ConnectionManager:
         self.active_connections.remove(websocket)
 
     async def broadcast(self, message: dict):
+        """Send to this worker's sockets and fan out to the other workers"""
+        await self.send_local(message)
+        if shared_state.shared:
+            try:
+                await asyncio.to_thread(shared_state.publish, "broadcast", {"origin": WORKER_ID, "message": message})
+            except Exception as e:
+                print(f"Error publishing broadcast: {str(e)}")
+
+    async def send_local(self, message: dict):
         for connection in self.active_connections:
             try:
                 await connection.send_json(message)
             except Exception:
                 pass
 
+    async def relay(self):
+        """Deliver messages broadcast by other workers to this worker's sockets"""
+        while True:
+            try:
+                async for event in shared_state.subscribe("broadcast"):
+                    if event.get("origin") != WORKER_ID:
+                        await self.send_local(event["message"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Broadcast relay failed, resubscribing: {str(e)}")
+                await asyncio.sleep(1)
+
 
 manager = ConnectionManager()
+# Render jobs are per process; polling a job on another worker would 404
+render_queue = RenderQueue.from_env()
+if shared_state.shared:
+    print("Warning: render jobs are tracked per worker; run a single API worker when rendering")
+# Minimum seconds between render progress broadcasts (stage changes always go out)
+PROGRESS_INTERVAL = 0.5
+# Default render engine: "remotion" (headless Chrome), "python" (compositor.py) or
+# "auto" (the compositor when it supports every feature the project uses).
+# The compositor is experimental until its end-to-end fps is measured against
+# Remotion (benchmarks/compositor.py --ffmpeg --remotion); it is only
+# selectable with PYTHON_RENDER_ENGINE=1.
+PYTHON_ENGINE_ENABLED = os.getenv("PYTHON_RENDER_ENGINE", "0") == "1"
+RENDER_ENGINES = ("remotion", "python", "auto") if PYTHON_ENGINE_ENABLED else ("remotion",)
+RENDER_ENGINE = os.getenv("RENDER_ENGINE", "remotion")
+if RENDER_ENGINE not in RENDER_ENGINES:
+    print(f"Warning: RENDER_ENGINE={RENDER_ENGINE} needs PYTHON_RENDER_ENGINE=1; rendering with Remotion")
+    RENDER_ENGINE = "remotion"
+
+
+def _choose_engine(engine: str, final_config: dict, draft_settings: Optional[dict]):
+    """Resolve the requested engine to (engine, reasons the compositor was not used)"""
+    if engine == "remotion":
+        return "remotion", []
+    if draft_settings and draft_settings["format"] != "mp4":
+        return "remotion", [f"{draft_settings['format']} drafts need Remotion"]
+    reasons = unsupported_features(final_config)
+    return ("remotion" if reasons else "python"), reasons
+
+
+@app.on_event("startup")
+async def recover_interrupted_projects():
+    """Flag generations cut short by a restart so they can be retried from the journal"""
+    interrupted = project_manager.mark_interrupted(
+        lambda project_id: shared_state.lock_owner(_generation_lock(project_id)) is not None
+    )
+    if interrupted:
+        print(f"Marked {len(interrupted)} interrupted project(s) as failed: {', '.join(interrupted)}")
+
+
+@app.on_event("startup")
+async def start_generation_workers():
+    """Work through queued generations, including ones queued before a restart"""
+    for _ in range(max(1, GENERATION_CONCURRENCY)):
+        asyncio.create_task(_generation_worker())
+    for project in project_manager.get_all_projects():
+        if project.get("status") == "queued":
+            generation_queue.put_nowait(project["id"])
+
+
+@app.on_event("startup")
+async def start_storage_gc():
+    """Sweep orphans, dedupe and enforce render quotas every STORAGE_GC_INTERVAL seconds"""
+    if GC_INTERVAL <= 0:
+        return
+
+    async def _loop():
+        while True:
+            await asyncio.sleep(GC_INTERVAL)
+            # One worker collects at a time; the others skip this round
+            lease = Lease(shared_state, "storage-gc", ttl=60)
+            if not await lease.acquire():
+                continue
+            try:
+                report = await asyncio.to_thread(storage_manager.collect)
+                freed = report["orphans"]["bytes_freed"] + report["quotas"]["bytes_freed"] + report["dedupe"]["bytes_saved"]
+                if freed:
+                    print(f"Storage GC reclaimed {freed / (1024 * 1024):.1f}MB in {report['seconds']}s")
+            except Exception as e:
+                print(f"Storage GC failed: {str(e)}")
+            finally:
+                await lease.release()
+
+    app.state.storage_gc = asyncio.create_task(_loop())
+
+
+@app.on_event("startup")
+async def start_loop_monitor():
+    if loop_monitor:
+        loop_monitor.start()
+        print(f"Event-loop monitor on: stalls over {loop_monitor.threshold * 1000:.0f}ms are recorded")
+
+
+@app.on_event("startup")
+async def start_broadcast_relay():
+    """Forward other workers' log broadcasts to this worker's websockets"""
+    if shared_state.shared:
+        app.state.broadcast_relay = asyncio.create_task(manager.relay())
+        app.state.revision_relay = asyncio.create_task(_relay_project_revisions())
+
+
+async def _relay_project_revisions():
+    """Wake this worker's long-poll/SSE waiters when another worker changes a project"""
+    while True:
+        try:
+            async for event in shared_state.subscribe("project-revisions"):
+                if event.get("origin") != WORKER_ID:
+                    project_watch.notify(event["project_id"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Revision relay failed, resubscribing: {str(e)}")
+            await asyncio.sleep(1)
+
+
+@app.on_event("shutdown")
+async def flush_project_registry():
+    """Write out status updates still waiting in the registry's write coalescer"""
+    project_manager.flush()
+    if loop_monitor:
+        loop_monitor.stop()
+    for name in ("broadcast_relay", "revision_relay", "storage_gc"):
+        task = getattr(app.state, name, None)
+        if task:
+            task.cancel()
+    shared_state.close()
+
+
+@app.on_event("startup")
+async def prewarm_heavy_imports():
+    """Optionally load heavy SDKs/models in the background once the server is up
+
+    PREWARM_IMPORTS is "all" or a comma-separated list of lazy import names
+    (e.g. "httpx,PIL.Image,rembg_session"); unset disables prewarming.
+    """
+    setting = os.getenv("PREWARM_IMPORTS", "").strip()
+    if not setting:
+        return
+    names = lazy.names() if setting == "all" else [n.strip() for n in setting.split(",") if n.strip()]
+
+    async def _delayed():
+        # Let uvicorn finish binding before competing for CPU
+        await asyncio.sleep(float(os.getenv("PREWARM_DELAY", "1")))
+        lazy.prewarm(names)
+
+    asyncio.create_task(_delayed())
+
+
+@app.get("/api/health")
+async def health():
+    """Liveness check that never touches heavy dependencies"""
+    return {"status": "ok", "imports": lazy.status(), "state": shared_state.describe()}
+
+
+async def _analyze_and_check_audio(audio_path: Path, directory: Optional[Path], script_data: dict) -> Optional[dict]:
+    """Run (or reuse) the waveform analysis and check subtitle word times against it
+
+    Analysis problems are reported, not raised: a script can still be built
+    without them.
+    """
+    try:
+        analysis = await asyncio.to_thread(analyze_audio, audio_path, directory)
+    except Exception as e:
+        print(f"Audio analysis failed for {audio_path}: {str(e)}")
+        return {"error": f"Audio analysis failed: {str(e)}"}
+    report = analysis.summary()
+    report["word_timing"] = validate_word_times(script_data.get("subtitles") or [], analysis)
+    return report
 
 
 @app.post("/api/upload")
@@ -97,12 +530,9 @@ async def upload_files(audio: UploadFile = File(...), script: UploadFile = File(
         audio_path.parent.mkdir(parents=True, exist_ok=True)
         script_path.parent.mkdir(parents=True, exist_ok=True)
 
-        # Save files
-        with open(audio_path, "wb") as f:
-            f.write(await audio.read())
-
-        with open(script_path, "wb") as f:
-            f.write(await script.read())
+        # Save files; replace rather than overwrite, the old audio may be linked into projects
+        await asyncio.to_thread(atomic_write_bytes, audio_path, await audio.read())
+        await asyncio.to_thread(atomic_write_bytes, script_path, await script.read())
 
         # Validate script JSON with new schema
         with open(script_path, "r") as f:
@@ -145,10 +575,15 @@ async def upload_files(audio: UploadFile = File(...), script: UploadFile = File(
                 }
             )
 
+        # Analyze the waveform once at upload; the project created from this
+        # file reuses the cached result
+        audio_report = await _analyze_and_check_audio(audio_path, None, script_data)
+
         return {
             "status": "success",
             "audio_path": str(audio_path),
             "script_path": str(script_path),
+            "audio_analysis": audio_report,
         }
     except json.JSONDecodeError:
         return JSONResponse(
@@ -180,25 +615,20 @@ async def create_project(request: GenerateRequest):
                 audio_format = match.group(1)
                 base64_data = match.group(2)
                 
-                # Create project first to get the directory
-                project_id = project_manager.create_project(
-                    script_data=request.script_data,
-                    audio_path=None
-                )
-                
-                # Save audio file to project directory
-                project_dir = project_manager.get_project_dir(project_id)
-                audio_filename = f"audio.{audio_format}"
-                audio_path = project_dir / "audio" / audio_filename
-                audio_path.parent.mkdir(parents=True, exist_ok=True)
-                
-                # Decode and save audio
-                audio_data = base64.b64decode(base64_data)
-                with open(audio_path, "wb") as f:
-                    f.write(audio_data)
-                
-                # Update project with audio path
-                project_manager.update_project(project_id, {"audio_path": str(audio_path)})
+                # Build the project in staging so its script is written once, audio path included
+                staged = project_manager.stage_project()
+                try:
+                    audio_filename = f"audio.{audio_format}"
+                    audio_data = base64.b64decode(base64_data)
+                    atomic_write_bytes(staged["dir"] / "audio" / audio_filename, audio_data)
+                    project_id = staged["id"]
+                    request.script_data["audio_path"] = f"audio/{audio_filename}"
+                    staged["script_data"] = request.script_data
+                    staged["fields"]["audio_path"] = str(project_manager.get_project_dir(project_id) / "audio" / audio_filename)
+                    project_manager.commit_staged([staged])
+                except Exception:
+                    project_manager.discard_staged(staged)
+                    raise
             else:
                 raise ValueError("Invalid audio data format")
         else:
@@ -208,7 +638,13 @@ async def create_project(request: GenerateRequest):
                 audio_path=request.audio_file
             )
         
-        return {"project_id": project_id}
+        project_dir = project_manager.get_project_dir(project_id)
+        audio_report = None
+        audio_file = find_project_audio(project_dir)
+        if audio_file:
+            audio_report = await _analyze_and_check_audio(audio_file, project_dir / "analysis", request.script_data)
+
+        return {"project_id": project_id, "audio_analysis": audio_report}
     except Exception as e:
         print(f"Error creating project: {str(e)}")
         import traceback
@@ -216,92 +652,425 @@ async def create_project(request: GenerateRequest):
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 
+async def _spool_body(request: Request, target) -> int:
+    """Copy the request body to ``target`` chunk by chunk; returns the size"""
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > MAX_UPLOAD_BYTES:
+            raise ValueError(f"Upload larger than {MAX_UPLOAD_BYTES // (1024 * 1024)}MB")
+        await asyncio.to_thread(target.write, chunk)
+    return size
+
+
+async def _stage_import_item(item: ImportItem, analyze: bool):
+    """Validate one bulk item and build it in a staging directory; returns (result, staged)"""
+    result = {"index": item.index, "ref": item.ref}
+    errors = [item.error] if item.error else script_errors(item.script)
+    if errors:
+        return {**result, "status": "invalid", "errors": errors}, None
+
+    staged = project_manager.stage_project()
+    try:
+        script = item.script
+        if item.write_audio:
+            audio_name = Path(item.audio_name).name
+            audio_path = staged["dir"] / "audio" / audio_name
+            await asyncio.to_thread(item.write_audio, audio_path)
+            script["audio_path"] = f"audio/{audio_name}"
+            staged["fields"]["audio_path"] = str(project_manager.get_project_dir(staged["id"]) / "audio" / audio_name)
+            if analyze:
+                result["audio_analysis"] = await _analyze_and_check_audio(audio_path, staged["dir"] / "analysis", script)
+        staged["script_data"] = script
+    except Exception as e:
+        project_manager.discard_staged(staged)
+        return {**result, "status": "error", "errors": [str(e)]}, None
+    return {**result, "status": "staged", "project_id": staged["id"]}, staged
+
+
+@app.post("/api/projects/bulk")
+async def bulk_import_projects(request: Request, enqueue: bool = False, atomic: bool = False, analyze: bool = True):
+    """Create many projects from a JSONL or zip upload, streaming one result line per item
+
+    The body is either JSONL (one script per line, bare or as
+    ``{"script", "audio": "data:audio/...;base64,...", "ref"}``) or a zip of
+    ``<name>.json`` scripts with their audio files. It is spooled to disk and
+    read one item at a time. Each project is built in a staging directory and
+    only registered once complete; with ``atomic`` nothing is registered unless
+    every item is valid. ``enqueue`` queues generation for the new projects.
+    """
+    spool = tempfile.NamedTemporaryFile(prefix="bulk-import-", suffix=".upload", delete=False)
+    spool_path = Path(spool.name)
+    try:
+        await _spool_body(request, spool)
+        spool.close()
+    except Exception as e:
+        spool.close()
+        spool_path.unlink(missing_ok=True)
+        return JSONResponse(status_code=400, content={"error": str(e)})
+
+    async def results():
+        counts = {"created": 0, "invalid": 0, "error": 0, "queued": 0}
+        staged_batch = []
+        try:
+            if await asyncio.to_thread(is_zip, spool_path):
+                items = iter_zip(spool_path)
+                stream = None
+            else:
+                stream = open(spool_path, "rb")
+                items = iter_jsonl(stream)
+            try:
+                while True:
+                    item = await asyncio.to_thread(next, items, None)
+                    if item is None:
+                        break
+                    result, staged = await _stage_import_item(item, analyze)
+                    if staged is None:
+                        counts[result["status"]] += 1
+                    elif atomic:
+                        staged_batch.append(staged)
+                    else:
+                        project_manager.commit_staged([staged], immediate=False)
+                        counts["created"] += 1
+                        result["status"] = "created"
+                        if enqueue:
+                            _enqueue_generation(staged["id"])
+                            counts["queued"] += 1
+                            result["queued"] = True
+                    yield json.dumps(result) + "\n"
+            finally:
+                items.close()
+                if stream:
+                    stream.close()
+
+            summary = {"summary": True, **counts}
+            if atomic:
+                if counts["invalid"] or counts["error"]:
+                    summary["committed"] = False
+                else:
+                    project_ids = project_manager.commit_staged(staged_batch)
+                    staged_batch = []
+                    counts["created"] = summary["created"] = len(project_ids)
+                    summary["committed"] = True
+                    summary["project_ids"] = project_ids
+                    if enqueue:
+                        for project_id in project_ids:
+                            _enqueue_generation(project_id)
+                        summary["queued"] = len(project_ids)
+            yield json.dumps(summary) + "\n"
+        except Exception as e:
+            yield json.dumps({"summary": True, "error": str(e), **counts}) + "\n"
+        finally:
+            for staged in staged_batch:
+                project_manager.discard_staged(staged)
+            project_manager.flush()
+            spool_path.unlink(missing_ok=True)
+            await manager.broadcast({"type": "log", "message": f"📦 Bulk import: {counts['created']} created, {counts['invalid'] + counts['error']} rejected"})
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+
 @app.get("/api/projects")
-async def get_projects():
-    """Get all projects"""
+async def get_projects(
+    status: Optional[str] = None,
+    created_after: Optional[str] = None,
+    created_before: Optional[str] = None,
+    q: Optional[str] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+):
+    """List project summaries, newest first, with filters and cursor pagination"""
     try:
-        projects = project_manager.get_all_projects()
-        return {"projects": projects}
+        limit = max(1, min(limit, 500))
+        return project_manager.list_projects(
+            status=status,
+            created_after=created_after,
+            created_before=created_before,
+            query=q,
+            limit=limit,
+            cursor=cursor,
+        )
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 
+def _project_etag(project: dict, summary: bool) -> str:
+    """Weak validator from the project's revision, which every change bumps"""
+    return f'W/"{project["id"]}-{project.get("revision", 0)}{"-summary" if summary else ""}"'
+
+
 @app.get("/api/projects/{project_id}")
-async def get_project(project_id: str):
-    """Get specific project details"""
+async def get_project(request: Request, project_id: str, since: Optional[int] = None,
+                      timeout: float = 30, summary: bool = False):
+    """Get specific project details
+
+    Conditional: answers 304 when If-None-Match carries the current ETag.
+    With ``since=<revision>`` it long-polls, returning as soon as the
+    revision passes ``since`` or 304 after ``timeout`` seconds (at most 60).
+    ``summary`` drops the script for a much smaller body.
+    """
     try:
         project = project_manager.get_project(project_id)
         if not project:
             return JSONResponse(status_code=404, content={"error": "Project not found"})
-        return project
+        if since is not None:
+            project = await wait_for_revision(project_watch, project_manager.get_project, project_id, since, timeout)
+            if not project:
+                return JSONResponse(status_code=404, content={"error": "Project not found"})
+
+        etag = _project_etag(project, summary)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        unchanged = since is not None and project.get("revision", 0) <= since
+        if unchanged or etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        body = project_manager.get_summary(project_id) if summary else project
+        return JSONResponse(content=body, headers=headers)
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+@app.get("/api/projects/{project_id}/events")
+async def project_events(request: Request, project_id: str, since: int = 0):
+    """Server-Sent Events: the project summary each time its revision changes
+
+    Event ids are revisions; a reconnecting EventSource sends Last-Event-ID
+    and only receives states it has not seen.
+    """
+    if not project_manager.get_project(project_id):
+        return JSONResponse(status_code=404, content={"error": "Project not found"})
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id and last_event_id.isdigit():
+        since = max(since, int(last_event_id))
+    return StreamingResponse(
+        project_event_stream(project_watch, project_manager.get_summary, project_id, since),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/api/projects/{project_id}/script")
+async def get_project_script(project_id: str):
+    """Get a project's full input script on demand"""
+    try:
+        script = project_manager.get_project_script(project_id)
+        if script is None:
+            return JSONResponse(status_code=404, content={"error": "Project not found"})
+        return script
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+@app.patch("/api/projects/{project_id}")
+async def edit_project(project_id: str, request: ProjectPatchRequest):
+    """Apply an edited script and redo only the work the edit invalidates
+
+    The edit is diffed against the stored input_script.json: assets whose
+    prompt or role changed are dropped and regenerated, everything else is
+    kept. An edit that needs no new images (subtitle text, timing, layout)
+    only rebuilds the render config. Scene stills and drafts are keyed by the
+    config and the bytes of the assets they use, so only changed scenes get
+    new stills and a draft of an unchanged video comes from the cache.
+    """
+    project = project_manager.get_project(project_id)
+    if not project:
+        return JSONResponse(status_code=404, content={"error": "Project not found"})
+    if (request.script is None) == (request.patch is None):
+        return JSONResponse(status_code=400, content={"error": "Provide exactly one of 'script' or 'patch'"})
+
+    old_script = project_manager.get_project_script(project_id) or {}
+    try:
+        new_script = request.script if request.script is not None else apply_json_patch(old_script, request.patch)
+    except PatchError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    if old_script.get("audio_path") and "audio_path" not in new_script:
+        # Clients edit the script they uploaded; keep the audio stored with the project
+        new_script["audio_path"] = old_script["audio_path"]
+    validation = validate_new_schema(new_script)
+    if not validation["valid"]:
+        return JSONResponse(status_code=400, content={"error": "Invalid script", "errors": validation["errors"]})
+
+    diff = diff_scripts(old_script, new_script)
+    if json.dumps(old_script, sort_keys=True) == json.dumps(new_script, sort_keys=True):
+        return {"project_id": project_id, "status": "unchanged", "diff": diff}
+
+    # Hold the generation lease for the whole edit so no generation or retry starts mid-write
+    lease = Lease(shared_state, _generation_lock(project_id), ttl=GENERATION_LOCK_TTL)
+    if not await lease.acquire():
+        return JSONResponse(status_code=409, content={
+            "error": "Generation is running for this project; edit it once it finishes",
+            "worker_id": await asyncio.to_thread(shared_state.lock_owner, _generation_lock(project_id)),
+        })
+    handed_off = False
+    try:
+        # The lease holder may have changed the script since it was read above
+        if (project_manager.get_project_script(project_id) or {}) != old_script:
+            return JSONResponse(status_code=409, content={"error": "Project changed while the edit was prepared; retry it"})
+        project_manager.replace_script(project_id, new_script)
+        project_dir = project_manager.get_project_dir(project_id)
+
+        def plan_edit() -> Builder:
+            planned = Builder(
+                project_id=project_id,
+                project_dir=project_dir,
+                log_callback=lambda msg: asyncio.create_task(
+                    manager.broadcast({"type": "log", "message": msg, "project_id": project_id})
+                ),
+            )
+            if diff["stale_assets"]:
+                planned.invalidate_assets(diff["stale_assets"])
+            return planned
+
+        # Planning hashes every asset; invalidation deletes files
+        current = await asyncio.to_thread(plan_edit)
+        pending = [asset["asset_id"] for asset in current.asset_plan["assets"] if not asset["saved"]]
+        result = {"project_id": project_id, "diff": diff, "pending_assets": pending}
+
+        if not request.regenerate or not (project_dir / "final_render.json").exists():
+            # Never generated (or the caller will start it): the next generation picks the edit up
+            return {**result, "status": "saved"}
+
+        if pending:
+            handed_off = True
+            error = await _start_generation(project_id, bool(project.get("profile")), lease=lease)
+            if error:
+                return error
+            return {**result, "status": "generating"}
+
+        if not await current.rebuild_config(reuse_atlas=not diff["stale_assets"]) or current.final_config is None:
+            # An asset went missing since the plan above; leave the project as it was
+            pending = [asset["asset_id"] for asset in current.asset_plan["assets"] if not asset["saved"]]
+            return JSONResponse(status_code=409, content={
+                "error": "Assets are missing; generate the project to apply this edit",
+                **result, "pending_assets": pending,
+            })
+        project_manager.update_project_status(project_id, "completed")
+        stills = await asyncio.to_thread(plan_scene_stills, current.final_config, diff["changed_scenes"])
+        await manager.broadcast({
+            "type": "log",
+            "project_id": project_id,
+            "message": f"✓ Applied edit to {len(diff['changed_scenes'])} scene(s) without generating assets",
+        })
+        return {**result, "status": "rebuilt", "stale_stills": [still["scene_id"] for still in stills if not still["cached"]]}
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
+    finally:
+        if not handed_off:
+            await lease.release()
+
+
+@app.get("/api/projects/{project_id}/audio-analysis")
+async def get_project_audio_analysis(project_id: str, points: int = 0):
+    """Cached waveform analysis: duration, pauses and word-timing checks
+
+    ``points`` > 0 also returns the RMS envelope downsampled to that many
+    peaks, enough to draw a waveform.
+    """
+    if not project_manager.get_project(project_id):
+        return JSONResponse(status_code=404, content={"error": "Project not found"})
+
+    analysis = AudioAnalysis.load(project_manager.get_project_dir(project_id) / "analysis")
+    if not analysis:
+        return JSONResponse(status_code=404, content={"error": "No audio analysis for this project"})
+
+    script = project_manager.get_project_script(project_id) or {}
+    report = analysis.summary()
+    report["silences"] = [[round(float(a), 3), round(float(b), 3)] for a, b in analysis.silences]
+    report["word_timing"] = validate_word_times(script.get("subtitles") or [], analysis)
+    if points > 0:
+        report["envelope"] = analysis.peaks(min(points, 4000))
+    return report
 
 
 @app.delete("/api/projects/{project_id}")
 async def delete_project(project_id: str):
     """Delete a project"""
     try:
+        config_path = project_manager.get_project_dir(project_id) / "final_render.json"
+        config = read_json(config_path) if config_path.exists() else None
         success = project_manager.delete_project(project_id)
         if not success:
             return JSONResponse(status_code=404, content={"error": "Project not found"})
-        return {"status": "deleted"}
+        shutil.rmtree(ATLAS_DIR / project_id, ignore_errors=True)
+        # Its Remotion copies go too, unless another project uses the same files
+        released = await asyncio.to_thread(storage_manager.release_project, project_id, config)
+        return {"status": "deleted", "released_files": released}
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 
 @app.post("/api/projects/{project_id}/generate")
-async def generate_assets(project_id: str):
+async def generate_assets(request: Request, project_id: str):
     """Start asset generation for a project"""
-    global builder
-
     try:
         project = project_manager.get_project(project_id)
         if not project:
             return JSONResponse(status_code=404, content={"error": "Project not found"})
-        
-        # Update project status
-        project_manager.update_project_status(project_id, "processing")
-        
-        builder = Builder(
-            project_id=project_id,
-            log_callback=lambda msg: asyncio.create_task(
-                manager.broadcast({"type": "log", "message": msg, "project_id": project_id})
-            ),
-        )
 
-        # Run generation in background
-        asyncio.create_task(run_generation_with_update(project_id))
-        
+        error = await _start_generation(project_id, _profiling_requested(request, project))
+        if error:
+            return error
         return {"project_id": project_id, "status": "started"}
     except Exception as e:
         project_manager.update_project_status(project_id, "failed", error=str(e))
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 
+@app.get("/api/projects/{project_id}/generation-plan")
+async def get_generation_plan(project_id: str):
+    """Dry run of asset generation: unique assets, fan-out and expected provider calls"""
+    project = project_manager.get_project(project_id)
+    if not project:
+        return JSONResponse(status_code=404, content={"error": "Project not found"})
+    script = project_manager.get_project_script(project_id)
+    if not script or "scenes" not in script:
+        return JSONResponse(status_code=400, content={"error": "Project script has no 'scenes' array"})
+
+    project_dir = project_manager.get_project_dir(project_id)
+    journal = AssetJournal(project_dir)
+
+    def _is_saved(asset_id: str) -> bool:
+        asset_path = project_dir / "assets" / f"{asset_id}.png"
+        return journal.is_saved(asset_id, asset_path) or asset_path.exists()
+
+    plan = plan_assets(script, bool(os.getenv("GOOGLE_API_KEY")), _is_saved)
+    return {"project_id": project_id, **plan}
+
+
+@app.post("/api/projects/{project_id}/atlas")
+async def build_atlas_for_project(project_id: str):
+    """(Re)pack a generated project's assets into texture atlases for faster renders"""
+    project = project_manager.get_project(project_id)
+    if not project:
+        return JSONResponse(status_code=404, content={"error": "Project not found"})
+    project_dir = project_manager.get_project_dir(project_id)
+    config_path = project_dir / "final_render.json"
+    if not config_path.exists():
+        return JSONResponse(status_code=400, content={"error": "No render config available"})
+    try:
+        with open(config_path, "r") as f:
+            final_config = json.load(f)
+        atlas = await asyncio.to_thread(build_project_atlas, project_id, final_config, project_dir / "assets")
+        if not atlas:
+            return JSONResponse(status_code=400, content={"error": "Project has no generated assets to pack"})
+        final_config["atlas"] = atlas
+        await asyncio.to_thread(atomic_write_json, config_path, final_config)
+        await manager.broadcast({"type": "log", "message": f"✓ Packed {len(atlas['rects'])} assets into {len(atlas['pages'])} atlas page(s)"})
+        return {"status": "success", "pages": atlas["pages"], "assets": len(atlas["rects"]), "fill": atlas["fill"]}
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
 @app.post("/api/projects/{project_id}/retry")
-async def retry_project_generation(project_id: str):
+async def retry_project_generation(request: Request, project_id: str):
     """Retry failed asset generation for a project"""
-    global builder
-
     try:
         project = project_manager.get_project(project_id)
         if not project:
             return JSONResponse(status_code=404, content={"error": "Project not found"})
-        
-        # Update project status
-        project_manager.update_project_status(project_id, "processing")
-        
-        builder = Builder(
-            project_id=project_id,
-            log_callback=lambda msg: asyncio.create_task(
-                manager.broadcast({"type": "log", "message": msg, "project_id": project_id})
-            ),
-        )
 
-        # Run generation in background
-        asyncio.create_task(run_generation_with_update(project_id))
-        
+        error = await _start_generation(project_id, _profiling_requested(request, project))
+        if error:
+            return error
         return {"project_id": project_id, "status": "retrying"}
     except Exception as e:
         project_manager.update_project_status(project_id, "failed", error=str(e))
@@ -310,47 +1079,150 @@ async def retry_project_generation(project_id: str):
 
 @app.post("/api/retry")
 async def retry_generation():
-    """Retry failed asset generation"""
-    global builder
-
+    """Retry failed asset generation of the last started project"""
     if not builder:
         return JSONResponse(status_code=400, content={"error": "No active builder"})
 
+    project_id = builder.project_id
     try:
-        asyncio.create_task(builder.generate_all())
-        return {"status": "resumed"}
+        project = project_manager.get_project(project_id) or {}
+        # Same lease as every other start, so a retry never runs beside a generation or edit
+        error = await _start_generation(project_id, bool(project.get("profile")))
+        if error:
+            return error
+        return {"project_id": project_id, "status": "resumed"}
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 
 @app.get("/api/status")
-async def get_status():
-    """Get current generation status"""
+async def get_status(request: Request):
+    """Get current generation status (304 when unchanged since the client's ETag)"""
     global builder
 
     if not builder:
-        return {"status": "idle"}
+        # Generation may be running on another worker
+        status = shared_state.get("generation", "latest") or {"status": "idle"}
+    else:
+        status = {
+            "status": builder.status,
+            "generated_assets": len(builder.generated_assets),
+            "total_assets": builder.total_assets,
+            "error": builder.error,
+        }
+
+    etag = f'"{hashlib.sha256(json.dumps(status, sort_keys=True).encode()).hexdigest()[:16]}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=status, headers=headers)
+
+
+@app.get("/api/storage")
+async def get_storage_report(limit: int = 50):
+    """Disk usage, content hashes and reference counts of managed media files
+
+    ``contents`` lists the largest distinct contents (up to ``limit``) with
+    every path holding them and how many projects/configs reference them.
+    """
+    try:
+        report = await asyncio.to_thread(storage_manager.inventory)
+        report["contents"] = report["contents"][:max(0, limit)]
+        return report
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+@app.post("/api/storage/gc")
+async def collect_storage(dry_run: bool = False):
+    """Run a storage pass now: sweep orphans, dedupe, then enforce render quotas"""
+    lease = Lease(shared_state, "storage-gc", ttl=60)
+    if not await lease.acquire():
+        return JSONResponse(status_code=409, content={"error": "Storage collection already running"})
+    try:
+        return await asyncio.to_thread(storage_manager.collect, dry_run)
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
+    finally:
+        await lease.release()
+
+
+@app.get("/api/debug/loop")
+async def get_loop_diagnostics(limit: int = 50):
+    """Event-loop lag and recorded stalls with stacks, ranked by endpoint, project and call site"""
+    if not loop_monitor:
+        return {"enabled": False, "hint": "Set LOOP_MONITOR=1 to record event-loop stalls"}
+    return loop_monitor.report(limit=max(1, min(limit, 200)))
 
-    return {
-        "status": builder.status,
-        "generated_assets": len(builder.generated_assets),
-        "total_assets": builder.total_assets,
-        "error": builder.error,
-    }
+
+@app.get("/api/debug/loop/metrics")
+async def get_loop_metrics():
+    """Event-loop lag and stall counters in Prometheus text format"""
+    if not loop_monitor:
+        return PlainTextResponse("", status_code=404)
+    return PlainTextResponse(loop_monitor.prometheus(), media_type="text/plain; version=0.0.4")
 
 
 @app.get("/api/assets")
-async def list_assets():
-    """List all generated assets"""
+async def list_assets(offset: int = 0, limit: int = 200):
+    """List shared assets from the write-time index"""
     assets_dir = public_dir / "assets"
     if not assets_dir.exists():
-        return {"assets": []}
+        return {"assets": [], "total": 0}
 
+    index = AssetIndex.for_directory(assets_dir)
     assets = []
-    for file in assets_dir.glob("*.png"):
-        assets.append({"name": file.name, "path": f"/public/assets/{file.name}"})
+    for entry in index.entries(offset=max(0, offset), limit=max(1, min(limit, 1000))):
+        asset = describe_asset(assets_dir / entry["name"], "/api/assets", entry["sha256"])
+        asset["path"] = f"/public/assets/{entry['name']}"
+        assets.append(asset)
+
+    return {"assets": assets, "total": len(index)}
+
+
+def _safe_child(directory: Path, name: str) -> Optional[Path]:
+    """Resolve a bare file name inside ``directory``, rejecting path traversal"""
+    if not name or Path(name).name != name:
+        return None
+    return directory / name
 
-    return {"assets": assets}
+
+@app.get("/api/assets/{digest}/{name}")
+async def get_asset(request: Request, digest: str, name: str, variant: Optional[str] = None, w: int = 256):
+    """Serve a shared asset by content hash (immutable), optionally as a WebP thumbnail"""
+    path = _safe_child(public_dir / "assets", name)
+    if path is None:
+        return JSONResponse(status_code=400, content={"error": "Invalid asset name"})
+    return await serve_hashed_asset(request, path, digest, "/api/assets", variant, w)
+
+
+@app.get("/api/projects/{project_id}/assets")
+async def list_project_assets(project_id: str, offset: int = 0, limit: int = 200):
+    """List a project's generated assets with content-hashed and thumbnail URLs"""
+    if not project_manager.get_project(project_id):
+        return JSONResponse(status_code=404, content={"error": "Project not found"})
+
+    assets_dir = project_manager.get_project_dir(project_id) / "assets"
+    prefix = f"/api/projects/{project_id}/assets"
+    index = AssetIndex.for_directory(assets_dir)
+    assets = []
+    for entry in index.entries(offset=max(0, offset), limit=max(1, min(limit, 1000))):
+        asset = describe_asset(assets_dir / entry["name"], prefix, entry["sha256"])
+        asset["path"] = asset["url"]
+        assets.append(asset)
+    return {"assets": assets, "total": len(index)}
+
+
+@app.get("/api/projects/{project_id}/assets/{digest}/{name}")
+async def get_project_asset(request: Request, project_id: str, digest: str, name: str,
+                            variant: Optional[str] = None, w: int = 256):
+    """Serve a project asset by content hash (immutable), optionally as a WebP thumbnail"""
+    if not project_manager.get_project(project_id):
+        return JSONResponse(status_code=404, content={"error": "Project not found"})
+    path = _safe_child(project_manager.get_project_dir(project_id) / "assets", name)
+    if path is None:
+        return JSONResponse(status_code=400, content={"error": "Invalid asset name"})
+    return await serve_hashed_asset(request, path, digest, f"/api/projects/{project_id}/assets", variant, w)
 
 
 @app.websocket("/ws")
@@ -387,16 +1259,38 @@ async def get_project_render_config(project_id: str):
 
 
 @app.post("/api/projects/{project_id}/render-video")
-async def render_project_video(project_id: str):
-    """Render video using Remotion for a specific project"""
+async def render_project_video(http_request: Request, project_id: str, request: Optional[RenderRequest] = None):
+    """Render video using Remotion for a specific project
+
+    ``mode="draft"`` renders a fast low-resolution preview (scaled, fewer
+    frames, fast encoder preset) that is cached per script and settings under
+    the project's output/drafts directory, separate from the final render.
+    An ``X-Profile: 1`` header (or ``?profile=1``) records a sampling profile
+    of the render into the project's profiles directory.
+    """
+    request = request or RenderRequest()
+    if request.mode not in ("final", "draft"):
+        return JSONResponse(status_code=400, content={"error": "mode must be 'final' or 'draft'"})
+    is_draft = request.mode == "draft"
+    draft_settings = None
+    if is_draft:
+        draft_settings = request.dict(exclude={"mode", "engine"})
+        validation = validate_draft_settings(draft_settings)
+        if not validation["valid"]:
+            return JSONResponse(status_code=400, content={"error": "Invalid draft settings", "details": validation["errors"]})
+    engine = request.engine or RENDER_ENGINE
+    if engine in ("python", "auto") and not PYTHON_ENGINE_ENABLED:
+        return JSONResponse(status_code=400, content={"error": "The python render engine is experimental; enable it with PYTHON_RENDER_ENGINE=1"})
+    if engine not in RENDER_ENGINES:
+        return JSONResponse(status_code=400, content={"error": f"engine must be one of {', '.join(RENDER_ENGINES)}"})
+
     try:
         project = project_manager.get_project(project_id)
         if not project:
             return JSONResponse(status_code=404, content={"error": "Project not found"})
         
-        # Update project status
-        project_manager.update_project_status(project_id, "rendering")
-        
+        # Drafts are previews and leave the project status alone; finals are
+        # marked "rendering" once the queue starts them
         # Load final config from project directory
         config_path = project_manager.get_project_dir(project_id) / "final_render.json"
         if not config_path.exists():
@@ -446,27 +1340,20 @@ async def render_project_video(project_id: str):
                     )
 
 
-        await manager.broadcast({"type": "log", "message": "🎬 Starting video rendering..."})
-
-        # Create output and public audio directories
         project_root = Path(__file__).parent.parent
-        output_dir = project_root / "remotion" / "out"
-        output_dir.mkdir(parents=True, exist_ok=True)
-        output_file = output_dir / "video.mp4"
-        
+
         # Ensure public/audio directory exists in remotion
         remotion_audio_dir = project_root / "remotion" / "public" / "audio"
         remotion_audio_dir.mkdir(parents=True, exist_ok=True)
         
         # Copy audio file to remotion public directory if exists
-        project_dir = project_manager.get_project_dir(project_id)
+        project_dir = project_manager.get_project_dir(project_id).resolve()
         audio_dest = None
         if final_config.get("audio_path"):
             audio_src = Path(final_config["audio_path"])
             if audio_src.exists():
-                import shutil
                 audio_dest = remotion_audio_dir / audio_src.name
-                shutil.copy2(audio_src, audio_dest)
+                link_file(audio_src, audio_dest)
                 await manager.broadcast({"type": "log", "message": f"Copied audio file to {audio_dest}"})
                 
                 # Update audio_path in final_config to be relative for Remotion
@@ -477,13 +1364,19 @@ async def render_project_video(project_id: str):
         else:
             await manager.broadcast({"type": "log", "message": "No audio file specified"})
 
-        # Calculate audio duration and set video length accordingly
-        if audio_dest and audio_dest.exists():
+        # Calculate audio duration and set video length accordingly; the
+        # upload-time analysis already knows it, so avoid decoding again
+        fps = (final_config.get("project_settings") or {}).get("fps", 30)
+        analysis = AudioAnalysis.load(project_dir / "analysis")
+        if analysis:
+            duration_frames = math.ceil(analysis.duration * fps)
+            await manager.broadcast({"type": "log", "message": f"Audio duration: {analysis.duration:.2f}s ({duration_frames} frames at {fps}fps, from analysis)"})
+        elif audio_dest and audio_dest.exists():
             try:
-                import librosa
+                librosa = lazy.get("librosa")
                 audio_duration = librosa.get_duration(path=str(audio_dest))
-                duration_frames = int(audio_duration * 30)  # 30 fps
-                await manager.broadcast({"type": "log", "message": f"Audio duration: {audio_duration:.2f}s ({duration_frames} frames at 30fps)"})
+                duration_frames = math.ceil(audio_duration * fps)
+                await manager.broadcast({"type": "log", "message": f"Audio duration: {audio_duration:.2f}s ({duration_frames} frames at {fps}fps)"})
             except ImportError:
                 await manager.broadcast({"type": "log", "message": "Warning: librosa not installed, using default duration"})
                 duration_frames = 540  # 18 seconds default
@@ -494,84 +1387,490 @@ async def render_project_video(project_id: str):
             await manager.broadcast({"type": "log", "message": "No audio file available, using default duration"})
             duration_frames = 540  # 18 seconds default
 
-        # Save config to file for Remotion
-        props_file = project_root / "remotion" / "props.json"
-        with open(props_file, "w") as f:
-            json.dump(final_config, f)
-
-        # Run Remotion render command with calculated duration
-        npm_cmd = "npm.cmd" if os.name == "nt" else "npm"
-        cmd = [
-            npm_cmd,
-            "run",
-            "render",
-            "--",
-            "--props",
-            str(props_file),
-            "--frames",
-            f"0-{duration_frames-1}",
-        ]
-
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            cwd=str(project_root / "remotion"),
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
+        # Finals render beside the project's last good video and swap in on
+        # success; their props and output are named per job (see run_render)
+        props_file = None
+        output_file = None
+        result_file = None
+        extra_args = []
+        engine, reasons = _choose_engine(engine, final_config, draft_settings)
+        if reasons and request.engine == "python":
+            return JSONResponse(status_code=400, content={
+                "error": "The python render engine cannot render this project", "details": reasons,
+            })
+        if reasons:
+            await manager.broadcast({"type": "log", "message": f"Rendering with Remotion: {'; '.join(reasons)}"})
+        if is_draft:
+            final_config, duration_frames = apply_frame_stride(
+                final_config, duration_frames, draft_settings["frame_stride"]
+            )
+            draft_key = await asyncio.to_thread(
+                lambda: draft_cache_key(final_config, duration_frames, {**draft_settings, "engine": engine}, code_version())
+            )
+            drafts_dir = project_dir / "output" / "drafts"
+            output_file = drafts_dir / f"{draft_key}.{draft_extension(draft_settings)}"
+            result_file = output_file
+            if draft_settings["format"] == "contact_sheet":
+                result_file = drafts_dir / f"{draft_key}.png"
+            if result_file.exists():
+                touch(result_file)
+                await manager.broadcast({"type": "log", "message": f"♻️ Draft {draft_key} unchanged, reusing cached preview"})
+                return {
+                    "status": "success",
+                    "mode": "draft",
+                    "cached": True,
+                    "video_path": f"/api/projects/{project_id}/drafts/{result_file.name}",
+                    "file_size": result_file.stat().st_size,
+                }
+            drafts_dir.mkdir(parents=True, exist_ok=True)
+            props_file = drafts_dir / f"{draft_key}.props.json"
+            extra_args = draft_cli_args(draft_settings)
+
+        props = {"videoData": final_config, "durationInFrames": duration_frames}
+        if is_draft:
+            await asyncio.to_thread(atomic_write_json, props_file, props, False, False)
+
+        async def log_render(message: str):
+            await manager.broadcast({"type": "log", "message": message})
+
+        previous_status = project.get("status")
+        profile = _profiling_requested(http_request, project)
+
+        async def run_render(job: RenderJob) -> dict:
+            job_props, job_output = props_file, output_file
+            if not is_draft:
+                # Props and output named by job: two finals of one project
+                # (queued together or running at once) never share a file
+                job_props = project_dir / "output" / f"render_props.{job.id}.json"
+                job_output = project_dir / "output" / f"video.{job.id}.rendering.mp4"
+                await asyncio.to_thread(atomic_write_json, job_props, props, False, False)
+                project_manager.update_project_status(project_id, "rendering")
+            try:
+                async with profiled(profile, project_dir, f"render-{request.mode}",
+                                    _record_profile(project_id, f"render-{request.mode}")):
+                    return await _run_render_job(
+                        job, project_id, project_dir, job_props, job_output, duration_frames,
+                        extra_args, draft_settings, result_file, log_render,
+                        engine=engine, final_config=final_config, audio_file=audio_dest,
+                    )
+            except BaseException as e:
+                if not is_draft:
+                    job_output.unlink(missing_ok=True)
+                    reason = "Render cancelled" if isinstance(e, asyncio.CancelledError) else f"Render failed: {e}"
+                    project_manager.update_project_status(project_id, previous_status, error=reason)
+                await manager.broadcast({"type": "log", "message": f"❌ {job.lane.capitalize()} render {job.id}: {e or 'cancelled'}"})
+                raise
+            finally:
+                if not is_draft:
+                    job_props.unlink(missing_ok=True)
+
+        job = render_queue.submit(
+            project_id, request.mode, run_render,
+            description=f"{request.mode} render of {project_id}",
         )
+        position = render_queue.position(job)
+        await manager.broadcast({"type": "log", "message": f"🕒 Queued {request.mode} render {job.id} (position {position})"})
+        return JSONResponse(status_code=202, content={
+            "status": "queued",
+            "job_id": job.id,
+            "lane": job.lane,
+            "position": position,
+            "status_url": f"/api/render-jobs/{job.id}",
+        })
+
+    except Exception as e:
+        await manager.broadcast({"type": "log", "message": f"❌ Error: {str(e)}"})
+        return JSONResponse(status_code=500, content={"error": str(e)})
 
-        # Stream output to WebSocket
-        while True:
-            line = await process.stdout.readline()
-            if not line:
-                break
-            message = line.decode().strip()
-            if message:
-                await manager.broadcast({"type": "log", "message": f"[Remotion] {message}"})
-
-        await process.wait()
-
-        if process.returncode != 0:
-            error = await process.stderr.read()
-            error_msg = error.decode()
-            await manager.broadcast(
-                {"type": "log", "message": f"❌ Render failed: {error_msg}"}
-            )
-            return JSONResponse(status_code=500, content={"error": error_msg})
 
-        if output_file.exists():
-            await manager.broadcast(
-                {"type": "log", "message": "✓ Video rendered successfully!"}
+async def _run_render_job(job: RenderJob, project_id: str, project_dir: Path, props_file: Path,
+                          output_file: Path, total_frames: int, extra_args: list,
+                          draft_settings: Optional[dict], result_file: Optional[Path], log_render,
+                          engine: str = "remotion", final_config: Optional[dict] = None,
+                          audio_file: Optional[Path] = None) -> dict:
+    """Render one queued job with the chosen engine and return its result payload"""
+    is_draft = draft_settings is not None
+    await log_render(f"🎬 Starting {job.lane} render {job.id} ({engine})...")
+
+    # Progress is sent as structured events (throttled) rather than as log lines
+    tracker = ProgressTracker(total_frames)
+    last_sent = 0.0
+
+    async def report(event: dict):
+        nonlocal last_sent
+        stage_changed = tracker.update(event)
+        now = time.perf_counter()
+        if stage_changed or now - last_sent >= PROGRESS_INTERVAL:
+            last_sent = now
+            snapshot = tracker.snapshot()
+            job.set_progress(snapshot)
+            await manager.broadcast({"type": "render_progress", "job_id": job.id, "project_id": project_id, **snapshot})
+
+    try:
+        if engine == "python":
+            timings = await _render_with_compositor(
+                job, final_config, total_frames, output_file, audio_file, draft_settings, report
             )
-            return {
-                "status": "success",
-                "video_path": "/api/download-video",
-                "file_size": output_file.stat().st_size,
-            }
         else:
-            return JSONResponse(
-                status_code=500, content={"error": "Video file not created"}
+            timings = await _render_with_remotion(job, props_file, output_file, extra_args, log_render, report)
+    except RenderError:
+        tracker.finish("failed")
+        job.set_progress(tracker.snapshot())
+        raise
+
+    tracker.finish()
+    progress = tracker.snapshot()
+    job.set_progress(progress)
+    render_seconds = timings["render_seconds"]
+    timings = {"engine": engine, **timings, "fps": progress["fps"]}
+    record_render_metrics({
+        "job_id": job.id,
+        "project_id": project_id,
+        "lane": job.lane,
+        "frames": progress["frames_rendered"] or total_frames,
+        "scale": draft_settings["scale"] if is_draft else 1,
+        "encode_seconds": progress["encode_seconds"],
+        **timings,
+    })
+    if is_draft:
+        if draft_settings["format"] == "contact_sheet":
+            await asyncio.to_thread(
+                build_contact_sheet, output_file, result_file, draft_settings["contact_sheet_columns"]
             )
+            output_file.unlink()
+        props_file.unlink(missing_ok=True)
+        await log_render(f"✓ Draft rendered in {render_seconds:.1f}s")
+        return {
+            "status": "success",
+            "mode": "draft",
+            "cached": False,
+            "video_path": f"/api/projects/{project_id}/drafts/{result_file.name}",
+            "file_size": result_file.stat().st_size,
+            **timings,
+        }
 
-    except Exception as e:
-        await manager.broadcast({"type": "log", "message": f"❌ Error: {str(e)}"})
-        return JSONResponse(status_code=500, content={"error": str(e)})
+    video_file = project_dir / "output" / "video.mp4"
+    video_path = f"/api/projects/{project_id}/video"
+    if _published_finals.get(project_id, 0.0) > job.created_at:
+        # A final submitted after this one already replaced the video; it wins
+        output_file.unlink(missing_ok=True)
+        await log_render(f"✓ Render {job.id} finished after a newer final; keeping the newer video")
+        return {"status": "success", "mode": "final", "superseded": True, "video_path": video_path, **timings}
+    os.replace(output_file, video_file)
+    _published_finals[project_id] = job.created_at
+    await asyncio.to_thread(_publish_latest_video, video_file)
+    project_manager.update_project_status(project_id, "completed", video_path=video_path)
+    await log_render(f"✓ Video rendered successfully in {render_seconds:.1f}s!")
+    return {
+        "status": "success",
+        "mode": "final",
+        "video_path": video_path,
+        "file_size": video_file.stat().st_size,
+        **timings,
+    }
+
+
+async def _render_with_remotion(job: RenderJob, props_file: Path, output_file: Path, extra_args: list,
+                                log_render, report) -> dict:
+    """Render with the Remotion CLI (headless Chrome)"""
+    # Reuse the webpack bundle for this code version instead of re-bundling; it is
+    # kept until the render finishes even if newer code is bundled meanwhile
+    async with use_bundle(log_render) as (bundle_dir, bundle_seconds, bundle_reused):
+        return await _run_remotion(job, bundle_dir, props_file, output_file, extra_args, report, {
+            "bundle_reused": bundle_reused,
+            "bundle_seconds": round(bundle_seconds, 2),
+        })
+
+
+async def _run_remotion(job: RenderJob, bundle_dir: Optional[Path], props_file: Path, output_file: Path,
+                        extra_args: list, report, timings: dict) -> dict:
+    """Run the Remotion CLI against ``bundle_dir`` (the entry point when bundling failed)"""
+    render_start = time.perf_counter()
+    cmd = [
+        npm_command(),
+        "run",
+        "render-bundle",
+        "--",
+        str(bundle_dir) if bundle_dir else ENTRY_POINT,
+        "MainComposition",
+        str(output_file),
+        "--props",
+        str(props_file),
+        *extra_args,
+    ]
+
+    process = await job.spawn(
+        *cmd,
+        cwd=str(Path(__file__).parent.parent / "remotion"),
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+
+    # Progress is parsed from both streams
+    async def on_output(line: str, forward: bool = True):
+        event = parse_progress_line(line)
+        if event:
+            await report(event)
+        elif forward:
+            await manager.broadcast({"type": "log", "message": f"[Remotion] {line}"})
+
+    async def on_stderr(line: str):
+        # Chrome/ffmpeg chatter stays out of the log console; its tail is kept for errors
+        await on_output(line, forward=False)
+
+    stderr_tail = await drain_process(process, on_output, on_stderr)
+
+    if process.returncode != 0:
+        raise RenderError("\n".join(stderr_tail) or f"Remotion exited with code {process.returncode}")
+    if not output_file.exists():
+        raise RenderError("Video file not created")
+    return {"render_seconds": round(time.perf_counter() - render_start, 2), **timings}
+
+
+async def _render_with_compositor(job: RenderJob, final_config: dict, total_frames: int, output_file: Path,
+                                  audio_file: Optional[Path], draft_settings: Optional[dict], report) -> dict:
+    """Render with the NumPy compositor, piping frames straight into ffmpeg"""
+    render_start = time.perf_counter()
+    scale = draft_settings["scale"] if draft_settings else 1
+    # Decoding and resizing the assets is CPU work; keep it off the event loop
+    compositor = await asyncio.to_thread(Compositor, final_config, total_frames, scale)
+    setup_seconds = time.perf_counter() - render_start
+
+    async def on_progress(done: int, total: int):
+        await report({"stage": "rendering", "done": done, "total": total})
+
+    await render_video(compositor, output_file, audio_file, job.spawn, on_progress, draft_settings)
+    return {
+        "render_seconds": round(time.perf_counter() - render_start, 2),
+        "setup_seconds": round(setup_seconds, 2),
+        "reused_frames": compositor.reused_frames,
+    }
+
+
+# Submission time of the final render each project's video.mp4 came from
+_published_finals: Dict[str, float] = {}
+
+
+def _publish_latest_video(video_file: Path):
+    """Expose the newest final render at /api/download-video (hard link where possible)"""
+    link_file(video_file, Path(__file__).parent.parent / "remotion" / "out" / "video.mp4")
+
+
+@app.get("/api/render-jobs")
+async def list_render_jobs(project_id: Optional[str] = None):
+    """Render jobs (newest first) plus queue occupancy and admission state"""
+    return {
+        "jobs": render_queue.list(project_id),
+        "queue": render_queue.stats(),
+        "throughput": render_fps_summary(),
+    }
+
+
+@app.get("/api/render-jobs/{job_id}")
+async def get_render_job(job_id: str):
+    """Poll a render job's status; ``result`` holds the video path once it succeeds"""
+    job = render_queue.get(job_id)
+    if not job:
+        return JSONResponse(status_code=404, content={"error": "Render job not found"})
+    return job.to_dict(render_queue.position(job))
+
+
+@app.get("/api/render-jobs/{job_id}/progress")
+async def get_render_job_progress(job_id: str):
+    """Structured progress of a render: stage, frames, encoding %, fps and ETA"""
+    job = render_queue.get(job_id)
+    if not job:
+        return JSONResponse(status_code=404, content={"error": "Render job not found"})
+    return {"job_id": job.id, "status": job.status, "position": render_queue.position(job), **job.progress}
+
+
+@app.websocket("/ws/render-jobs/{job_id}")
+async def render_job_websocket(websocket: WebSocket, job_id: str):
+    """Push one job's progress and status events; closes when the job finishes"""
+    job = render_queue.get(job_id)
+    await websocket.accept()
+    if not job:
+        await websocket.send_json({"type": "error", "error": "Render job not found"})
+        await websocket.close()
+        return
+
+    events = job.subscribe()
+    try:
+        await websocket.send_json({"type": "render_status", **job.to_dict(render_queue.position(job))})
+        while job.status not in FINISHED or not events.empty():
+            try:
+                event = await asyncio.wait_for(events.get(), timeout=1.0)
+            except asyncio.TimeoutError:
+                continue
+            await websocket.send_json(event)
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        job.unsubscribe(events)
+
+
+@app.post("/api/render-jobs/{job_id}/cancel")
+async def cancel_render_job(job_id: str):
+    """Cancel a queued or running render, killing its Remotion/Chrome processes"""
+    job = render_queue.get(job_id)
+    if not job:
+        return JSONResponse(status_code=404, content={"error": "Render job not found"})
+    if not render_queue.cancel(job_id):
+        return JSONResponse(status_code=409, content={"error": f"Render job already {job.status}"})
+    await manager.broadcast({"type": "log", "message": f"🛑 Cancelled render {job_id}"})
+    return job.to_dict()
+
+
+@app.get("/api/projects/{project_id}/video")
+async def get_project_video(request: Request, project_id: str):
+    """Stream a project's latest final render (Range and ETag aware)"""
+    if not project_manager.get_project(project_id):
+        return JSONResponse(status_code=404, content={"error": "Project not found"})
+
+    video_path = project_manager.get_project_dir(project_id) / "output" / "video.mp4"
+    if not video_path.exists():
+        return JSONResponse(status_code=404, content={"error": "Video not found"})
+    touch(video_path)
+
+    return RangedFileResponse(
+        video_path,
+        request.headers,
+        method=request.method,
+        media_type="video/mp4",
+        filename=f"{project_id}.mp4",
+    )
 
 
 @app.get("/api/download-video")
-async def download_video():
-    """Download rendered video"""
+async def download_video(request: Request):
+    """Download rendered video (supports Range requests for seeking and ETag revalidation)"""
     project_root = Path(__file__).parent.parent
     video_path = project_root / "remotion" / "out" / "video.mp4"
     if not video_path.exists():
         return JSONResponse(status_code=404, content={"error": "Video not found"})
+    touch(video_path)
 
-    return FileResponse(
-        path=video_path,
-        filename="video.mp4",
+    return RangedFileResponse(
+        video_path,
+        request.headers,
+        method=request.method,
         media_type="video/mp4",
+        filename="video.mp4",
     )
 
 
+@app.get("/api/projects/{project_id}/stills")
+async def get_project_stills(project_id: str, scene_ids: Optional[str] = None):
+    """Midpoint still per scene as a small WebP; only changed scenes are rendered
+
+    ``scene_ids`` is an optional comma-separated list to limit the scenes.
+    """
+    try:
+        if not project_manager.get_project(project_id):
+            return JSONResponse(status_code=404, content={"error": "Project not found"})
+
+        config_path = project_manager.get_project_dir(project_id) / "final_render.json"
+        if not config_path.exists():
+            return JSONResponse(status_code=400, content={"error": "No render config available"})
+
+        with open(config_path, "r") as f:
+            final_config = json.load(f)
+
+        async def log_stills(message: str):
+            await manager.broadcast({"type": "log", "message": message})
+
+        wanted = [s.strip() for s in scene_ids.split(",") if s.strip()] if scene_ids else None
+        stills = await asyncio.to_thread(plan_scene_stills, final_config, wanted)
+        if not all(still["cached"] for still in stills):
+            # Stills launch Chrome too, so they go through the render queue's draft lane
+            job = render_queue.submit(
+                project_id, "draft",
+                lambda job: render_missing_stills(final_config, stills, log_stills, job.spawn, job.browsers),
+                description=f"scene stills of {project_id}",
+                browsers=still_browsers(stills, render_queue.max_concurrent),
+            )
+            await job.wait()
+            if job.status != SUCCEEDED:
+                return JSONResponse(status_code=500, content={"error": job.error or f"Stills job {job.status}"})
+        for still in stills:
+            if "error" not in still:
+                still["url"] = f"/api/projects/{project_id}/stills/{still['hash']}.webp"
+        return {"project_id": project_id, "stills": stills}
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+@app.get("/api/projects/{project_id}/stills/{name}")
+async def get_project_still(request: Request, project_id: str, name: str):
+    """Serve a cached scene still; names are scene hashes, so they are immutable"""
+    digest, _, ext = name.partition(".")
+    if ext != "webp" or not digest.isalnum():
+        return JSONResponse(status_code=404, content={"error": "Still not found"})
+
+    path = still_path(digest)
+    if not path.is_file():
+        return JSONResponse(status_code=404, content={"error": "Still not found"})
+    touch(path)
+
+    return RangedFileResponse(path, request.headers, method=request.method, media_type="image/webp", cache_control=IMMUTABLE)
+
+
+@app.post("/api/projects/{project_id}/profiling")
+async def set_project_profiling(project_id: str, enabled: bool = True):
+    """Profile every generation and render of a project until turned off"""
+    if not project_manager.get_project(project_id):
+        return JSONResponse(status_code=404, content={"error": "Project not found"})
+    project_manager.update_project(project_id, {"profile": enabled})
+    return {"project_id": project_id, "profile": enabled}
+
+
+@app.get("/api/projects/{project_id}/profiles")
+async def list_project_profiles(project_id: str):
+    """Speedscope profiles recorded for a project, newest first"""
+    project = project_manager.get_project(project_id)
+    if not project:
+        return JSONResponse(status_code=404, content={"error": "Project not found"})
+    directory = profile_dir(project_manager.get_project_dir(project_id))
+    files = sorted(directory.glob("*.speedscope.json"), key=lambda p: p.stat().st_mtime, reverse=True) if directory.is_dir() else []
+    return {
+        "project_id": project_id,
+        "profile": bool(project.get("profile")),
+        "profiles": [{
+            "name": path.name,
+            "size": path.stat().st_size,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(path.stat().st_mtime)),
+            "url": f"/api/projects/{project_id}/profiles/{path.name}",
+        } for path in files],
+    }
+
+
+@app.get("/api/projects/{project_id}/profiles/{name}")
+async def get_project_profile(request: Request, project_id: str, name: str):
+    """Download a recorded profile; open it at https://www.speedscope.app"""
+    if not project_manager.get_project(project_id):
+        return JSONResponse(status_code=404, content={"error": "Project not found"})
+    path = _safe_child(profile_dir(project_manager.get_project_dir(project_id)), name)
+    if not path or not path.is_file() or not name.endswith(".speedscope.json"):
+        return JSONResponse(status_code=404, content={"error": "Profile not found"})
+    return RangedFileResponse(path, request.headers, method=request.method, media_type="application/json", filename=name)
+
+
+@app.get("/api/projects/{project_id}/drafts/{name}")
+async def get_project_draft(request: Request, project_id: str, name: str):
+    """Serve a cached draft render (preview video, GIF or contact sheet)"""
+    if not project_manager.get_project(project_id):
+        return JSONResponse(status_code=404, content={"error": "Project not found"})
+
+    draft_path = _safe_child(project_manager.get_project_dir(project_id) / "output" / "drafts", name)
+    if not draft_path or not draft_path.is_file() or name.endswith(".props.json"):
+        return JSONResponse(status_code=404, content={"error": "Draft not found"})
+    touch(draft_path)
+
+    # Draft names are content keys, so the bytes behind a URL never change
+    return RangedFileResponse(draft_path, request.headers, method=request.method, cache_control=IMMUTABLE)
+
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=7860)
 
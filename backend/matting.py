@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import io
+import os
+from typing import TYPE_CHECKING, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+from lazy_imports import lazy
+
+# Matting quality tiers, best first:
+#   full - rembg's default model on the full image (rembg.remove)
+#   fast - same model on a reduced copy, mask upsampled with an edge-aware refine
+#   lite - as fast, with a small model (u2netp/silueta) or an int8-quantized graph
+TIERS = ("full", "fast", "lite")
+# Per-role defaults; props may opt into fast/lite once benchmarks/matting.py shows
+# the mask quality holds on real assets
+ROLE_TIERS = {
+    "avatar": os.getenv("MATTING_TIER_AVATAR", "full"),
+    "prop": os.getenv("MATTING_TIER_PROP", "full"),
+}
+# Long side of the copy the fast tiers segment (u2net-class models infer at 320x320)
+FAST_SIZE = int(os.getenv("MATTING_FAST_SIZE", "320"))
+# Guided filter window radius (in reduced-image pixels) and regularization
+REFINE_RADIUS = int(os.getenv("MATTING_REFINE_RADIUS", "1"))
+REFINE_EPS = float(os.getenv("MATTING_REFINE_EPS", "1e-3"))
+
+# Roles tried with the model-free flat-background key before any model runs
+KEY_ROLES = {r.strip() for r in os.getenv("MATTING_CHROMA_KEY", "prop").split(",") if r.strip()}
+# Distance (largest channel difference) from the border colour that is certainly background, and the band
+# (pixels) around it where edge pixels get fractional alpha
+KEY_TOLERANCE = float(os.getenv("MATTING_KEY_TOLERANCE", "12"))
+KEY_EDGE_RADIUS = 2
+# Confidence: share of border pixels on the background colour, foreground share of
+# the image, and share of edge pixels whose object colour is barely off the background
+KEY_MIN_BORDER = 0.9
+KEY_MIN_COVERAGE = 0.01
+KEY_MAX_COVERAGE = 0.95
+KEY_MIN_CONTRAST = 48
+KEY_MAX_LOW_CONTRAST = float(os.getenv("MATTING_KEY_MAX_LOW_CONTRAST", "0.1"))
+
+
+def tier_for(role: str, project_settings: Optional[dict] = None) -> str:
+    """Tier for a role: ``project_settings.matting`` (a tier or {role: tier}) beats the env defaults"""
+    choice = (project_settings or {}).get("matting")
+    if isinstance(choice, dict):
+        choice = choice.get(role)
+    tier = choice or ROLE_TIERS.get(role, "full")
+    return tier if tier in TIERS else "full"
+
+
+def _box(x: np.ndarray, r: int) -> np.ndarray:
+    """Mean over a (2r+1)^2 window per pixel, windows clipped at the borders"""
+    np = lazy.get("numpy")
+    h, w = x.shape
+    integral = np.pad(x.astype(np.float64), ((1, 0), (1, 0))).cumsum(0).cumsum(1)
+    y0 = np.clip(np.arange(h) - r, 0, h)
+    y1 = np.clip(np.arange(h) + r + 1, 0, h)
+    x0 = np.clip(np.arange(w) - r, 0, w)
+    x1 = np.clip(np.arange(w) + r + 1, 0, w)
+    total = (integral[y1][:, x1] - integral[y0][:, x1]
+             - integral[y1][:, x0] + integral[y0][:, x0])
+    return total / ((y1 - y0)[:, None] * (x1 - x0)[None, :])
+
+
+def guided_upsample(image: np.ndarray, small: np.ndarray, mask: np.ndarray,
+                    radius: int = REFINE_RADIUS, eps: float = REFINE_EPS) -> np.ndarray:
+    """Upsample a low-resolution mask to ``image``'s size, snapping its edges to the image's
+
+    Fast guided filter (He & Sun, 2015) on luminance: the local linear model
+    ``mask ~ a * gray + b`` is fitted on the reduced image and its smoothed
+    coefficients are applied to the full-resolution pixels, so the edge follows
+    the real object boundary rather than a blurred 320px mask. Only the
+    uncertain band of the bilinear upsample is replaced; solid interior and
+    background keep the model's answer, so shading inside a prop never leaks
+    into its alpha. ``image``/``small`` are uint8 RGB, ``mask`` is uint8.
+    """
+    np = lazy.get("numpy")
+    Image = lazy.get("PIL.Image")
+    guide = small.astype(np.float32).mean(-1) / 255
+    p = mask.astype(np.float32) / 255
+
+    mean_i = _box(guide, radius)
+    mean_p = _box(p, radius)
+    cov_ip = _box(guide * p, radius) - mean_i * mean_p
+    var_i = _box(guide * guide, radius) - mean_i * mean_i
+    a = cov_ip / (var_i + eps)
+    b = mean_p - a * mean_i
+
+    height, width = image.shape[:2]
+
+    def up(channel: np.ndarray) -> np.ndarray:
+        resized = Image.fromarray(channel.astype(np.float32), mode="F").resize((width, height), Image.BILINEAR)
+        return np.asarray(resized)
+
+    alpha = up(p).copy()
+    band = (alpha > 0.02) & (alpha < 0.98)
+    gray = image[band].astype(np.float32).mean(-1) / 255
+    alpha[band] = up(_box(a, radius))[band] * gray + up(_box(b, radius))[band]
+    return (np.clip(alpha, 0, 1) * 255 + 0.5).astype(np.uint8)
+
+
+def _run_labels(candidate: np.ndarray) -> np.ndarray:
+    """Label each row's runs of ``candidate`` pixels by 1 + the flat index of their first pixel"""
+    np = lazy.get("numpy")
+    starts = candidate.copy()
+    starts[:, 1:] &= ~candidate[:, :-1]
+    index = np.arange(1, candidate.size + 1, dtype=np.int32).reshape(candidate.shape)
+    # Later runs start at larger indices, so a running maximum carries each run's label
+    return np.maximum.accumulate(np.where(starts, index, 0), axis=1) * candidate
+
+
+def border_fill(candidate: np.ndarray) -> np.ndarray:
+    """Pixels of ``candidate`` connected (4-neighbourhood) to the image border
+
+    Alternates row and column passes that spread reachability along whole runs
+    of candidate pixels at once; a background needs one pass per turn its
+    shape takes, so this converges in a handful of vectorized passes.
+    """
+    np = lazy.get("numpy")
+    rows = _run_labels(candidate)
+    # Column runs labelled on the transpose (row-wise scans are much faster)
+    columns = np.ascontiguousarray(_run_labels(np.ascontiguousarray(candidate.T)).T)
+    reached = np.zeros_like(candidate)
+    reached[[0, -1]] = candidate[[0, -1]]
+    reached[:, [0, -1]] = candidate[:, [0, -1]]
+    # Per direction: runs known to be reached, and the pixels already spread along them
+    hits = [np.zeros(candidate.size + 1, dtype=bool) for _ in range(2)]
+    spread = [np.zeros_like(candidate) for _ in range(2)]
+    passes = 0
+    while True:
+        for direction, labels in enumerate((rows, columns)):
+            new = reached & ~spread[direction]
+            spread[direction] = reached
+            hits[direction][labels[new]] = True
+            hits[direction][0] = False
+            grown = hits[direction][labels]
+            passes += 1
+            # Whole runs the other way were just added, so no growth here means closed both ways
+            if passes > 1 and np.count_nonzero(grown) == np.count_nonzero(reached):
+                return reached
+            reached = grown
+
+
+def _max_filter(x: np.ndarray, r: int) -> np.ndarray:
+    """Maximum over a (2r+1)^2 window (separable), edges replicated"""
+    np = lazy.get("numpy")
+    h, w = x.shape
+    padded = np.pad(x, ((r, r), (0, 0)), mode="edge")
+    x = padded[:h]
+    for offset in range(1, 2 * r + 1):
+        x = np.maximum(x, padded[offset:offset + h])
+    padded = np.pad(x, ((0, 0), (r, r)), mode="edge")
+    x = padded[:, :w]
+    for offset in range(1, 2 * r + 1):
+        x = np.maximum(x, padded[:, offset:offset + w])
+    return x
+
+
+def _distance(rgb: np.ndarray, background: np.ndarray) -> np.ndarray:
+    """Largest per-channel difference from ``background`` (uint8)
+
+    Any norm works for keying: a blend ``a*F + (1-a)*B`` sits ``a`` of the way
+    from B to F under all of them, and this one needs no float pass.
+    """
+    np = lazy.get("numpy")
+    distance = np.zeros(rgb.shape[:-1], dtype=np.uint8)
+    for c in range(3):
+        channel = rgb[..., c]
+        np.maximum(distance, np.maximum(channel, background[c]) - np.minimum(channel, background[c]), out=distance)
+    return distance
+
+
+def chroma_key(pixels: np.ndarray) -> Tuple[Optional[np.ndarray], dict]:
+    """Alpha for an object on a flat background (e.g. "white background" props), without a model
+
+    The background colour is the median of the border; pixels within
+    KEY_TOLERANCE of it that connect to the border are transparent, so
+    enclosed pale areas (a white label, an eye) stay opaque. In the
+    KEY_EDGE_RADIUS band around that region a pixel is taken to be a blend of
+    the background and the most distinct nearby colour, and its alpha is how
+    far along that blend it sits; anti-aliased edges come out soft.
+
+    Returns ``(alpha, metrics)``, or ``(None, metrics)`` when the metrics say
+    a model is needed: a busy border, almost no (or almost only) foreground,
+    or a low-contrast boundary (drop shadows, glows, pale objects).
+    """
+    np = lazy.get("numpy")
+    rgb = pixels[..., :3]
+    border = np.concatenate([rgb[:2].reshape(-1, 3), rgb[-2:].reshape(-1, 3),
+                             rgb[:, :2].reshape(-1, 3), rgb[:, -2:].reshape(-1, 3)])
+    background = np.median(border, axis=0).astype(np.uint8)
+    metrics = {"background": [int(c) for c in background]}
+
+    border_distance = _distance(border, background)
+    metrics["border_uniformity"] = round(float((border_distance <= KEY_TOLERANCE).mean()), 4)
+    if metrics["border_uniformity"] < KEY_MIN_BORDER:
+        return None, metrics
+
+    distance = _distance(rgb, background)
+    transparent = border_fill(distance <= KEY_TOLERANCE)
+    edge = _max_filter(transparent, KEY_EDGE_RADIUS) & ~transparent
+    reference = _max_filter(distance, KEY_EDGE_RADIUS)[edge]
+
+    alpha = np.ones(distance.shape, dtype=np.float32)
+    alpha[transparent] = 0
+    alpha[edge] = np.minimum(distance[edge] / np.maximum(reference, 1).astype(np.float32), 1)
+
+    metrics["coverage"] = round(float((alpha >= 0.5).mean()), 4)
+    metrics["low_contrast_edge"] = round(float((reference < KEY_MIN_CONTRAST).mean()) if reference.size else 1.0, 4)
+    if (not KEY_MIN_COVERAGE <= metrics["coverage"] <= KEY_MAX_COVERAGE
+            or metrics["low_contrast_edge"] > KEY_MAX_LOW_CONTRAST):
+        return None, metrics
+    return alpha, metrics
+
+
+def chroma_key_png(image_bytes: bytes) -> Tuple[Optional[bytes], dict]:
+    """Key a flat-background image to a transparent PNG, or ``(None, metrics)`` to fall back to a model"""
+    np = lazy.get("numpy")
+    Image = lazy.get("PIL.Image")
+    image = Image.open(io.BytesIO(image_bytes))
+    if image.mode == "RGBA" and np.asarray(image.getchannel("A")).min() < 255:
+        # Already transparent; nothing to key
+        return None, {"transparent": True}
+    pixels = np.asarray(image.convert("RGB"))
+    alpha, metrics = chroma_key(pixels)
+    if alpha is None:
+        return None, metrics
+
+    # Unmix the background from soft edge pixels so they do not leave a halo
+    rgba = np.empty(pixels.shape[:2] + (4,), dtype=np.uint8)
+    rgba[..., :3] = pixels[..., :3]
+    rgba[..., 3] = alpha * 255 + 0.5
+    soft = (alpha > 0) & (alpha < 1)
+    a = alpha[soft][:, None]
+    background = np.array(metrics["background"], dtype=np.float32)
+    rgba[soft, :3] = np.clip((pixels[soft, :3] - (1 - a) * background) / a + 0.5, 0, 255)
+    rgba[alpha == 0] = 0
+
+    out = io.BytesIO()
+    Image.fromarray(rgba, "RGBA").save(out, format="PNG", compress_level=1)
+    return out.getvalue(), metrics
+
+
+def _session(tier: str):
+    return lazy.get("rembg_session_lite" if tier == "lite" else "rembg_session")
+
+
+def matte_reduced(image_bytes: bytes, tier: str) -> bytes:
+    """Segment a reduced copy with the tier's model and refine the mask at full resolution"""
+    np = lazy.get("numpy")
+    Image = lazy.get("PIL.Image")
+    image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+    small = image.copy()
+    small.thumbnail((FAST_SIZE, FAST_SIZE), Image.BILINEAR)
+    mask = _session(tier).predict(small)[0].convert("L")
+    if mask.size != small.size:
+        mask = mask.resize(small.size, Image.BILINEAR)
+
+    pixels = np.asarray(image)
+    alpha = guided_upsample(pixels, np.asarray(small), np.asarray(mask))
+    out = io.BytesIO()
+    Image.fromarray(np.dstack([pixels, alpha]), "RGBA").save(out, format="PNG", compress_level=1)
+    return out.getvalue()
+
+
+def remove_background(image_bytes: bytes, tier: str = "full") -> bytes:
+    """PNG with a transparent background at the given quality tier (blocking; run in a thread)"""
+    if tier == "full":
+        return lazy.get("rembg").remove(image_bytes, session=_session(tier))
+    return matte_reduced(image_bytes, tier)
+
@@ -0,0 +1,264 @@
+import os
+import hashlib
+import mimetypes
+import threading
+from email.utils import formatdate
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import anyio
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse, RedirectResponse, Response
+
+from lazy_imports import lazy
+
+# Content-addressed URLs never change meaning, so clients may cache them forever
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Stable URLs whose bytes can change (e.g. the latest render) must revalidate
+REVALIDATE = "no-cache"
+
+CHUNK_SIZE = 256 * 1024
+THUMB_WIDTHS = (128, 256, 512)
+DIGEST_LENGTH = 16
+
+THUMB_CACHE_DIR = Path(__file__).parent / "cache" / "thumbs"
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True if an If-None-Match header names ``etag`` (weak comparison, as RFC 9110 asks)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    strip = lambda tag: tag.strip().removeprefix("W/")
+    return strip(etag) in [strip(tag) for tag in if_none_match.split(",")]
+
+
+class _HashCache:
+    """SHA-256 per file, recomputed only when its mtime or size changes"""
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[int, int, str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: Path, stat_result: Optional[os.stat_result] = None) -> str:
+        stat_result = stat_result or os.stat(path)
+        key = str(path)
+        cached = self._entries.get(key)
+        if cached and cached[0] == stat_result.st_mtime_ns and cached[1] == stat_result.st_size:
+            return cached[2]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        value = digest.hexdigest()
+        with self._lock:
+            self._entries[key] = (stat_result.st_mtime_ns, stat_result.st_size, value)
+        return value
+
+
+hash_cache = _HashCache()
+
+
+def content_digest(path: Path) -> str:
+    """Short content hash used in asset URLs"""
+    return hash_cache.get(path)[:DIGEST_LENGTH]
+
+
+class RangeNotSatisfiable(ValueError):
+    """The requested byte range lies outside the file"""
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single ``bytes=`` range into an inclusive (start, end) pair
+
+    Returns None when the header is absent, malformed or asks for several
+    ranges (the full body is served instead). Raises RangeNotSatisfiable when
+    the range lies outside the file.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start_s, sep, end_s = header[len("bytes="):].strip().partition("-")
+    if not sep:
+        return None
+    try:
+        start = int(start_s) if start_s else None
+        end = int(end_s) if end_s else None
+    except ValueError:
+        return None
+    if start is None:
+        # Suffix range: the last N bytes
+        if not end or size == 0:
+            raise RangeNotSatisfiable()
+        return max(0, size - end), size - 1
+    if end is None:
+        end = size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable()
+    return start, min(end, size - 1)
+
+
+class RangedFileResponse(Response):
+    """File response with a strong content ETag, conditional GET and byte ranges
+
+    Handles If-None-Match (304), Range/If-Range (206/416) and HEAD. Hashing is
+    done off the event loop and cached per (path, mtime, size).
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        request_headers: Headers,
+        method: str = "GET",
+        media_type: Optional[str] = None,
+        cache_control: str = REVALIDATE,
+        filename: Optional[str] = None,
+        status_code: int = 200,
+    ):
+        self.path = Path(path)
+        self.request_headers = request_headers
+        self.method = method
+        self.media_type = media_type or mimetypes.guess_type(str(path))[0] or "application/octet-stream"
+        self.status_code = status_code
+        self.background = None
+        self.body = b""
+        headers = {"cache-control": cache_control, "accept-ranges": "bytes"}
+        if filename:
+            headers["content-disposition"] = f'attachment; filename="{filename}"'
+        self.init_headers(headers)
+
+    async def __call__(self, scope, receive, send):
+        stat_result = await anyio.to_thread.run_sync(os.stat, self.path)
+        digest = await anyio.to_thread.run_sync(hash_cache.get, self.path, stat_result)
+        etag = f'"{digest}"'
+        size = stat_result.st_size
+        self.headers["etag"] = etag
+        self.headers["last-modified"] = formatdate(stat_result.st_mtime, usegmt=True)
+
+        if_none_match = self.request_headers.get("if-none-match")
+        if etag_matches(if_none_match, etag):
+            await self._send_head(send, 304, drop_length=True)
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        byte_range = None
+        if self.status_code == 200:
+            if_range = self.request_headers.get("if-range")
+            if not if_range or if_range.strip() == etag:
+                try:
+                    byte_range = parse_range(self.request_headers.get("range"), size)
+                except RangeNotSatisfiable:
+                    self.headers["content-range"] = f"bytes */{size}"
+                    self.headers["content-length"] = "0"
+                    await self._send_head(send, 416)
+                    await send({"type": "http.response.body", "body": b""})
+                    return
+
+        if byte_range:
+            start, end = byte_range
+            self.headers["content-range"] = f"bytes {start}-{end}/{size}"
+            status = 206
+        else:
+            start, end = 0, size - 1
+            status = self.status_code
+        self.headers["content-length"] = str(end - start + 1 if size else 0)
+        await self._send_head(send, status)
+
+        if self.method == "HEAD" or size == 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        remaining = end - start + 1
+        async with await anyio.open_file(self.path, mode="rb") as f:
+            await f.seek(start)
+            while remaining > 0:
+                chunk = await f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            await send({"type": "http.response.body", "body": b""})
+
+    async def _send_head(self, send, status: int, drop_length: bool = False):
+        headers = [
+            (k, v) for k, v in self.raw_headers
+            if not (drop_length and k in (b"content-length", b"content-type"))
+        ]
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles with strong ETags, revalidation headers and Range support"""
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        return RangedFileResponse(
+            Path(full_path),
+            Headers(scope=scope),
+            method=scope["method"],
+            cache_control=REVALIDATE,
+            status_code=status_code,
+        )
+
+
+def thumbnail_path(source: Path, width: int) -> Path:
+    """Return a cached WebP thumbnail for ``source``, creating it on first use
+
+    Thumbnails are keyed by content hash, so identical assets in different
+    projects share one file and a regenerated asset gets a fresh thumbnail.
+    """
+    if width not in THUMB_WIDTHS:
+        raise ValueError(f"Unsupported thumbnail width {width}; use one of {THUMB_WIDTHS}")
+    digest = content_digest(source)
+    target = THUMB_CACHE_DIR / f"{digest}-{width}.webp"
+    if target.exists():
+        return target
+
+    Image = lazy.get("PIL.Image")
+    THUMB_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    with Image.open(source) as img:
+        img.thumbnail((width, width * 4))
+        tmp_path = target.with_suffix(".tmp")
+        img.save(tmp_path, format="WEBP", quality=80, method=4)
+    os.replace(tmp_path, target)
+    return target
+
+
+def describe_asset(path: Path, url_prefix: str, sha256: Optional[str] = None) -> dict:
+    """Listing entry with a content-hashed URL and thumbnail URL for ``path``
+
+    Pass the indexed ``sha256`` to avoid hashing the file on the request path.
+    """
+    digest = sha256[:DIGEST_LENGTH] if sha256 else content_digest(path)
+    url = f"{url_prefix}/{digest}/{path.name}"
+    return {
+        "name": path.name,
+        "digest": digest,
+        "url": url,
+        "thumbnail": f"{url}?variant=thumb&w=256",
+    }
+
+
+async def serve_hashed_asset(request, path: Path, digest: str, url_prefix: str,
+                             variant: Optional[str] = None, width: int = 256) -> Response:
+    """Serve a content-addressed asset, redirecting stale digests to the current URL"""
+    if not path.is_file():
+        return JSONResponse(status_code=404, content={"error": "Asset not found"})
+
+    current = await anyio.to_thread.run_sync(content_digest, path)
+    if digest != current:
+        query = f"?{request.url.query}" if request.url.query else ""
+        return RedirectResponse(
+            f"{url_prefix}/{current}/{path.name}{query}",
+            status_code=307,
+            headers={"cache-control": REVALIDATE},
+        )
+
+    if variant == "thumb":
+        try:
+            path = await anyio.to_thread.run_sync(thumbnail_path, path, width)
+        except ValueError as e:
+            return JSONResponse(status_code=400, content={"error": str(e)})
+
+    return RangedFileResponse(path, request.headers, method=request.method, cache_control=IMMUTABLE)
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import math
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+if TYPE_CHECKING:
+    import numpy as np
+
+from lazy_imports import lazy
+
+# Spring configs used by the Remotion layers (remotion/src/layers)
+ASSET_SPRING = {"damping": 12, "stiffness": 150}
+TEXT_SPRING = {"damping": 10, "stiffness": 200}
+
+DEFAULT_ENTRANCE = "pop"
+DEFAULT_IDLE = "breathe"
+
+# Spring tables stop once the value stays this close to 1; later frames read the last entry
+SETTLE_TOLERANCE = 1e-4
+MAX_SPRING_SECONDS = 10
+TABLE_DECIMALS = 4
+
+
+def spring_curve(frames, fps: float, damping: float, stiffness: float, mass: float = 1.0) -> np.ndarray:
+    """Remotion's ``spring()`` from 0 to 1, evaluated for a whole array of frames
+
+    Remotion steps the damped oscillator frame by frame with its closed-form
+    solution, so the value depends only on elapsed time and the curve can be
+    computed in one vectorized pass. Like Remotion, a step never exceeds 64ms,
+    which slows springs down below ~16fps. Frames before 0 stay at 0.
+    """
+    np = lazy.get("numpy")
+    frames = np.asarray(frames, dtype=np.float64)
+    t = np.maximum(frames, 0) * min(1000 / fps, 64)  # milliseconds, as in Remotion
+    zeta = damping / (2 * np.sqrt(stiffness * mass))
+    omega0 = np.sqrt(stiffness / mass) / 1000
+    x0 = 1.0
+    if zeta < 1:
+        omega1 = omega0 * np.sqrt(1 - zeta ** 2)
+        envelope = np.exp(-zeta * omega0 * t)
+        value = 1 - envelope * ((zeta * omega0 * x0) / omega1 * np.sin(omega1 * t) + x0 * np.cos(omega1 * t))
+    elif zeta == 1:
+        value = 1 - np.exp(-omega0 * t) * (x0 + omega0 * x0 * t)
+    else:
+        omega2 = omega0 * np.sqrt(zeta ** 2 - 1)
+        envelope = np.exp(-zeta * omega0 * t)
+        value = 1 - envelope * (zeta * omega0 * x0 * np.sinh(omega2 * t) + omega2 * x0 * np.cosh(omega2 * t)) / omega2
+    return np.where(frames < 0, 0.0, value)
+
+
+# Entrances (Animations.ts ENTRANCES) as functions of the spring value: translate
+# as a fraction of the element's own box, plus a uniform scale
+def _pop(v):
+    np = lazy.get("numpy")
+    return {"tx": np.zeros_like(v), "ty": np.zeros_like(v), "scale": v}
+
+
+def _slide_up(v):
+    np = lazy.get("numpy")
+    return {"tx": np.zeros_like(v), "ty": 1.0 - v, "scale": np.ones_like(v)}
+
+
+def _drop_down(v):
+    np = lazy.get("numpy")
+    return {"tx": np.zeros_like(v), "ty": -1.5 * (1.0 - v), "scale": np.ones_like(v)}
+
+
+def _slide_left(v):
+    np = lazy.get("numpy")
+    return {"tx": -(1.0 - v), "ty": np.zeros_like(v), "scale": np.ones_like(v)}
+
+
+ENTRANCES = {"pop": _pop, "slide_up": _slide_up, "drop_down": _drop_down, "slide_left": _slide_left}
+
+
+# Idles (Animations.ts IDLES) as functions of the scene-relative frame: translate
+# in CSS pixels and rotation in degrees
+def _breathe(f):
+    np = lazy.get("numpy")
+    return {"tx": np.zeros_like(f), "ty": np.sin(f / 30) * 5, "rotate": np.zeros_like(f)}
+
+
+def _shake(f):
+    np = lazy.get("numpy")
+    return {"tx": np.sin(f / 2) * 3, "ty": np.zeros_like(f), "rotate": np.sin(f / 3) * 2}
+
+
+def _still(f):
+    np = lazy.get("numpy")
+    zeros = np.zeros_like(f)
+    return {"tx": zeros, "ty": zeros, "rotate": zeros}
+
+
+IDLES = {"breathe": _breathe, "shake": _shake, "still": _still}
+
+
+def entrance_params(name: str, spring_values: np.ndarray) -> Dict[str, np.ndarray]:
+    """Per-frame entrance transform; unknown names fall back to pop like the TSX"""
+    np = lazy.get("numpy")
+    return ENTRANCES.get(name, ENTRANCES[DEFAULT_ENTRANCE])(np.asarray(spring_values, dtype=np.float64))
+
+
+def idle_params(name: str, frames: np.ndarray) -> Dict[str, np.ndarray]:
+    """Per-frame idle transform; unknown names fall back to breathe like the TSX"""
+    np = lazy.get("numpy")
+    return IDLES.get(name, IDLES[DEFAULT_IDLE])(np.asarray(frames, dtype=np.float64))
+
+
+def transform_origin(entrance: str) -> str:
+    """Drop-downs hang from the top edge, everything else grows from the bottom"""
+    return "top" if entrance == "drop_down" else "bottom"
+
+
+def spring_table(fps: float, damping: float, stiffness: float, tolerance: float = SETTLE_TOLERANCE) -> np.ndarray:
+    """Spring values from frame 0 until settled, ending with the resting value 1"""
+    np = lazy.get("numpy")
+    values = spring_curve(np.arange(int(MAX_SPRING_SECONDS * fps) + 1), fps, damping, stiffness)
+    unsettled = np.nonzero(np.abs(values - 1) >= tolerance)[0]
+    end = int(unsettled[-1]) + 1 if len(unsettled) else 0
+    return np.append(values[:end], 1.0)
+
+
+def sample_table(table, frames) -> np.ndarray:
+    """Look up a table at (possibly fractional or out-of-range) frames, holding both ends"""
+    np = lazy.get("numpy")
+    table = np.asarray(table, dtype=np.float64)
+    return np.interp(np.asarray(frames, dtype=np.float64), np.arange(len(table)), table)
+
+
+def _channels(params: Dict[str, np.ndarray], translate_unit: float) -> Dict[str, List[float]]:
+    """CSS transform channels in Animations.ts order and units, dropping identity ones"""
+    np = lazy.get("numpy")
+    channels = {
+        "translateX": params.get("tx", 0) * translate_unit,
+        "translateY": params.get("ty", 0) * translate_unit,
+        "scale": params.get("scale", 1),
+        "rotate": params.get("rotate", 0),
+    }
+    identity = {"translateX": 0, "translateY": 0, "scale": 1, "rotate": 0}
+    return {
+        name: (np.round(values, TABLE_DECIMALS) + 0.0).tolist()  # + 0.0 turns -0.0 into 0.0
+        for name, values in channels.items()
+        if np.ndim(values) and np.any(np.abs(np.asarray(values) - identity[name]) > 1e-9)
+    }
+
+
+def table_params(channels: Dict[str, List[float]], frames, translate_unit: float) -> Dict[str, np.ndarray]:
+    """Sample stored transform channels back into tx/ty/scale/rotate arrays"""
+    np = lazy.get("numpy")
+    frames = np.asarray(frames, dtype=np.float64)
+
+    def channel(name: str, identity: float, unit: float = 1.0) -> np.ndarray:
+        values = channels.get(name)
+        return sample_table(values, frames) / unit if values else np.full(frames.shape, identity)
+
+    return {
+        "tx": channel("translateX", 0.0, translate_unit),
+        "ty": channel("translateY", 0.0, translate_unit),
+        "scale": channel("scale", 1.0),
+        "rotate": channel("rotate", 0.0),
+    }
+
+
+def build_motion_tables(scenes: List[dict], subtitles: List[dict], fps: float) -> Dict:
+    """Per-frame animation tables for final_render.json, computed in one vectorized pass
+
+    Every asset shares the same spring (its scene starts at frame 0) and every
+    text element the text spring, so one table per preset covers all of them:
+    ``springs`` hold the spring values, ``entrances`` the transform channels
+    each entrance derives from the asset spring (translate in %), and
+    ``idles`` each idle per scene frame (translate in px, rotate in deg), up to
+    the longest scene. Renderers index them by frame instead of re-running the
+    physics; tables only apply at ``fps``.
+    """
+    np = lazy.get("numpy")
+    asset_spring = spring_table(fps, **ASSET_SPRING)
+    entrances = {DEFAULT_ENTRANCE}
+    idles = {DEFAULT_IDLE}
+    idle_frames = 0
+    for scene in scenes:
+        idle_frames = max(idle_frames, math.ceil(scene.get("duration", 0) * fps))
+        for element in scene.get("elements", []):
+            entrances.add(element.get("anim_enter") if element.get("anim_enter") in ENTRANCES else DEFAULT_ENTRANCE)
+            idles.add(element.get("anim_idle") if element.get("anim_idle") in IDLES else DEFAULT_IDLE)
+
+    springs = {"asset": (np.round(asset_spring, TABLE_DECIMALS) + 0.0).tolist()}
+    if subtitles:
+        springs["text"] = (np.round(spring_table(fps, **TEXT_SPRING), TABLE_DECIMALS) + 0.0).tolist()
+    scene_frames = np.arange(idle_frames)
+    return {
+        "fps": fps,
+        "springs": springs,
+        "entrances": {name: _channels(entrance_params(name, asset_spring), 100) for name in sorted(entrances)},
+        "idles": {name: _channels(idle_params(name, scene_frames), 1) for name in sorted(idles)},
+        "idle_frames": idle_frames,
+    }
+
+
+def usable_motion(motion: Optional[Dict], fps: float) -> Optional[Dict]:
+    """The tables are only valid at the fps they were built for"""
+    return motion if motion and motion.get("fps") == fps else None
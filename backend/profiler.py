@@ -0,0 +1,294 @@
+import os
+import sys
+import time
+import uuid
+import asyncio
+import threading
+import functools
+import contextlib
+import contextvars
+import weakref
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from storage import atomic_write_json
+
+# Sampling period; 5ms keeps overhead to a few percent of one core while profiling
+INTERVAL = float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000
+# Stop sampling after this many seconds so a forgotten session cannot grow without bound
+MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "1800"))
+PROFILE_DIR_NAME = "profiles"
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+_ASYNCIO_DIR = os.path.dirname(asyncio.__file__)
+_EXECUTOR_FILE = os.path.join("concurrent", "futures", "thread.py")
+_BACKEND_DIR = str(Path(__file__).parent.resolve())
+
+# Profile session owning the current context; tasks and to_thread calls inherit it
+PROFILE_SESSION: contextvars.ContextVar[Optional["ProfileSession"]] = contextvars.ContextVar("profile_session", default=None)
+_factory_previous: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, object]" = weakref.WeakKeyDictionary()
+# Sessions running on each loop; the factory comes out when the last one stops
+_factory_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, int]" = weakref.WeakKeyDictionary()
+
+
+def _task_factory(loop, coro, **kwargs):
+    """Adds tasks spawned inside a profiled execution to its session"""
+    previous = _factory_previous.get(loop)
+    task = previous(loop, coro, **kwargs) if previous else asyncio.Task(coro, loop=loop, **kwargs)
+    session = PROFILE_SESSION.get()
+    if session is not None and session.active:
+        session.tasks.add(task)
+    return task
+
+
+def _install_task_factory(loop: asyncio.AbstractEventLoop):
+    """Chain our factory in front of whatever the loop had (e.g. the loop monitor's)"""
+    if loop.get_task_factory() is not _task_factory:
+        _factory_previous[loop] = loop.get_task_factory()
+        loop.set_task_factory(_task_factory)
+    _factory_sessions[loop] = _factory_sessions.get(loop, 0) + 1
+
+
+def _uninstall_task_factory(loop: asyncio.AbstractEventLoop):
+    """Give the loop its previous factory back once no session needs ours"""
+    remaining = _factory_sessions.get(loop, 1) - 1
+    if remaining > 0:
+        _factory_sessions[loop] = remaining
+        return
+    _factory_sessions.pop(loop, None)
+    # Someone chained in front of us since; leave theirs alone (ours passes through when idle)
+    if loop.get_task_factory() is _task_factory:
+        loop.set_task_factory(_factory_previous.pop(loop, None))
+
+
+class ProfileSession:
+    """Wall-clock sampling profile of one async execution and everything it spawns
+
+    A sampler thread wakes every ``interval`` and records, weighted by the
+    time since the previous sample:
+
+    - the event loop thread's stack, while one of the session's tasks runs
+    - the await chain of each of the session's suspended tasks
+    - the stacks of executor threads running the session's ``to_thread`` calls,
+      recognised by the context the call was submitted with
+
+    Every stack is rooted at the task (or thread) it belongs to, so the
+    profile shows which coroutine the time went to. Nothing is installed
+    until a session starts, so code that is not profiled pays nothing.
+    """
+
+    def __init__(self, name: str, interval: float = INTERVAL):
+        self.name = name
+        self.interval = interval
+        self.tasks: "weakref.WeakSet[asyncio.Task]" = weakref.WeakSet()
+        self.active = False
+        self.frames: List[dict] = []
+        self._frame_index: Dict[Tuple[str, str, int], int] = {}
+        # track -> (samples, weights)
+        self.tracks: Dict[str, Tuple[List[List[int]], List[float]]] = {}
+        self.started = 0.0
+        self.ended = 0.0
+        self.sample_count = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._token = None
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        _install_task_factory(self._loop)
+        task = asyncio.current_task()
+        if task is not None:
+            self.tasks.add(task)
+        self._token = PROFILE_SESSION.set(self)
+        self.active = True
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name=f"profiler-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.active = False
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.ended = time.perf_counter()
+        if self._loop is not None:
+            _uninstall_task_factory(self._loop)
+            self._loop = None
+        if self._token is not None:
+            PROFILE_SESSION.reset(self._token)
+            self._token = None
+
+    def _frame(self, name: str, file: str = "", line: int = 0) -> int:
+        key = (name, file, line)
+        index = self._frame_index.get(key)
+        if index is None:
+            index = self._frame_index[key] = len(self.frames)
+            frame = {"name": name}
+            if file:
+                frame["file"] = file
+                frame["line"] = line
+            self.frames.append(frame)
+        return index
+
+    def _code_frame(self, frame) -> int:
+        code = frame.f_code
+        file = code.co_filename
+        if file.startswith(_BACKEND_DIR):
+            file = os.path.relpath(file, _BACKEND_DIR)
+        return self._frame(getattr(code, "co_qualname", code.co_name), file, code.co_firstlineno)
+
+    def _add(self, track: str, stack: List[int], weight: float):
+        samples, weights = self.tracks.setdefault(track, ([], []))
+        samples.append(stack)
+        weights.append(weight)
+
+    @staticmethod
+    def _thread_stack(frame, stop=None) -> list:
+        """Frames root-first from ``frame`` up to (not including) ``stop``"""
+        frames = []
+        while frame is not None and frame is not stop:
+            frames.append(frame)
+            frame = frame.f_back
+        frames.reverse()
+        return frames
+
+    def _task_label(self, task: asyncio.Task) -> int:
+        coro = task.get_coro()
+        qualname = getattr(coro, "__qualname__", type(coro).__name__)
+        return self._frame(f"task {task.get_name()} ({qualname})")
+
+    def _sample_loop(self, frames: dict, running: Optional[asyncio.Task], weight: float):
+        frame = frames.get(self._loop_thread)
+        if frame is None or running is None:
+            return
+        # Drop the event loop's own frames above the task step
+        stack = [f for f in self._thread_stack(frame) if not f.f_code.co_filename.startswith(_ASYNCIO_DIR)]
+        self._add("event loop (on CPU)", [self._task_label(running)] + [self._code_frame(f) for f in stack], weight)
+
+    def _sample_suspended(self, task: asyncio.Task, weight: float):
+        stack = [self._task_label(task)]
+        awaitable = task.get_coro()
+        while awaitable is not None:
+            frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+            if frame is None:
+                break
+            stack.append(self._code_frame(frame))
+            awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+        if awaitable is not None:
+            # A bare Future's iterator (FutureIter) says nothing more than "a future"
+            kind = type(awaitable).__name__
+            stack.append(self._frame(f"[awaiting {'Future' if kind == 'FutureIter' else kind}]"))
+        self._add("tasks (awaiting)", stack, weight)
+
+    def _sample_threads(self, frames: dict, weight: float):
+        for thread_id, frame in frames.items():
+            if thread_id in (self._loop_thread, threading.get_ident()):
+                continue
+            stack = self._thread_stack(frame)
+            for i, f in enumerate(stack):
+                if f.f_code.co_name == "run" and f.f_code.co_filename.endswith(_EXECUTOR_FILE):
+                    work = f.f_locals.get("self")
+                    fn = getattr(work, "fn", None)
+                    # asyncio.to_thread submits partial(context.run, func, ...)
+                    context = getattr(getattr(fn, "func", None), "__self__", None) if isinstance(fn, functools.partial) else None
+                    if isinstance(context, contextvars.Context) and context.get(PROFILE_SESSION) is self:
+                        label = self._frame(f"thread {thread_id}")
+                        self._add("worker threads", [label] + [self._code_frame(g) for g in stack[i + 1:]], weight)
+                    break
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            weight = (now - last) * 1000
+            last = now
+            if not self.active or now - self.started > MAX_SECONDS:
+                return
+            try:
+                frames = sys._current_frames()
+                running = asyncio.current_task(self._loop)
+                if running not in self.tasks:
+                    running = None
+                self._sample_loop(frames, running, weight)
+                for task in list(self.tasks):
+                    if task is not running and not task.done():
+                        self._sample_suspended(task, weight)
+                self._sample_threads(frames, weight)
+                self.sample_count += 1
+            except Exception:
+                # The loop mutates tasks and frames while we read them; skip this sample
+                continue
+
+    def speedscope(self) -> dict:
+        """The profile in speedscope's file format, one sampled profile per track"""
+        duration = round((self.ended or time.perf_counter()) - self.started, 6) * 1000
+        profiles = []
+        for track, (samples, weights) in self.tracks.items():
+            profiles.append({
+                "type": "sampled",
+                "name": f"{self.name}: {track}",
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": round(sum(weights), 3),
+                "samples": samples,
+                "weights": [round(w, 3) for w in weights],
+            })
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": self.name,
+            "exporter": "animation-video-agent profiler",
+            "activeProfileIndex": 0,
+            "shared": {"frames": self.frames},
+            "profiles": profiles,
+            "metadata": {"wall_ms": round(duration, 1), "samples": self.sample_count, "interval_ms": self.interval * 1000},
+        }
+
+    def summary(self, top: int = 15) -> dict:
+        """Self time per function on each track, heaviest first"""
+        tracks = {}
+        for track, (samples, weights) in self.tracks.items():
+            self_time: Dict[int, float] = {}
+            for stack, weight in zip(samples, weights):
+                if stack:
+                    self_time[stack[-1]] = self_time.get(stack[-1], 0.0) + weight
+            ranked = sorted(self_time.items(), key=lambda item: -item[1])[:top]
+            tracks[track] = [
+                {"frame": self.frames[index]["name"], "file": self.frames[index].get("file"), "ms": round(ms, 1)}
+                for index, ms in ranked
+            ]
+        return tracks
+
+
+def profile_dir(project_dir: Path) -> Path:
+    return Path(project_dir) / PROFILE_DIR_NAME
+
+
+@contextlib.asynccontextmanager
+async def profiled(enabled: bool, project_dir: Path, kind: str, on_saved=None):
+    """Profile the body into ``<project>/profiles/<kind>-<time>-<id>.speedscope.json`` when ``enabled``
+
+    ``on_saved`` is called with the file name once written. Disabled, this
+    is an empty context manager.
+    """
+    if not enabled:
+        yield None
+        return
+    # The id keeps two runs of one kind started in the same second from sharing a file
+    name = f"{kind}-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    session = ProfileSession(name)
+    session.start()
+    try:
+        yield session
+    finally:
+        session.stop()
+        path = profile_dir(project_dir) / f"{name}.speedscope.json"
+        try:
+            await asyncio.to_thread(atomic_write_json, path, session.speedscope(), False, False)
+            print(f"Profile of {kind} saved to {path} ({session.sample_count} samples)")
+            if on_saved:
+                on_saved(path.name, session.summary())
+        except Exception as e:
+            print(f"Error saving profile {path}: {str(e)}")
@@ -0,0 +1,118 @@
+import asyncio
+import json
+from typing import AsyncIterator, Callable, Dict, Optional, Set
+
+# Longest a long-poll request may wait before answering 304
+MAX_WAIT_SECONDS = 60
+# SSE comment sent this often so proxies keep an idle stream open
+SSE_HEARTBEAT_SECONDS = 15
+
+
+class RevisionWatch:
+    """Wake coroutines waiting for a project to change
+
+    ProjectManager bumps a project's revision on every write and calls
+    ``notify``; waiters hold a future instead of polling, so an idle
+    long-poll or SSE client costs nothing until the project really changes.
+    ``notify`` is safe to call from worker threads.
+    """
+
+    def __init__(self):
+        self._waiters: Dict[str, Set[asyncio.Future]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def notify(self, project_id: str):
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._wake(project_id)
+        elif not loop.is_closed():
+            # From a thread the waiter may be registering right now; let the loop decide
+            loop.call_soon_threadsafe(self._wake, project_id)
+
+    def _wake(self, project_id: str):
+        for future in self._waiters.pop(project_id, ()):
+            if not future.done():
+                future.set_result(None)
+
+    async def wait(self, project_id: str, timeout: float) -> bool:
+        """Wait for the next change to a project; False if ``timeout`` passed first"""
+        self._loop = asyncio.get_running_loop()
+        future = self._loop.create_future()
+        waiters = self._waiters.setdefault(project_id, set())
+        waiters.add(future)
+        try:
+            await asyncio.wait_for(future, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            waiters.discard(future)
+            if not waiters and self._waiters.get(project_id) is waiters:
+                del self._waiters[project_id]
+
+    def waiting(self) -> int:
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+
+async def wait_for_revision(
+    watch: RevisionWatch,
+    get_project: Callable[[str], Optional[dict]],
+    project_id: str,
+    since: int,
+    timeout: float,
+) -> Optional[dict]:
+    """The project once its revision is past ``since``, or as it is when ``timeout`` runs out
+
+    Returns None if the project does not exist (or was deleted meanwhile).
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max(0.0, min(timeout, MAX_WAIT_SECONDS))
+    while True:
+        project = get_project(project_id)
+        if project is None or project.get("revision", 0) > since:
+            return project
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return project
+        await watch.wait(project_id, remaining)
+
+
+def sse_event(event: str, data: dict, event_id: Optional[int] = None) -> bytes:
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+async def project_event_stream(
+    watch: RevisionWatch,
+    get_summary: Callable[[str], Optional[dict]],
+    project_id: str,
+    since: int,
+) -> AsyncIterator[bytes]:
+    """SSE stream of a project's summary, one ``project`` event per revision
+
+    The event id is the revision, so a reconnecting EventSource resumes from
+    Last-Event-ID without missing or repeating a state. Ends with a
+    ``deleted`` event if the project goes away.
+    """
+    yield b"retry: 3000\n\n"
+    while True:
+        summary = get_summary(project_id)
+        if summary is None:
+            yield sse_event("deleted", {"id": project_id})
+            return
+        revision = summary.get("revision", 0)
+        if revision > since:
+            since = revision
+            yield sse_event("project", summary, revision)
+            continue
+        if not await watch.wait(project_id, SSE_HEARTBEAT_SECONDS):
+            yield b": keepalive\n\n"
@@ -1,32 +1,170 @@
 import os
-import json
+import time
 import uuid
+import atexit
 import shutil
+import weakref
+from bisect import bisect_left, insort
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
+from storage import WriteCoalescer, atomic_write_json, read_json
+
+# Fields kept in the lightweight listing index (everything except script_data)
+SUMMARY_FIELDS = ("id", "created_at", "status", "video_path", "error", "audio_path", "revision", "progress")
+# Shared state namespace holding one document per project
+STATE_NAMESPACE = "projects"
+# Imports build projects here and move them into place once complete
+STAGING_DIR = ".staging"
+# Staged projects older than this were abandoned by a crashed import
+STAGING_MAX_AGE = 3600
+
+
+def _flush_at_exit(ref: "weakref.ref[ProjectManager]"):
+    manager = ref()
+    if manager is not None:
+        manager.flush()
+
 
 class ProjectManager:
     """Manages video projects with unique IDs and asset folders"""
     
-    def __init__(self, base_dir: str = "projects"):
+    def __init__(self, base_dir: str = "projects", state=None):
         self.base_dir = Path(base_dir)
+        # With a SharedState the registry lives there so every worker sees the
+        # same projects; otherwise it lives in projects.json
+        self.state = state
         self.base_dir.mkdir(exist_ok=True)
         self.projects_file = self.base_dir / "projects.json"
+        # Status updates arrive in bursts; they share one registry write
+        self._writer = WriteCoalescer(self._write_projects)
+        # Called with a project id after every local write (revision bump or delete)
+        self.on_change: Optional[Callable[[str], None]] = None
+        # Through a weakref so the exit hook does not keep the instance alive
+        atexit.register(_flush_at_exit, weakref.ref(self))
         self._load_projects()
+        self._clean_staging()
     
     def _load_projects(self):
-        """Load existing projects from file"""
-        if self.projects_file.exists():
-            with open(self.projects_file, 'r') as f:
-                self.projects = json.load(f)
+        """Load existing projects from shared state or file"""
+        if self.state is not None:
+            self._state_seq = self.state.sequence(STATE_NAMESPACE)
+            self.projects = self.state.items(STATE_NAMESPACE)
+            if not self.projects and self.projects_file.exists():
+                # First start on shared state: import the file-based registry
+                for project_id, project in read_json(self.projects_file).items():
+                    self.state.put(STATE_NAMESPACE, project_id, project)
+                self.projects = self.state.items(STATE_NAMESPACE)
+        elif self.projects_file.exists():
+            self.projects = read_json(self.projects_file)
         else:
             self.projects = {}
+        self._build_index()
+
+    def _refresh(self):
+        """Pull projects other workers changed since the last refresh"""
+        if self.state is None:
+            return
+        latest, changed = self.state.changes(STATE_NAMESPACE, self._state_seq)
+        for project_id, project in changed.items():
+            if project is None:
+                if project_id in self.projects:
+                    self._unindex_project(project_id)
+                    del self.projects[project_id]
+            else:
+                self.projects[project_id] = project
+                self._index_project(project_id)
+        self._state_seq = latest
+
+    def _changed(self, project_id: str):
+        if self.on_change:
+            try:
+                self.on_change(project_id)
+            except Exception as e:
+                print(f"Error notifying change of {project_id}: {str(e)}")
+
+    def _mutate(self, project_id: str, change: Callable[[Dict], None], immediate: bool = False) -> bool:
+        """Apply a change to one project and persist it; False if the project is gone
+
+        Every change bumps the project's ``revision``, which clients use to
+        wait for, and conditionally fetch, new state.
+        """
+        def apply(project):
+            change(project)
+            project["revision"] = project.get("revision", 0) + 1
+
+        if self.state is not None:
+            def _apply(project):
+                if project is not None:
+                    apply(project)
+                return project
+            # Read-modify-write inside the backend's transaction so concurrent
+            # workers updating the same project do not drop each other's fields
+            project = self.state.update(STATE_NAMESPACE, project_id, _apply)
+            if project is None:
+                self._refresh()
+                return False
+            self.projects[project_id] = project
+        else:
+            if project_id not in self.projects:
+                return False
+            apply(self.projects[project_id])
+            self._save_projects(immediate)
+        self._index_project(project_id)
+        self._changed(project_id)
+        return True
+
+    def _build_index(self):
+        """Build the summary index and creation-time order used by list_projects"""
+        self.summaries: Dict[str, Dict] = {}
+        self._order: List[tuple] = []
+        for project_id in self.projects:
+            self._index_project(project_id)
+
+    @staticmethod
+    def _summarize(project: Dict) -> Dict:
+        summary = {field: project.get(field) for field in SUMMARY_FIELDS}
+        scenes = (project.get("script_data") or {}).get("scenes") or []
+        summary["scene_count"] = len(scenes)
+        summary["asset_count"] = sum(
+            1 for scene in scenes for element in scene.get("elements", []) if element.get("type") == "image"
+        )
+        return summary
+
+    def _index_project(self, project_id: str):
+        """Refresh one project's summary; called on every write"""
+        project = self.projects[project_id]
+        previous = self.summaries.get(project_id)
+        if previous is None:
+            insort(self._order, (project.get("created_at") or "", project_id))
+        self.summaries[project_id] = self._summarize(project)
+
+    def _unindex_project(self, project_id: str):
+        summary = self.summaries.pop(project_id, None)
+        if summary is not None:
+            key = (summary.get("created_at") or "", project_id)
+            i = bisect_left(self._order, key)
+            if i < len(self._order) and self._order[i] == key:
+                del self._order[i]
     
-    def _save_projects(self):
-        """Save projects to file"""
-        with open(self.projects_file, 'w') as f:
-            json.dump(self.projects, f, indent=2)
+    def _write_projects(self):
+        if self.state is None:
+            atomic_write_json(self.projects_file, self.projects)
+
+    def _save_projects(self, immediate: bool = False):
+        """Save projects to file; non-immediate saves are coalesced"""
+        if immediate:
+            self.flush()
+            self._write_projects()
+        else:
+            self._writer.request()
+
+    def flush(self):
+        """Write any coalesced registry changes now"""
+        self._writer.flush()
+
+    def _write_script(self, project_id: str, script_data: dict):
+        atomic_write_json(self.base_dir / project_id / "input_script.json", script_data, pretty=True)
     
     def create_project(self, script_data: dict, audio_path: str = None) -> str:
         """Create a new project with unique ID"""
@@ -45,10 +183,6 @@ class ProjectManager:
             shutil.copy2(audio_path, project_dir / "audio" / audio_filename)
             script_data["audio_path"] = f"audio/{audio_filename}"
         
-        # Save script
-        with open(project_dir / "input_script.json", 'w') as f:
-            json.dump(script_data, f, indent=2)
-        
         # Update asset paths in script to be relative to project
         for scene in script_data.get("visual_track", []):
             # Handle avatar asset
@@ -64,67 +198,228 @@ class ProjectManager:
                     pass
         
         # Save updated script
-        with open(project_dir / "input_script.json", 'w') as f:
-            json.dump(script_data, f, indent=2)
+        self._write_script(project_id, script_data)
+        self._register(project_id, script_data)
+        self._save_projects(immediate=True)
         
-        # Register project
+        return project_id
+
+    def _register(self, project_id: str, script_data: dict, **fields):
         self.projects[project_id] = {
             "id": project_id,
             "created_at": datetime.now().isoformat(),
             "status": "pending",
             "script_data": script_data,
             "video_path": None,
-            "error": None
+            "error": None,
+            "revision": 1,
+            **fields,
         }
-        self._save_projects()
-        
-        return project_id
+        if self.state is not None:
+            self.state.put(STATE_NAMESPACE, project_id, self.projects[project_id])
+        self._index_project(project_id)
+        self._changed(project_id)
+
+    def stage_project(self) -> Dict:
+        """Reserve a project id and a private directory to build it in
+
+        Nothing is visible to listings or other workers until
+        ``commit_staged``; ``discard_staged`` throws the directory away.
+        """
+        project_id = str(uuid.uuid4())[:8]
+        staging_dir = self.base_dir / STAGING_DIR / project_id
+        for sub in ("assets", "audio", "output"):
+            (staging_dir / sub).mkdir(parents=True, exist_ok=True)
+        return {"id": project_id, "dir": staging_dir, "script_data": None, "fields": {}}
+
+    def commit_staged(self, staged: List[Dict], immediate: bool = True) -> List[str]:
+        """Move staged projects into place and register them with one registry write
+
+        Each project's script is written into its staging directory first, so
+        a project directory only ever appears complete.
+        """
+        committed = []
+        try:
+            for item in staged:
+                atomic_write_json(item["dir"] / "input_script.json", item["script_data"], pretty=True)
+                os.replace(item["dir"], self.base_dir / item["id"])
+                committed.append(item)
+                self._register(item["id"], item["script_data"], **item["fields"])
+        except BaseException:
+            # Undo the moves that already happened so the batch stays all-or-nothing
+            for item in committed:
+                self.projects.pop(item["id"], None)
+                self._unindex_project(item["id"])
+                if self.state is not None:
+                    self.state.delete(STATE_NAMESPACE, item["id"])
+                shutil.rmtree(self.base_dir / item["id"], ignore_errors=True)
+            raise
+        self._save_projects(immediate=immediate)
+        return [item["id"] for item in staged]
+
+    def discard_staged(self, staged: Dict):
+        shutil.rmtree(staged["dir"], ignore_errors=True)
+
+    def _clean_staging(self):
+        """Remove staging directories left behind by interrupted imports"""
+        staging_root = self.base_dir / STAGING_DIR
+        if not staging_root.exists():
+            return
+        cutoff = time.time() - STAGING_MAX_AGE
+        for entry in staging_root.iterdir():
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    shutil.rmtree(entry, ignore_errors=True)
+            except OSError:
+                pass
     
     def get_project(self, project_id: str) -> Optional[Dict]:
         """Get project details"""
+        self._refresh()
         return self.projects.get(project_id)
     
+    def get_summary(self, project_id: str) -> Optional[Dict]:
+        """A project's listing summary (no script), or None if it does not exist"""
+        self._refresh()
+        return self.summaries.get(project_id)
+
+    def update_progress(self, project_id: str, done: int, total: int):
+        """Record asset generation progress so watchers see each finished asset"""
+        self._mutate(project_id, lambda project: project.update(progress={"done": done, "total": total}))
+
     def get_all_projects(self) -> List[Dict]:
         """Get all projects"""
+        self._refresh()
         return list(self.projects.values())
+
+    def list_projects(
+        self,
+        status: Optional[str] = None,
+        created_after: Optional[str] = None,
+        created_before: Optional[str] = None,
+        query: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> Dict:
+        """Newest-first page of project summaries
+
+        Date bounds are ISO timestamps (prefixes such as "2025-12-14" work) and
+        are resolved by binary search over the creation-time index. ``cursor``
+        is the ``next_cursor`` of the previous page; ``query`` matches a
+        project id prefix.
+        """
+        self._refresh()
+        lo = bisect_left(self._order, (created_after,)) if created_after else 0
+        hi = bisect_left(self._order, (created_before,)) if created_before else len(self._order)
+        if cursor:
+            created_at, _, project_id = cursor.partition("|")
+            hi = min(hi, bisect_left(self._order, (created_at, project_id)))
+
+        def matches(project_id: str) -> bool:
+            summary = self.summaries[project_id]
+            if status and summary.get("status") != status:
+                return False
+            if query and not project_id.startswith(query):
+                return False
+            return True
+
+        page = []
+        next_cursor = None
+        i = hi - 1
+        while i >= lo:
+            created_at, project_id = self._order[i]
+            if matches(project_id):
+                if len(page) == limit:
+                    last = page[-1]
+                    next_cursor = f"{last.get('created_at') or ''}|{last['id']}"
+                    break
+                page.append(self.summaries[project_id])
+            i -= 1
+
+        if status or query:
+            total = sum(1 for _, project_id in self._order[lo:hi] if matches(project_id))
+        else:
+            total = hi - lo
+
+        return {"projects": page, "total": total, "next_cursor": next_cursor}
+
+    def get_project_script(self, project_id: str) -> Optional[Dict]:
+        """Load a project's input script from disk on demand"""
+        self._refresh()
+        if project_id not in self.projects:
+            return None
+        script_path = self.base_dir / project_id / "input_script.json"
+        if not script_path.exists():
+            return self.projects[project_id].get("script_data")
+        return read_json(script_path)
     
     def update_project(self, project_id: str, updates: dict):
         """Update project with new data"""
-        if project_id in self.projects:
-            self.projects[project_id].update(updates)
-            self._save_projects()
-
+        if self._mutate(project_id, lambda project: project.update(updates)):
             # Update input_script.json if audio_path is updated
             if "audio_path" in updates:
                 try:
                     project_dir = self.base_dir / project_id
                     script_path = project_dir / "input_script.json"
                     if script_path.exists():
-                        with open(script_path, 'r') as f:
-                            script_data = json.load(f)
+                        script_data = read_json(script_path)
                         
                         # Extract filename and ensure it's relative path format: audio/filename.ext
                         audio_path_str = str(updates["audio_path"])
                         audio_filename = os.path.basename(audio_path_str)
                         script_data["audio_path"] = f"audio/{audio_filename}"
                         
-                        with open(script_path, 'w') as f:
-                            json.dump(script_data, f, indent=2)
+                        self._write_script(project_id, script_data)
                 except Exception as e:
                     print(f"Error updating input_script.json with audio path: {str(e)}")
     
+    def replace_script(self, project_id: str, script_data: dict) -> bool:
+        """Store an edited script; the previous video no longer matches it"""
+        def _apply(project):
+            project["script_data"] = script_data
+            project["video_path"] = None
+        self._refresh()
+        if project_id not in self.projects:
+            return False
+        self._write_script(project_id, script_data)
+        return self._mutate(project_id, _apply, immediate=True)
+
     def update_project_status(self, project_id: str, status: str, video_path: str = None, error: str = None):
         """Update project status"""
-        if project_id in self.projects:
-            self.projects[project_id]["status"] = status
+        def _apply(project):
+            project["status"] = status
             if video_path:
-                self.projects[project_id]["video_path"] = video_path
+                project["video_path"] = video_path
             if error:
-                self.projects[project_id]["error"] = error
-            self._save_projects()
+                project["error"] = error
+        self._mutate(project_id, _apply)
+    
+    def mark_interrupted(self, is_active: Optional[Callable[[str], bool]] = None) -> List[str]:
+        """Fail projects left in 'processing' by a crash or restart; retry resumes them
+
+        ``is_active`` reports projects another worker is still generating, which
+        are left alone.
+        """
+        self._refresh()
+        interrupted = [
+            pid for pid, p in self.projects.items()
+            if p.get("status") == "processing" and not (is_active and is_active(pid))
+        ]
+
+        def _apply(project):
+            if project.get("status") == "processing":
+                project["status"] = "failed"
+                project["error"] = "Generation interrupted by server restart; retry to resume"
+
+        for project_id in interrupted:
+            self._mutate(project_id, _apply)
+        if interrupted:
+            self._save_projects(immediate=True)
+        return interrupted
     
     def delete_project(self, project_id: str) -> bool:
         """Delete a project and its files"""
+        self._refresh()
         if project_id not in self.projects:
             return False
         
@@ -134,8 +429,12 @@ class ProjectManager:
             shutil.rmtree(project_dir)
         
         # Remove from projects list
+        if self.state is not None:
+            self.state.delete(STATE_NAMESPACE, project_id)
+        self._unindex_project(project_id)
         del self.projects[project_id]
-        self._save_projects()
+        self._save_projects(immediate=True)
+        self._changed(project_id)
         
         return True
     
@@ -0,0 +1,192 @@
+import os
+import json
+import time
+import shutil
+import asyncio
+import hashlib
+import contextlib
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+REMOTION_DIR = Path(__file__).parent.parent / "remotion"
+BUILD_DIR = REMOTION_DIR / "build"
+ENTRY_POINT = "src/index.tsx"
+
+# Inputs that change the webpack bundle; project data is passed at render time
+_BUNDLE_INPUTS = ("src", "package.json", "package-lock.json", "remotion.config.ts", "tsconfig.json")
+
+_bundle_lock = asyncio.Lock()
+# Renders in this process using each bundle (by directory name); those are never pruned
+_bundle_users: Dict[str, int] = {}
+# Bundles for older code versions are kept this long after their last use, for
+# renders started by other workers (whose use counts this process cannot see)
+BUNDLE_RETENTION = float(os.getenv("RENDER_BUNDLE_RETENTION_SECONDS", "21600"))
+
+
+def npm_command() -> str:
+    return "npm.cmd" if os.name == "nt" else "npm"
+
+
+def _bundle_files() -> List[Tuple[Path, int, int]]:
+    """(path, mtime_ns, size) of every file that affects the bundle, in a stable order"""
+    files = []
+    for name in _BUNDLE_INPUTS:
+        root = REMOTION_DIR / name
+        paths = sorted(p for p in root.rglob("*") if p.is_file()) if root.is_dir() else [root]
+        for path in paths:
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((path, stat.st_mtime_ns, stat.st_size))
+    return files
+
+
+# (stat signature, version) of the last hash; stat calls are far cheaper than re-reading src/
+_code_version_cache: Optional[Tuple[List[Tuple[Path, int, int]], str]] = None
+
+
+def code_version() -> str:
+    """Hash of every file that affects the Remotion bundle
+
+    Reads the files only when one was added, removed or touched since the
+    last call. Blocking; call it through ``asyncio.to_thread`` from the loop.
+    """
+    global _code_version_cache
+    files = _bundle_files()
+    if _code_version_cache is not None and _code_version_cache[0] == files:
+        return _code_version_cache[1]
+    digest = hashlib.sha256()
+    for path, _, _ in files:
+        try:
+            data = path.read_bytes()
+        except OSError:
+            continue
+        digest.update(str(path.relative_to(REMOTION_DIR)).encode())
+        digest.update(data)
+    version = digest.hexdigest()[:16]
+    _code_version_cache = (files, version)
+    return version
+
+
+def _link_public_dir(bundle_dir: Path):
+    """Point the bundle's copied public/ at the live remotion/public
+
+    Assets are generated after the bundle is built, so the bundle must see the
+    current public directory rather than the snapshot taken at bundle time.
+    Falls back to keeping the copy (refreshed by ``sync_public_dir``) where
+    symlinks are unavailable.
+    """
+    public_copy = bundle_dir / "public"
+    source = REMOTION_DIR / "public"
+    if public_copy.is_symlink():
+        return
+    try:
+        if public_copy.exists():
+            shutil.rmtree(public_copy)
+        public_copy.symlink_to(source, target_is_directory=True)
+    except OSError:
+        shutil.copytree(source, public_copy, dirs_exist_ok=True)
+
+
+def _prune_bundles(current: str):
+    """Drop bundles of older code versions no render is using"""
+    cutoff = time.time() - BUNDLE_RETENTION
+    for old in BUILD_DIR.iterdir():
+        if not old.is_dir() or old.name == current or old.name.endswith(".tmp") or _bundle_users.get(old.name):
+            continue
+        try:
+            if old.stat().st_mtime < cutoff:
+                shutil.rmtree(old, ignore_errors=True)
+        except FileNotFoundError:
+            continue
+
+
+@contextlib.asynccontextmanager
+async def use_bundle(log: Callable[[str], Awaitable[None]]) -> AsyncIterator[Tuple[Optional[Path], float, bool]]:
+    """``ensure_bundle`` for a render: the bundle is kept until the block exits
+
+    A rebuild for newer code while the render runs leaves this bundle in place;
+    it is pruned once unused for ``BUNDLE_RETENTION``. The public dir is synced
+    before the block runs.
+    """
+    bundle_dir, seconds, reused = await ensure_bundle(log)
+    if bundle_dir is None:
+        yield bundle_dir, seconds, reused
+        return
+    _bundle_users[bundle_dir.name] = _bundle_users.get(bundle_dir.name, 0) + 1
+    try:
+        # The directory's mtime is its last use, for workers deciding what to prune
+        await asyncio.to_thread(os.utime, bundle_dir)
+        await asyncio.to_thread(sync_public_dir, bundle_dir)
+        yield bundle_dir, seconds, reused
+    finally:
+        remaining = _bundle_users.get(bundle_dir.name, 1) - 1
+        if remaining > 0:
+            _bundle_users[bundle_dir.name] = remaining
+        else:
+            _bundle_users.pop(bundle_dir.name, None)
+        try:
+            os.utime(bundle_dir)
+        except FileNotFoundError:
+            pass
+
+
+def sync_public_dir(bundle_dir: Path):
+    """Refresh a copied (non-symlinked) public dir before a render"""
+    public_copy = bundle_dir / "public"
+    if not public_copy.is_symlink():
+        shutil.copytree(REMOTION_DIR / "public", public_copy, dirs_exist_ok=True)
+
+
+async def ensure_bundle(
+    log: Callable[[str], Awaitable[None]],
+) -> Tuple[Optional[Path], float, bool]:
+    """Return (bundle_dir, seconds_spent_bundling, cache_hit) for the current code version
+
+    Bundles once per code version under remotion/build/<version>; renders then
+    reuse the bundle and only pay for rendering. Returns (None, seconds, False)
+    if bundling fails so callers can fall back to rendering from the entry point.
+    """
+    async with _bundle_lock:
+        version = await asyncio.to_thread(code_version)
+        bundle_dir = BUILD_DIR / version
+        meta_path = bundle_dir / "bundle_meta.json"
+        if (bundle_dir / "index.html").exists() and meta_path.exists():
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+            await log(f"♻️ Reusing Remotion bundle {version} (saves ~{meta.get('bundle_seconds', 0):.1f}s)")
+            await asyncio.to_thread(_prune_bundles, version)
+            return bundle_dir, 0.0, True
+
+        await log(f"📦 Bundling Remotion project (code version {version})...")
+        start = time.perf_counter()
+        tmp_dir = BUILD_DIR / f"{version}.tmp"
+        if tmp_dir.exists():
+            shutil.rmtree(tmp_dir)
+        BUILD_DIR.mkdir(parents=True, exist_ok=True)
+
+        process = await asyncio.create_subprocess_exec(
+            npm_command(), "run", "bundle", "--", f"--out-dir={tmp_dir}",
+            cwd=str(REMOTION_DIR),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+        )
+        output, _ = await process.communicate()
+        elapsed = time.perf_counter() - start
+
+        if process.returncode != 0 or not (tmp_dir / "index.html").exists():
+            await log(f"Warning: Remotion bundle failed, rendering from entry point: {output.decode(errors='replace')[-500:]}")
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return None, elapsed, False
+
+        _link_public_dir(tmp_dir)
+        with open(tmp_dir / "bundle_meta.json", "w") as f:
+            json.dump({"version": version, "bundle_seconds": elapsed, "created_at": time.time()}, f)
+        if bundle_dir.exists():
+            shutil.rmtree(bundle_dir)
+        os.replace(tmp_dir, bundle_dir)
+        await asyncio.to_thread(_prune_bundles, version)
+
+        await log(f"✓ Bundled in {elapsed:.1f}s; later renders reuse it")
+        return bundle_dir, elapsed, False
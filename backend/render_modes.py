@@ -0,0 +1,110 @@
+import json
+import math
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, List
+
+from lazy_imports import lazy
+from media import content_digest
+from storage import atomic_writer
+from storage_gc import PUBLIC_DIR, config_refs
+
+DRAFT_FORMATS = ("mp4", "gif", "contact_sheet")
+X264_PRESETS = ("ultrafast", "superfast", "veryfast", "faster", "fast", "medium")
+
+
+def validate_draft_settings(settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate draft render settings; returns {'valid', 'errors'}"""
+    errors = []
+    if not 0.1 <= settings["scale"] <= 1:
+        errors.append("scale must be between 0.1 and 1")
+    if not 1 <= settings["frame_stride"] <= 30:
+        errors.append("frame_stride must be between 1 and 30")
+    if settings["format"] not in DRAFT_FORMATS:
+        errors.append(f"format must be one of {', '.join(DRAFT_FORMATS)}")
+    if settings["preset"] not in X264_PRESETS:
+        errors.append(f"preset must be one of {', '.join(X264_PRESETS)}")
+    if not 1 <= settings["jpeg_quality"] <= 100:
+        errors.append("jpeg_quality must be between 1 and 100")
+    if not 0 <= settings["crf"] <= 51:
+        errors.append("crf must be between 0 and 51")
+    if not 1 <= settings["contact_sheet_columns"] <= 12:
+        errors.append("contact_sheet_columns must be between 1 and 12")
+    return {"valid": len(errors) == 0, "errors": errors}
+
+
+def apply_frame_stride(final_config: dict, duration_frames: int, stride: int):
+    """Return (config, duration) rendered at fps / stride
+
+    Remotion only skips frames for GIF output, so the stride is applied by
+    lowering the composition fps: every layer times itself in seconds, so the
+    draft shows the same motion with ``stride`` times fewer frames. The
+    precomputed timeline and motion tables are dropped because they are only
+    valid at the project fps.
+    """
+    if stride <= 1:
+        return final_config, duration_frames
+    config = dict(final_config)
+    settings = dict(config.get("project_settings") or {"fps": 30, "width": 1920, "height": 1080})
+    fps = settings.get("fps", 30)
+    draft_fps = max(1, round(fps / stride))
+    settings["fps"] = draft_fps
+    config["project_settings"] = settings
+    config.pop("timeline", None)
+    config.pop("motion", None)
+    return config, max(1, math.ceil(duration_frames * draft_fps / fps))
+
+
+def draft_cli_args(settings: Dict[str, Any]) -> List[str]:
+    """Remotion CLI flags for a draft render"""
+    args = ["--scale", str(settings["scale"]), "--jpeg-quality", str(settings["jpeg_quality"])]
+    if settings["format"] == "mp4":
+        args += ["--codec", "h264", "--crf", str(settings["crf"]), "--x264-preset", settings["preset"]]
+    else:
+        args += ["--codec", "gif"]
+    return args
+
+
+def draft_extension(settings: Dict[str, Any]) -> str:
+    return "mp4" if settings["format"] == "mp4" else "gif"
+
+
+def draft_cache_key(final_config: dict, duration_frames: int, settings: Dict[str, Any], code_version: str) -> str:
+    """Identify a draft by its inputs so an unchanged script reuses the cached output
+
+    The content of every public file the config uses is part of the key, so an
+    image or audio track regenerated at the same path renders a new draft.
+    Hashing reads the files on first use; call it off the event loop.
+    """
+    assets = {}
+    for ref in config_refs(final_config):
+        path = PUBLIC_DIR / ref
+        assets[ref] = content_digest(path) if path.is_file() else None
+    digest = hashlib.sha256()
+    digest.update(json.dumps(final_config, sort_keys=True).encode())
+    digest.update(json.dumps(assets, sort_keys=True).encode())
+    digest.update(json.dumps(settings, sort_keys=True).encode())
+    digest.update(f"{duration_frames}:{code_version}".encode())
+    return digest.hexdigest()[:16]
+
+
+def build_contact_sheet(gif_path: Path, output_path: Path, columns: int = 6, max_frames: int = 48) -> Path:
+    """Tile evenly spaced frames of a draft GIF into one PNG for quick review"""
+    Image = lazy.get("PIL.Image")
+    with Image.open(gif_path) as gif:
+        total = getattr(gif, "n_frames", 1)
+        count = min(total, max_frames)
+        indices = sorted({int(i * total / count) for i in range(count)})
+        frames = []
+        for index in indices:
+            gif.seek(index)
+            frames.append(gif.convert("RGB"))
+
+    width, height = frames[0].size
+    rows = math.ceil(len(frames) / columns)
+    sheet = Image.new("RGB", (columns * width, rows * height), (255, 255, 255))
+    for i, frame in enumerate(frames):
+        sheet.paste(frame, ((i % columns) * width, (i // columns) * height))
+    with atomic_writer(output_path, fsync=False) as f:
+        sheet.save(f, format="PNG", optimize=True)
+    return output_path
@@ -0,0 +1,230 @@
+import re
+import json
+import codecs
+import time
+import asyncio
+from collections import deque
+from pathlib import Path
+from typing import Awaitable, Callable, Deque, Dict, List, Optional
+
+METRICS_PATH = Path(__file__).parent / "cache" / "render_metrics.jsonl"
+
+# Remotion prints progress as "<stage> <bar> 120/540" or "Rendered 120/540, time
+# remaining: 12s"; both forms are accepted, with or without the progress bar.
+# The stage word must start the line and only bar characters may separate it
+# from the counts, so other output containing "1920/1080" is not progress.
+_LEAD = r"^(?:\x1b\[[\d;]*m|\s)*"
+_BAR = r"(?:\x1b\[[\d;]*m|[^\w%/])*"
+_FRAMES_RE = re.compile(
+    _LEAD + r"(?P<stage>render|encod|stitch)(?:ed|ing)(?:\s+frames)?" + _BAR + r"(?P<done>\d+)\s*/\s*(?P<total>\d+)",
+    re.IGNORECASE,
+)
+_PERCENT_RE = re.compile(
+    _LEAD + r"(?P<stage>bundl|render|encod|stitch|download)(?:ed|ing)(?:\s+[a-z][\w.-]*)*?" + _BAR + r"(?P<percent>\d+(?:\.\d+)?)\s*%",
+    re.IGNORECASE,
+)
+_ETA_RE = re.compile(r"(?:time remaining|eta)\W*(?P<eta>(?:\d+\s*[hms]\s*)+)", re.IGNORECASE)
+_DURATION_PART_RE = re.compile(r"(\d+)\s*([hms])")
+
+_STAGES = {"bundl": "bundling", "render": "rendering", "encod": "encoding", "stitch": "encoding", "download": "downloading"}
+# Share of overall progress given to frame rendering; encoding makes up the rest
+RENDER_WEIGHT = 0.85
+
+
+def _parse_duration(text: str) -> int:
+    units = {"h": 3600, "m": 60, "s": 1}
+    return sum(int(value) * units[unit] for value, unit in _DURATION_PART_RE.findall(text))
+
+
+def parse_progress_line(line: str) -> Optional[Dict]:
+    """Parse one line of Remotion CLI output into a progress event, or None
+
+    Events have a ``stage`` and, where printed, ``done``/``total`` frames,
+    ``percent`` and ``eta_seconds``.
+    """
+    event = None
+    match = _FRAMES_RE.search(line)
+    if match and int(match["done"]) > int(match["total"]):
+        # Not a frame count, whatever it looked like
+        match = None
+    if match:
+        done, total = int(match["done"]), int(match["total"])
+        event = {
+            "stage": _STAGES[match["stage"].lower()],
+            "done": done,
+            "total": total,
+            "percent": round(100 * done / total, 1) if total else None,
+        }
+    else:
+        match = _PERCENT_RE.search(line)
+        if match:
+            event = {"stage": _STAGES[match["stage"].lower()], "percent": min(float(match["percent"]), 100.0)}
+    eta = _ETA_RE.search(line)
+    if eta:
+        event = event or {"stage": "rendering"}
+        event["eta_seconds"] = _parse_duration(eta["eta"])
+    return event
+
+
+class ProgressTracker:
+    """Folds parsed events into one progress snapshot with measured fps and ETA"""
+
+    def __init__(self, total_frames: Optional[int] = None):
+        self.total_frames = total_frames
+        self.started_at = time.perf_counter()
+        self.stage = "queued"
+        self.frames_rendered = 0
+        self.frames_encoded = 0
+        self.encoding_percent: Optional[float] = None
+        self.eta_seconds: Optional[float] = None
+        self.first_frame_at: Optional[float] = None
+        self.last_frame_at: Optional[float] = None
+        self.render_done_at: Optional[float] = None
+        self.encode_started_at: Optional[float] = None
+
+    def update(self, event: Dict) -> bool:
+        """Apply an event; returns True when the stage changed"""
+        now = time.perf_counter()
+        previous_stage = self.stage
+        self.stage = event["stage"]
+        if self.stage == "rendering" and "done" in event:
+            self.total_frames = event.get("total") or self.total_frames
+            if event["done"] > 0 and self.first_frame_at is None:
+                self.first_frame_at = now
+            if event["done"] > self.frames_rendered:
+                self.frames_rendered = event["done"]
+                self.last_frame_at = now
+            if self.total_frames and self.frames_rendered >= self.total_frames and self.render_done_at is None:
+                self.render_done_at = now
+        elif self.stage == "encoding":
+            if self.encode_started_at is None:
+                self.encode_started_at = now
+                self.render_done_at = self.render_done_at or now
+            if "done" in event:
+                self.frames_encoded = max(self.frames_encoded, event["done"])
+            if event.get("percent") is not None:
+                self.encoding_percent = event["percent"]
+        if "eta_seconds" in event:
+            self.eta_seconds = event["eta_seconds"]
+        elif self.stage == "rendering":
+            fps = self.fps
+            if fps and self.total_frames:
+                self.eta_seconds = round((self.total_frames - self.frames_rendered) / fps, 1)
+        return self.stage != previous_stage
+
+    @property
+    def fps(self) -> Optional[float]:
+        """Frames rendered per second, measured from the first rendered frame"""
+        if self.first_frame_at is None or self.frames_rendered < 2:
+            return None
+        end = self.render_done_at or self.last_frame_at
+        elapsed = end - self.first_frame_at
+        return round(self.frames_rendered / elapsed, 2) if elapsed > 0 else None
+
+    @property
+    def percent(self) -> float:
+        render_share = self.frames_rendered / self.total_frames if self.total_frames else 0
+        if self.stage == "encoding":
+            render_share = 1
+        encode_share = (self.encoding_percent or 0) / 100
+        if self.encoding_percent is None and self.frames_encoded and self.total_frames:
+            encode_share = self.frames_encoded / self.total_frames
+        return round(100 * (RENDER_WEIGHT * min(render_share, 1) + (1 - RENDER_WEIGHT) * min(encode_share, 1)), 1)
+
+    def finish(self, stage: str = "done"):
+        self.stage = stage
+        self.eta_seconds = 0 if stage == "done" else None
+        if self.first_frame_at is not None and self.render_done_at is None:
+            self.render_done_at = self.last_frame_at
+
+    def snapshot(self) -> Dict:
+        now = time.perf_counter()
+        encode_seconds = None
+        if self.encode_started_at is not None:
+            encode_seconds = round(now - self.encode_started_at, 2)
+        return {
+            "stage": self.stage,
+            "percent": 100.0 if self.stage == "done" else self.percent,
+            "frames_rendered": self.frames_rendered,
+            "frames_encoded": self.frames_encoded,
+            "total_frames": self.total_frames,
+            "encoding_percent": self.encoding_percent,
+            "fps": self.fps,
+            "eta_seconds": self.eta_seconds,
+            "elapsed_seconds": round(now - self.started_at, 2),
+            "encode_seconds": encode_seconds,
+        }
+
+
+async def _read_lines(stream: asyncio.StreamReader, on_line: Callable[[str], Awaitable[None]]):
+    """Read until EOF, splitting on both newlines and the carriage returns progress bars use"""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    buffer = ""
+    while True:
+        chunk = await stream.read(4096)
+        if not chunk:
+            break
+        buffer += decoder.decode(chunk)
+        parts = re.split(r"[\r\n]", buffer)
+        buffer = parts.pop()
+        for part in parts:
+            if part.strip():
+                await on_line(part.strip())
+    if buffer.strip():
+        await on_line(buffer.strip())
+
+
+async def drain_process(
+    process: asyncio.subprocess.Process,
+    on_stdout: Callable[[str], Awaitable[None]],
+    on_stderr: Callable[[str], Awaitable[None]],
+    tail: int = 20,
+) -> List[str]:
+    """Consume stdout and stderr concurrently until the process exits
+
+    Reading only one pipe lets the other fill up and stall the child, so both
+    are drained together. Returns the last ``tail`` stderr lines for error
+    reporting.
+    """
+    stderr_tail: Deque[str] = deque(maxlen=tail)
+
+    async def _stderr(line: str):
+        stderr_tail.append(line)
+        await on_stderr(line)
+
+    await asyncio.gather(_read_lines(process.stdout, on_stdout), _read_lines(process.stderr, _stderr))
+    await process.wait()
+    return list(stderr_tail)
+
+
+def record_render_metrics(entry: Dict):
+    """Append one finished render's throughput to the metrics log for capacity planning"""
+    METRICS_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(METRICS_PATH, "a") as f:
+        f.write(json.dumps({"recorded_at": time.time(), **entry}) + "\n")
+
+
+def render_fps_summary(limit: int = 200) -> Dict[str, Dict]:
+    """Mean and latest fps per lane (and non-default engine) over the most recent ``limit`` renders"""
+    if not METRICS_PATH.exists():
+        return {}
+    with open(METRICS_PATH, "r") as f:
+        lines = deque(f, maxlen=limit)
+    summary: Dict[str, Dict] = {}
+    for line in lines:
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if not entry.get("fps"):
+            continue
+        key = entry.get("lane", "final")
+        if entry.get("engine", "remotion") != "remotion":
+            key = f"{key}/{entry['engine']}"
+        lane = summary.setdefault(key, {"renders": 0, "total_fps": 0.0})
+        lane["renders"] += 1
+        lane["total_fps"] += entry["fps"]
+        lane["latest_fps"] = entry["fps"]
+    for lane in summary.values():
+        lane["mean_fps"] = round(lane.pop("total_fps") / lane["renders"], 2)
+    return summary
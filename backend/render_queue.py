@@ -0,0 +1,397 @@
+import os
+import time
+import uuid
+import signal
+import asyncio
+import weakref
+import subprocess
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+# Lower value is served first; drafts are short and interactive
+LANES = {"draft": 0, "final": 1}
+
+# Peak resident memory of one render (Chrome + Node with --max-old-space-size=1536)
+DEFAULT_MEMORY_MB = {"draft": 900, "final": 1800}
+# A queued final render is promoted ahead of drafts after waiting this long
+DEFAULT_AGING_SECONDS = 120
+KILL_GRACE_SECONDS = 5
+
+
+class RenderError(Exception):
+    """A render job failed; the message is reported as the job error"""
+
+
+def available_memory_mb() -> Optional[float]:
+    """Memory available to this container in MiB, or None when it cannot be read
+
+    Uses MemAvailable from /proc/meminfo, capped by the cgroup v2 limit so a
+    container does not see the host's free memory as its own.
+    """
+    available = None
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    available = int(line.split()[1]) / 1024
+                    break
+    except OSError:
+        return None
+    try:
+        limit = Path("/sys/fs/cgroup/memory.max").read_text().strip()
+        if limit != "max":
+            current = int(Path("/sys/fs/cgroup/memory.current").read_text().strip())
+            cgroup_available = (int(limit) - current) / (1024 * 1024)
+            available = cgroup_available if available is None else min(available, cgroup_available)
+    except (OSError, ValueError):
+        pass
+    return available
+
+
+def load_per_cpu() -> Optional[float]:
+    """1-minute load average divided by CPU count, or None where unsupported"""
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        return None
+
+
+# Process group of each process RenderJob.spawn started in a new session. The
+# group outlives its leader: npm can exit while node, Chrome or ffmpeg still run
+_process_groups: "weakref.WeakKeyDictionary[asyncio.subprocess.Process, int]" = weakref.WeakKeyDictionary()
+
+
+def _signal_group(process: asyncio.subprocess.Process, sig: int):
+    pgid = _process_groups.get(process)
+    if pgid is None:
+        if process.returncode is not None:
+            return
+        pgid = process.pid
+    try:
+        os.killpg(pgid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _group_alive(process: asyncio.subprocess.Process) -> bool:
+    """Whether the recorded process group of ``process`` still has members"""
+    pgid = _process_groups.get(process)
+    if pgid is None or os.name == "nt":
+        return False
+    try:
+        os.killpg(pgid, 0)
+        return True
+    except (ProcessLookupError, PermissionError):
+        return False
+
+
+def kill_process_tree(process: asyncio.subprocess.Process):
+    """Terminate a render and everything it spawned (npm -> node -> Chrome, ffmpeg)"""
+    if os.name == "nt":
+        if process.returncode is None:
+            subprocess.run(["taskkill", "/T", "/F", "/PID", str(process.pid)], capture_output=True)
+        return
+    _signal_group(process, signal.SIGTERM)
+
+
+def _force_kill(process: asyncio.subprocess.Process):
+    if os.name != "nt":
+        _signal_group(process, signal.SIGKILL)
+
+
+class RenderJob:
+    """One queued render; ``run`` does the work and returns the result payload
+
+    ``browsers`` is how many headless browsers the job runs at once (scene
+    stills render several frames in parallel); admission budgets for all of them.
+    """
+
+    def __init__(self, project_id: str, lane: str, run: Callable[["RenderJob"], Awaitable[dict]],
+                 description: str = "", browsers: int = 1):
+        self.id = uuid.uuid4().hex[:12]
+        self.project_id = project_id
+        self.lane = lane
+        self.description = description
+        self.browsers = max(1, browsers)
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Optional[dict] = None
+        self.error: Optional[str] = None
+        self.processes: List[asyncio.subprocess.Process] = []
+        self.progress: Dict[str, Any] = {"stage": QUEUED}
+        self._subscribers: List[asyncio.Queue] = []
+        self._run = run
+        self._task: Optional[asyncio.Task] = None
+        self._done = asyncio.Event()
+
+    async def spawn(self, *cmd: str, cwd: str, **kwargs) -> asyncio.subprocess.Process:
+        """Start a subprocess in its own process group so cancel can kill the whole tree"""
+        if self.status == CANCELLED:
+            raise asyncio.CancelledError()
+        if os.name == "nt":
+            kwargs.setdefault("creationflags", subprocess.CREATE_NEW_PROCESS_GROUP)
+        else:
+            kwargs.setdefault("start_new_session", True)
+        process = await asyncio.create_subprocess_exec(*cmd, cwd=cwd, **kwargs)
+        if kwargs.get("start_new_session"):
+            # Session leader: its pid is the group id, valid even after it exits
+            _process_groups[process] = process.pid
+        self.processes.append(process)
+        return process
+
+    def subscribe(self) -> asyncio.Queue:
+        """Queue receiving this job's progress and status events until it finishes"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=100)
+        self._subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        if queue in self._subscribers:
+            self._subscribers.remove(queue)
+
+    def publish(self, event_type: str, **data):
+        """Send an event to subscribers, dropping the oldest if a slow client falls behind"""
+        event = {"type": event_type, "job_id": self.id, "status": self.status, **data}
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    def set_progress(self, progress: Dict[str, Any]):
+        self.progress = progress
+        self.publish("render_progress", progress=progress)
+
+    async def wait(self) -> "RenderJob":
+        await self._done.wait()
+        return self
+
+    def to_dict(self, position: Optional[int] = None) -> Dict[str, Any]:
+        now = time.time()
+        data = {
+            "job_id": self.id,
+            "project_id": self.project_id,
+            "lane": self.lane,
+            "status": self.status,
+            "description": self.description,
+            "browsers": self.browsers,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "wait_seconds": round((self.started_at or now) - self.created_at, 2),
+            "run_seconds": round((self.finished_at or now) - self.started_at, 2) if self.started_at else None,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+        }
+        if position is not None:
+            data["position"] = position
+        return data
+
+
+class RenderQueue:
+    """Priority queue for Chrome-heavy renders with resource-aware admission
+
+    Jobs wait in per-lane FIFO order (drafts before finals, with aging so
+    finals are not starved) and start only while the browsers they run stay within
+    ``max_concurrent`` and there is enough free memory and CPU headroom for
+    the lane. One job is always admitted when nothing is running so a small
+    machine still makes progress.
+
+    Jobs live in this process only: with several API workers a job is only
+    visible (polled, streamed, cancelled) on the worker that accepted it, so
+    run the API as a single worker when rendering.
+    """
+
+    def __init__(self, max_concurrent: int = 2, memory_mb: Optional[Dict[str, int]] = None,
+                 max_load_per_cpu: float = 1.5, aging_seconds: float = DEFAULT_AGING_SECONDS,
+                 poll_interval: float = 2.0, history: int = 200):
+        self.max_concurrent = max_concurrent
+        self.memory_mb = {**DEFAULT_MEMORY_MB, **(memory_mb or {})}
+        self.max_load_per_cpu = max_load_per_cpu
+        self.aging_seconds = aging_seconds
+        self.poll_interval = poll_interval
+        self.history = history
+        self.jobs: Dict[str, RenderJob] = {}
+        self._queued: List[RenderJob] = []
+        self._running: Dict[str, RenderJob] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self.last_block_reason: Optional[str] = None
+
+    @classmethod
+    def from_env(cls) -> "RenderQueue":
+        """Build a queue from RENDER_* environment variables"""
+        return cls(
+            max_concurrent=int(os.getenv("RENDER_MAX_CONCURRENT", "2")),
+            memory_mb={
+                "draft": int(os.getenv("RENDER_DRAFT_MEMORY_MB", DEFAULT_MEMORY_MB["draft"])),
+                "final": int(os.getenv("RENDER_FINAL_MEMORY_MB", DEFAULT_MEMORY_MB["final"])),
+            },
+            max_load_per_cpu=float(os.getenv("RENDER_MAX_LOAD_PER_CPU", "1.5")),
+        )
+
+    def submit(self, project_id: str, lane: str, run: Callable[[RenderJob], Awaitable[dict]],
+               description: str = "", browsers: int = 1) -> RenderJob:
+        if lane not in LANES:
+            raise ValueError(f"Unknown render lane '{lane}'; use one of {', '.join(LANES)}")
+        job = RenderJob(project_id, lane, run, description, browsers)
+        self.jobs[job.id] = job
+        self._queued.append(job)
+        self._prune_history()
+        self._ensure_dispatcher()
+        self._wakeup.set()
+        return job
+
+    def get(self, job_id: str) -> Optional[RenderJob]:
+        return self.jobs.get(job_id)
+
+    def position(self, job: RenderJob) -> Optional[int]:
+        """0-based place in the dispatch order, or None once the job has started"""
+        if job.status != QUEUED:
+            return None
+        ordered = sorted(self._queued, key=self._priority)
+        return ordered.index(job) if job in ordered else None
+
+    def list(self, project_id: Optional[str] = None) -> List[dict]:
+        jobs = [j for j in self.jobs.values() if project_id is None or j.project_id == project_id]
+        jobs.sort(key=lambda j: j.created_at, reverse=True)
+        return [j.to_dict(self.position(j)) for j in jobs]
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job; running jobs have their process tree killed"""
+        job = self.jobs.get(job_id)
+        if not job or job.status in FINISHED:
+            return False
+        if job.status == QUEUED:
+            self._queued.remove(job)
+            self._finish(job, CANCELLED, error="Cancelled before start")
+            return True
+        job.status = CANCELLED
+        for process in job.processes:
+            kill_process_tree(process)
+        if job._task:
+            job._task.cancel()
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": {lane: sum(1 for j in self._queued if j.lane == lane) for lane in LANES},
+            "running": {lane: sum(1 for j in self._running.values() if j.lane == lane) for lane in LANES},
+            "browsers": sum(j.browsers for j in self._running.values()),
+            "max_concurrent": self.max_concurrent,
+            "available_memory_mb": available_memory_mb(),
+            "load_per_cpu": load_per_cpu(),
+            "blocked_by": self.last_block_reason if self._queued else None,
+        }
+
+    def _priority(self, job: RenderJob):
+        lane_priority = LANES[job.lane]
+        if time.time() - job.created_at >= self.aging_seconds:
+            lane_priority = 0
+        return lane_priority, job.created_at
+
+    def _admission_block(self, job: RenderJob) -> Optional[str]:
+        """Why ``job`` cannot start right now, or None if it can"""
+        if not self._running:
+            return None
+        browsers = sum(j.browsers for j in self._running.values())
+        if browsers + job.browsers > self.max_concurrent:
+            return f"{browsers} browser(s) rendering, {job.browsers} more needed (limit {self.max_concurrent})"
+        # Running renders may not have reached peak memory yet; reserve for them too
+        free = available_memory_mb()
+        if free is not None:
+            needed = self.memory_mb[job.lane] * job.browsers + sum(
+                self.memory_mb[j.lane] * j.browsers / 2 for j in self._running.values()
+            )
+            if free < needed:
+                return f"{free:.0f} MiB free, {needed:.0f} MiB needed"
+        load = load_per_cpu()
+        if load is not None and load > self.max_load_per_cpu:
+            return f"CPU load {load:.2f} per core exceeds {self.max_load_per_cpu}"
+        return None
+
+    def _ensure_dispatcher(self):
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch_loop())
+
+    async def _dispatch_loop(self):
+        while True:
+            self._wakeup.clear()
+            while self._queued:
+                job = min(self._queued, key=self._priority)
+                reason = self._admission_block(job)
+                if reason:
+                    if reason != self.last_block_reason:
+                        print(f"Render queue waiting: {reason}")
+                    self.last_block_reason = reason
+                    break
+                self.last_block_reason = None
+                self._queued.remove(job)
+                self._start(job)
+            try:
+                # Re-check resources periodically while jobs are waiting
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval if self._queued else None)
+            except asyncio.TimeoutError:
+                pass
+
+    def _start(self, job: RenderJob):
+        job.status = RUNNING
+        job.started_at = time.time()
+        job.publish("render_status")
+        self._running[job.id] = job
+        job._task = asyncio.create_task(self._execute(job))
+
+    async def _execute(self, job: RenderJob):
+        try:
+            result = await job._run(job)
+            self._finish(job, SUCCEEDED, result=result)
+        except asyncio.CancelledError:
+            self._finish(job, CANCELLED, error="Cancelled")
+        except Exception as e:
+            self._finish(job, FAILED, error=str(e))
+        finally:
+            # A clean exit needs no signals; its group id may already belong to someone else
+            if job.status != SUCCEEDED:
+                for process in job.processes:
+                    kill_process_tree(process)
+                await self._reap(job)
+            self._running.pop(job.id, None)
+            self._wakeup.set()
+
+    async def _reap(self, job: RenderJob):
+        """Wait briefly for killed processes and their children, then SIGKILL stragglers"""
+        deadline = time.monotonic() + KILL_GRACE_SECONDS
+        for process in job.processes:
+            try:
+                await asyncio.wait_for(process.wait(), timeout=max(0.0, deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                pass
+            # Chrome or ffmpeg can outlive the npm/node leader; they share the rest of the grace
+            while _group_alive(process) and time.monotonic() < deadline:
+                await asyncio.sleep(0.1)
+            if process.returncode is None or _group_alive(process):
+                _force_kill(process)
+
+    def _finish(self, job: RenderJob, status: str, result: Optional[dict] = None, error: Optional[str] = None):
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished_at = time.time()
+        job.publish("render_status", result=result, error=error)
+        job._done.set()
+
+    def _prune_history(self):
+        finished = [j for j in self.jobs.values() if j.status in FINISHED]
+        for job in sorted(finished, key=lambda j: j.created_at)[:max(0, len(finished) - self.history)]:
+            del self.jobs[job.id]
@@ -97,3 +97,96 @@ def validate_new_schema(data):
         'valid': len(errors) == 0,
         'errors': errors
     }
+
+
+def _validate_interval_table(table, name, errors):
+    """Validate a {bounds, active} table emitted by timeline.build_interval_table"""
+    if not isinstance(table, dict):
+        errors.append(f"timeline.{name} must be an object")
+        return
+    bounds = table.get('bounds')
+    active = table.get('active')
+    if not isinstance(bounds, list) or not all(isinstance(b, int) for b in bounds):
+        errors.append(f"timeline.{name}.bounds must be an array of integer frames")
+        return
+    if any(b >= a for b, a in zip(bounds, bounds[1:])):
+        errors.append(f"timeline.{name}.bounds must be strictly increasing")
+    if not isinstance(active, list) or len(active) != len(bounds):
+        errors.append(f"timeline.{name}.active must be an array with one entry per bound")
+    elif not all(isinstance(entry, list) for entry in active):
+        errors.append(f"timeline.{name}.active entries must be arrays")
+    elif bounds and active[-1]:
+        errors.append(f"timeline.{name}.active must be empty after the last bound")
+
+
+def validate_timeline_index(timeline, scene_count, subtitle_count):
+    """Validate the precomputed timeline index embedded in final_render.json"""
+    errors = []
+
+    if not isinstance(timeline, dict):
+        return {'valid': False, 'errors': ["timeline must be an object"]}
+
+    if not isinstance(timeline.get('fps'), (int, float)) or timeline.get('fps') <= 0:
+        errors.append("timeline.fps must be a positive number")
+
+    for name in ('scenes', 'subtitles', 'words'):
+        _validate_interval_table(timeline.get(name), name, errors)
+
+    if not errors:
+        for entry in timeline['scenes']['active']:
+            if any(not isinstance(i, int) or not 0 <= i < scene_count for i in entry):
+                errors.append("timeline.scenes.active references an unknown scene index")
+                break
+        for entry in timeline['subtitles']['active']:
+            if any(not isinstance(i, int) or not 0 <= i < subtitle_count for i in entry):
+                errors.append("timeline.subtitles.active references an unknown subtitle index")
+                break
+        for entry in timeline['words']['active']:
+            if any(not isinstance(ref, list) or len(ref) != 2 or not 0 <= ref[0] < subtitle_count for ref in entry):
+                errors.append("timeline.words.active entries must be [subtitle, index] pairs")
+                break
+
+    subtitle_scene = timeline.get('subtitle_scene')
+    if not isinstance(subtitle_scene, list) or len(subtitle_scene) != subtitle_count:
+        errors.append("timeline.subtitle_scene must have one entry per subtitle")
+    elif any(s is not None and (not isinstance(s, int) or not 0 <= s < scene_count) for s in subtitle_scene):
+        errors.append("timeline.subtitle_scene references an unknown scene index")
+
+    return {
+        'valid': len(errors) == 0,
+        'errors': errors
+    }
+
+
+def validate_motion_tables(motion):
+    """Validate the precomputed animation tables embedded in final_render.json"""
+    errors = []
+
+    if not isinstance(motion, dict):
+        return {'valid': False, 'errors': ["motion must be an object"]}
+
+    if not isinstance(motion.get('fps'), (int, float)) or motion.get('fps') <= 0:
+        errors.append("motion.fps must be a positive number")
+
+    springs = motion.get('springs')
+    if not isinstance(springs, dict) or not isinstance(springs.get('asset'), list) or not springs['asset']:
+        errors.append("motion.springs.asset must be a non-empty list")
+    elif any(not isinstance(table, list) or not table for table in springs.values()):
+        errors.append("motion.springs entries must be non-empty lists")
+
+    idle_frames = motion.get('idle_frames')
+    for group in ('entrances', 'idles'):
+        presets = motion.get(group)
+        if not isinstance(presets, dict):
+            errors.append(f"motion.{group} must be an object")
+            continue
+        for name, channels in presets.items():
+            if not isinstance(channels, dict) or any(not isinstance(values, list) for values in channels.values()):
+                errors.append(f"motion.{group}.{name} must map channel names to lists")
+            elif group == 'idles' and any(len(values) != idle_frames for values in channels.values()):
+                errors.append(f"motion.idles.{name} must cover motion.idle_frames frames")
+
+    return {
+        'valid': len(errors) == 0,
+        'errors': errors
+    }
@@ -0,0 +1,220 @@
+import copy
+import json
+from typing import Any, Dict, List, Optional
+
+from asset_plan import plan_assets
+
+
+class PatchError(ValueError):
+    """A JSON patch operation that cannot be applied to the script"""
+
+
+def _pointer(path: str) -> List[str]:
+    """Split an RFC 6901 JSON pointer into unescaped tokens"""
+    if path == "":
+        return []
+    if not path.startswith("/"):
+        raise PatchError(f"Invalid JSON pointer: {path!r}")
+    return [token.replace("~1", "/").replace("~0", "~") for token in path[1:].split("/")]
+
+
+def _index(container: list, token: str, allow_end: bool = False) -> int:
+    if allow_end and token == "-":
+        return len(container)
+    if not token.isdigit() or (len(token) > 1 and token.startswith("0")):
+        raise PatchError(f"Invalid array index: {token!r}")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise PatchError(f"Array index out of range: {index}")
+    return index
+
+
+def _resolve(doc: Any, tokens: List[str]) -> Any:
+    for token in tokens:
+        if isinstance(doc, dict):
+            if token not in doc:
+                raise PatchError(f"Path not found: /{'/'.join(tokens)}")
+            doc = doc[token]
+        elif isinstance(doc, list):
+            doc = doc[_index(doc, token)]
+        else:
+            raise PatchError(f"Path not found: /{'/'.join(tokens)}")
+    return doc
+
+
+def _add(doc: Any, tokens: List[str], value: Any) -> Any:
+    if not tokens:
+        return value
+    parent = _resolve(doc, tokens[:-1])
+    if isinstance(parent, dict):
+        parent[tokens[-1]] = value
+    elif isinstance(parent, list):
+        parent.insert(_index(parent, tokens[-1], allow_end=True), value)
+    else:
+        raise PatchError(f"Cannot add to a scalar at /{'/'.join(tokens[:-1])}")
+    return doc
+
+
+def _remove(doc: Any, tokens: List[str]) -> Any:
+    if not tokens:
+        raise PatchError("Cannot remove the whole script")
+    parent = _resolve(doc, tokens[:-1])
+    if isinstance(parent, dict):
+        if tokens[-1] not in parent:
+            raise PatchError(f"Path not found: /{'/'.join(tokens)}")
+        return parent.pop(tokens[-1])
+    if isinstance(parent, list):
+        return parent.pop(_index(parent, tokens[-1]))
+    raise PatchError(f"Path not found: /{'/'.join(tokens)}")
+
+
+def apply_json_patch(document: dict, operations: List[dict]) -> dict:
+    """Apply an RFC 6902 JSON patch to a copy of ``document``
+
+    Supports add, remove, replace, move, copy and test. The patch is applied
+    all-or-nothing: the first failing operation raises PatchError and the
+    original document is left untouched.
+    """
+    doc = copy.deepcopy(document)
+    for number, operation in enumerate(operations):
+        if not isinstance(operation, dict) or "op" not in operation or "path" not in operation:
+            raise PatchError(f"Operation {number}: needs 'op' and 'path'")
+        op = operation["op"]
+        tokens = _pointer(operation["path"])
+        try:
+            if op in ("add", "replace", "test") and "value" not in operation:
+                raise PatchError("missing 'value'")
+            if op == "add":
+                doc = _add(doc, tokens, copy.deepcopy(operation["value"]))
+            elif op == "remove":
+                _remove(doc, tokens)
+            elif op == "replace":
+                _resolve(doc, tokens)
+                if tokens:
+                    _remove(doc, tokens)
+                doc = _add(doc, tokens, copy.deepcopy(operation["value"]))
+            elif op in ("move", "copy"):
+                if "from" not in operation:
+                    raise PatchError("missing 'from'")
+                source = _pointer(operation["from"])
+                if op == "move":
+                    if tokens[:len(source)] == source and tokens != source:
+                        raise PatchError("cannot move a value into one of its own children")
+                    value = _remove(doc, source)
+                else:
+                    value = copy.deepcopy(_resolve(doc, source))
+                doc = _add(doc, tokens, value)
+            elif op == "test":
+                if _resolve(doc, tokens) != operation["value"]:
+                    raise PatchError(f"test failed at {operation['path']}")
+            else:
+                raise PatchError(f"unknown op {op!r}")
+        except PatchError as e:
+            raise PatchError(f"Operation {number} ({op} {operation['path']}): {str(e)}")
+    if not isinstance(doc, dict):
+        raise PatchError("Patched script must be a JSON object")
+    return doc
+
+
+def _canonical(value: Any) -> str:
+    return json.dumps(value, sort_keys=True)
+
+
+def _scene_content(scene: dict) -> str:
+    """A scene without the fields the builder fills in, for comparison"""
+    if not isinstance(scene, dict):
+        return _canonical(scene)
+    elements = [
+        {k: v for k, v in element.items() if k != "local_path"} if isinstance(element, dict) else element
+        for element in scene.get("elements") or []
+    ]
+    return _canonical({**scene, "elements": elements})
+
+
+def _by_id(items: Any, prefix: str) -> Dict[str, Any]:
+    keyed = {}
+    for index, item in enumerate(items if isinstance(items, list) else []):
+        item_id = item.get("id") if isinstance(item, dict) else None
+        keyed[str(item_id) if item_id is not None else f"{prefix}{index}"] = item
+    return keyed
+
+
+def _subtitle_span(subtitle: dict) -> Optional[tuple]:
+    """(start, end) seconds covered by a subtitle line's words"""
+    times = [
+        (word.get("start"), word.get("end"))
+        for line in subtitle.get("lines") or [] if isinstance(line, dict)
+        for word in line.get("words") or [] if isinstance(word, dict)
+    ]
+    times = [(s, e) for s, e in times if isinstance(s, (int, float)) and isinstance(e, (int, float))]
+    if not times:
+        return None
+    return min(s for s, _ in times), max(e for _, e in times)
+
+
+def _scenes_at(scenes: List[dict], span: Optional[tuple]) -> List[str]:
+    """Ids of the scenes overlapping a time span; every scene if the span is unknown"""
+    hits = []
+    for index, scene in enumerate(scenes):
+        if not isinstance(scene, dict):
+            continue
+        scene_id = str(scene.get("id", f"scene_{index}"))
+        start, duration = scene.get("start"), scene.get("duration")
+        if span is None or not isinstance(start, (int, float)) or not isinstance(duration, (int, float)):
+            hits.append(scene_id)
+        elif start < span[1] and span[0] < start + duration:
+            hits.append(scene_id)
+    return hits
+
+
+def diff_scripts(old: dict, new: dict) -> Dict:
+    """What an edit from ``old`` to ``new`` invalidates
+
+    Assets are compared through the generation plan, so an element only
+    counts as changed when its (prompt, role, model) asset changes:
+    ``stale_assets`` are asset ids that now stand for a different image and
+    must be regenerated, ``removed_assets`` are no longer referenced.
+    ``changed_scenes`` are the scenes whose render output differs: edited,
+    added or re-timed scenes plus the scenes under an edited subtitle line.
+    ``full`` is set when project-wide settings or audio changed.
+    """
+    old_plan = {a["asset_id"]: a["key"] for a in plan_assets(old, True)["assets"]}
+    new_plan = {a["asset_id"]: a["key"] for a in plan_assets(new, True)["assets"]}
+    stale_assets = sorted(aid for aid, key in new_plan.items() if aid in old_plan and old_plan[aid] != key)
+    added_assets = sorted(aid for aid in new_plan if aid not in old_plan)
+    removed_assets = sorted(aid for aid in old_plan if aid not in new_plan)
+
+    new_scenes = [s for s in new.get("scenes") or [] if isinstance(s, dict)]
+    old_by_id = _by_id(old.get("scenes"), "scene_")
+    new_by_id = _by_id(new.get("scenes"), "scene_")
+    changed = {
+        scene_id for scene_id, scene in new_by_id.items()
+        if scene_id not in old_by_id or _scene_content(old_by_id[scene_id]) != _scene_content(scene)
+    }
+    removed_scenes = sorted(scene_id for scene_id in old_by_id if scene_id not in new_by_id)
+
+    old_subs = _by_id(old.get("subtitles"), "subtitle_")
+    new_subs = _by_id(new.get("subtitles"), "subtitle_")
+    changed_subtitles = sorted(
+        sub_id for sub_id in set(old_subs) | set(new_subs)
+        if _canonical(old_subs.get(sub_id)) != _canonical(new_subs.get(sub_id))
+    )
+    for sub_id in changed_subtitles:
+        # Both the old and the new timing of an edited line may show on screen
+        for subtitle in (old_subs.get(sub_id), new_subs.get(sub_id)):
+            if isinstance(subtitle, dict):
+                changed.update(_scenes_at(new_scenes, _subtitle_span(subtitle)))
+
+    full = any(_canonical(old.get(field)) != _canonical(new.get(field)) for field in ("project_settings", "audio_path"))
+    if full:
+        changed.update(_scenes_at(new_scenes, None))
+
+    return {
+        "changed_scenes": [scene_id for scene_id in new_by_id if scene_id in changed],
+        "removed_scenes": removed_scenes,
+        "changed_subtitles": changed_subtitles,
+        "stale_assets": stale_assets,
+        "added_assets": added_assets,
+        "removed_assets": removed_assets,
+        "full": full,
+    }
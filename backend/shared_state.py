@@ -0,0 +1,531 @@
+import os
+import abc
+import time
+import uuid
+import socket
+import asyncio
+import sqlite3
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from lazy_imports import lazy
+from storage import dumps, loads
+
+DEFAULT_SQLITE_PATH = Path("projects") / "shared_state.db"
+# How often SQLite subscribers poll for new events, and how long events are kept
+POLL_INTERVAL = 0.05
+EVENT_TTL_SECONDS = 60
+
+# Identifies this process in lock owners and published messages
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class SharedState(abc.ABC):
+    """State shared by every API worker: a versioned key-value store, leases and pub/sub
+
+    Values are JSON documents grouped by namespace. Every write bumps the
+    namespace sequence so workers can cheaply pull ``changes`` since the last
+    sequence they saw. Locks are leases with a TTL that the holder refreshes,
+    so a crashed worker's locks expire on their own.
+    """
+
+    # False for the in-process backend: other workers cannot see this state
+    shared = True
+    backend = "base"
+
+    @abc.abstractmethod
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        ...
+
+    @abc.abstractmethod
+    def put(self, namespace: str, key: str, value: Any) -> int:
+        ...
+
+    @abc.abstractmethod
+    def delete(self, namespace: str, key: str) -> int:
+        ...
+
+    @abc.abstractmethod
+    def update(self, namespace: str, key: str, mutate: Callable[[Optional[Any]], Optional[Any]]) -> Optional[Any]:
+        """Atomically replace a value with ``mutate(current)``; returning None deletes it"""
+
+    @abc.abstractmethod
+    def items(self, namespace: str) -> Dict[str, Any]:
+        ...
+
+    @abc.abstractmethod
+    def sequence(self, namespace: str) -> int:
+        """Latest write sequence of a namespace"""
+
+    @abc.abstractmethod
+    def changes(self, namespace: str, since: int) -> Tuple[int, Dict[str, Optional[Any]]]:
+        """Keys written after sequence ``since`` (None for deleted) and the latest sequence"""
+
+    @abc.abstractmethod
+    def acquire_lock(self, name: str, owner: str, ttl: float) -> bool:
+        ...
+
+    @abc.abstractmethod
+    def refresh_lock(self, name: str, owner: str, ttl: float) -> bool:
+        ...
+
+    @abc.abstractmethod
+    def release_lock(self, name: str, owner: str) -> bool:
+        ...
+
+    @abc.abstractmethod
+    def lock_owner(self, name: str) -> Optional[str]:
+        ...
+
+    @abc.abstractmethod
+    def publish(self, channel: str, message: dict):
+        ...
+
+    @abc.abstractmethod
+    def subscribe(self, channel: str) -> AsyncIterator[dict]:
+        """Async iterator over messages published to ``channel`` after subscribing"""
+
+    def close(self):
+        pass
+
+    def describe(self) -> dict:
+        return {"backend": self.backend, "shared": self.shared, "worker_id": WORKER_ID}
+
+
+class LocalState(SharedState):
+    """In-process backend for a single worker; the default when nothing is configured"""
+
+    shared = False
+    backend = "local"
+
+    def __init__(self):
+        self._data: Dict[str, Dict[str, Any]] = defaultdict(dict)
+        self._seqs: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._counters: Dict[str, int] = defaultdict(int)
+        self._locks: Dict[str, Tuple[str, float]] = {}
+        self._subscribers: Dict[str, List[asyncio.Queue]] = defaultdict(list)
+        self._mutex = threading.RLock()
+
+    def get(self, namespace, key):
+        with self._mutex:
+            return self._data[namespace].get(key)
+
+    def _write(self, namespace, key, value) -> int:
+        self._counters[namespace] += 1
+        seq = self._counters[namespace]
+        if value is None:
+            self._data[namespace].pop(key, None)
+        else:
+            self._data[namespace][key] = loads(dumps(value))
+        self._seqs[namespace][key] = seq
+        return seq
+
+    def put(self, namespace, key, value):
+        with self._mutex:
+            return self._write(namespace, key, value)
+
+    def delete(self, namespace, key):
+        with self._mutex:
+            return self._write(namespace, key, None)
+
+    def update(self, namespace, key, mutate):
+        with self._mutex:
+            value = mutate(self.get(namespace, key))
+            self._write(namespace, key, value)
+            return value
+
+    def items(self, namespace):
+        with self._mutex:
+            return dict(self._data[namespace])
+
+    def sequence(self, namespace):
+        return self._counters[namespace]
+
+    def changes(self, namespace, since):
+        with self._mutex:
+            changed = {k: self._data[namespace].get(k) for k, seq in self._seqs[namespace].items() if seq > since}
+            return self._counters[namespace], changed
+
+    def acquire_lock(self, name, owner, ttl):
+        with self._mutex:
+            current = self._locks.get(name)
+            if current and current[0] != owner and current[1] > time.time():
+                return False
+            self._locks[name] = (owner, time.time() + ttl)
+            return True
+
+    def refresh_lock(self, name, owner, ttl):
+        with self._mutex:
+            current = self._locks.get(name)
+            if not current or current[0] != owner:
+                return False
+            self._locks[name] = (owner, time.time() + ttl)
+            return True
+
+    def release_lock(self, name, owner):
+        with self._mutex:
+            current = self._locks.get(name)
+            if not current or current[0] != owner:
+                return False
+            del self._locks[name]
+            return True
+
+    def lock_owner(self, name):
+        with self._mutex:
+            current = self._locks.get(name)
+            return current[0] if current and current[1] > time.time() else None
+
+    def publish(self, channel, message):
+        for queue in list(self._subscribers[channel]):
+            queue.put_nowait(message)
+
+    async def subscribe(self, channel):
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers[channel].append(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._subscribers[channel].remove(queue)
+
+
+class SQLiteState(SharedState):
+    """Backend for several workers on one host, using a SQLite database in WAL mode
+
+    SQLite's file locks serialize writers across processes; ``BEGIN
+    IMMEDIATE`` makes each read-modify-write atomic. Pub/sub is an events
+    table that subscribers poll, trimmed to the last ``EVENT_TTL_SECONDS``.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, path: Path = DEFAULT_SQLITE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=10, isolation_level=None, check_same_thread=False)
+        self._mutex = threading.RLock()
+        self._publishes = 0
+        with self._mutex:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS kv (
+                    namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT, seq INTEGER NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                );
+                CREATE INDEX IF NOT EXISTS kv_seq ON kv (namespace, seq);
+                CREATE TABLE IF NOT EXISTS counters (namespace TEXT PRIMARY KEY, value INTEGER NOT NULL);
+                CREATE TABLE IF NOT EXISTS locks (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL);
+                CREATE TABLE IF NOT EXISTS events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT NOT NULL, payload TEXT NOT NULL, created REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS events_channel ON events (channel, id);
+            """)
+
+    def _transaction(self, work: Callable[[sqlite3.Connection], Any]) -> Any:
+        with self._mutex:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = work(self._conn)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    @staticmethod
+    def _write(conn: sqlite3.Connection, namespace: str, key: str, value: Any) -> int:
+        conn.execute(
+            "INSERT INTO counters (namespace, value) VALUES (?, 1) "
+            "ON CONFLICT (namespace) DO UPDATE SET value = value + 1",
+            (namespace,),
+        )
+        seq = conn.execute("SELECT value FROM counters WHERE namespace = ?", (namespace,)).fetchone()[0]
+        payload = None if value is None else dumps(value).decode()
+        conn.execute(
+            "INSERT INTO kv (namespace, key, value, seq) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value, seq = excluded.seq",
+            (namespace, key, payload, seq),
+        )
+        return seq
+
+    def get(self, namespace, key):
+        with self._mutex:
+            row = self._conn.execute("SELECT value FROM kv WHERE namespace = ? AND key = ?", (namespace, key)).fetchone()
+        return loads(row[0]) if row and row[0] is not None else None
+
+    def put(self, namespace, key, value):
+        return self._transaction(lambda conn: self._write(conn, namespace, key, value))
+
+    def delete(self, namespace, key):
+        # Deletions stay as tombstones so other workers see them in ``changes``
+        return self._transaction(lambda conn: self._write(conn, namespace, key, None))
+
+    def update(self, namespace, key, mutate):
+        def _work(conn):
+            row = conn.execute("SELECT value FROM kv WHERE namespace = ? AND key = ?", (namespace, key)).fetchone()
+            value = mutate(loads(row[0]) if row and row[0] is not None else None)
+            self._write(conn, namespace, key, value)
+            return value
+        return self._transaction(_work)
+
+    def items(self, namespace):
+        with self._mutex:
+            rows = self._conn.execute(
+                "SELECT key, value FROM kv WHERE namespace = ? AND value IS NOT NULL", (namespace,)
+            ).fetchall()
+        return {key: loads(value) for key, value in rows}
+
+    def sequence(self, namespace):
+        with self._mutex:
+            row = self._conn.execute("SELECT value FROM counters WHERE namespace = ?", (namespace,)).fetchone()
+        return row[0] if row else 0
+
+    def changes(self, namespace, since):
+        with self._mutex:
+            latest = self.sequence(namespace)
+            if latest <= since:
+                return latest, {}
+            rows = self._conn.execute(
+                "SELECT key, value FROM kv WHERE namespace = ? AND seq > ?", (namespace, since)
+            ).fetchall()
+        return latest, {key: loads(value) if value is not None else None for key, value in rows}
+
+    def acquire_lock(self, name, owner, ttl):
+        def _work(conn):
+            now = time.time()
+            row = conn.execute("SELECT owner, expires FROM locks WHERE name = ?", (name,)).fetchone()
+            if row and row[0] != owner and row[1] > now:
+                return False
+            conn.execute("INSERT OR REPLACE INTO locks (name, owner, expires) VALUES (?, ?, ?)", (name, owner, now + ttl))
+            return True
+        return self._transaction(_work)
+
+    def refresh_lock(self, name, owner, ttl):
+        return self._transaction(lambda conn: conn.execute(
+            "UPDATE locks SET expires = ? WHERE name = ? AND owner = ?", (time.time() + ttl, name, owner)
+        ).rowcount == 1)
+
+    def release_lock(self, name, owner):
+        return self._transaction(lambda conn: conn.execute(
+            "DELETE FROM locks WHERE name = ? AND owner = ?", (name, owner)
+        ).rowcount == 1)
+
+    def lock_owner(self, name):
+        with self._mutex:
+            row = self._conn.execute(
+                "SELECT owner FROM locks WHERE name = ? AND expires > ?", (name, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def publish(self, channel, message):
+        now = time.time()
+
+        def _work(conn):
+            conn.execute(
+                "INSERT INTO events (channel, payload, created) VALUES (?, ?, ?)",
+                (channel, dumps(message).decode(), now),
+            )
+            self._publishes += 1
+            if self._publishes % 200 == 0:
+                conn.execute("DELETE FROM events WHERE created < ?", (now - EVENT_TTL_SECONDS,))
+        self._transaction(_work)
+
+    def _events_after(self, channel: str, last_id: int) -> List[Tuple[int, str]]:
+        with self._mutex:
+            return self._conn.execute(
+                "SELECT id, payload FROM events WHERE channel = ? AND id > ? ORDER BY id", (channel, last_id)
+            ).fetchall()
+
+    async def subscribe(self, channel):
+        with self._mutex:
+            row = self._conn.execute("SELECT MAX(id) FROM events").fetchone()
+        last_id = row[0] or 0
+        while True:
+            rows = await asyncio.to_thread(self._events_after, channel, last_id)
+            for event_id, payload in rows:
+                last_id = event_id
+                yield loads(payload)
+            if not rows:
+                await asyncio.sleep(POLL_INTERVAL)
+
+    def close(self):
+        with self._mutex:
+            self._conn.close()
+
+
+# Writes a value (or deletes it for an empty value) and records its sequence atomically
+_REDIS_WRITE = """
+local seq = redis.call('INCR', KEYS[3])
+if ARGV[2] == '' then
+    redis.call('HDEL', KEYS[1], ARGV[1])
+else
+    redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+end
+redis.call('ZADD', KEYS[2], seq, ARGV[1])
+return seq
+"""
+_REDIS_RELEASE = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) end
+return 0
+"""
+_REDIS_REFRESH = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('PEXPIRE', KEYS[1], ARGV[2]) end
+return 0
+"""
+
+
+class RedisState(SharedState):
+    """Backend for several hosts, using any Redis-protocol server
+
+    Needs the optional ``redis`` package. ``client``/``async_client`` may be
+    passed in instead of a URL, e.g. a local stand-in server's clients.
+    """
+
+    backend = "redis"
+
+    def __init__(self, url: Optional[str] = None, client=None, async_client=None, prefix: str = "ava:"):
+        self.url = url
+        self.prefix = prefix
+        self.client = client or lazy.get("redis").Redis.from_url(url)
+        self._async_client = async_client
+
+    def _keys(self, namespace: str) -> List[str]:
+        base = f"{self.prefix}kv:{namespace}"
+        return [f"{base}:data", f"{base}:changes", f"{base}:seq"]
+
+    def _write(self, client, namespace, key, value) -> int:
+        payload = "" if value is None else dumps(value).decode()
+        return client.eval(_REDIS_WRITE, 3, *self._keys(namespace), key, payload)
+
+    def get(self, namespace, key):
+        raw = self.client.hget(self._keys(namespace)[0], key)
+        return loads(raw) if raw else None
+
+    def put(self, namespace, key, value):
+        return int(self._write(self.client, namespace, key, value))
+
+    def delete(self, namespace, key):
+        return int(self._write(self.client, namespace, key, None))
+
+    def update(self, namespace, key, mutate):
+        data_key = self._keys(namespace)[0]
+        result = {}
+
+        def _work(pipe):
+            raw = pipe.hget(data_key, key)
+            result["value"] = mutate(loads(raw) if raw else None)
+            pipe.multi()
+            self._write(pipe, namespace, key, result["value"])
+
+        # WATCH retries the mutation if another worker wrote the namespace meanwhile
+        self.client.transaction(_work, data_key)
+        return result["value"]
+
+    def items(self, namespace):
+        return {
+            (k.decode() if isinstance(k, bytes) else k): loads(v)
+            for k, v in self.client.hgetall(self._keys(namespace)[0]).items()
+        }
+
+    def sequence(self, namespace):
+        return int(self.client.get(self._keys(namespace)[2]) or 0)
+
+    def changes(self, namespace, since):
+        data_key, changes_key, _ = self._keys(namespace)
+        latest = self.sequence(namespace)
+        if latest <= since:
+            return latest, {}
+        keys = [k.decode() if isinstance(k, bytes) else k for k in self.client.zrangebyscore(changes_key, f"({since}", "+inf")]
+        values = self.client.hmget(data_key, keys) if keys else []
+        return latest, {key: loads(raw) if raw else None for key, raw in zip(keys, values)}
+
+    def _lock_key(self, name: str) -> str:
+        return f"{self.prefix}lock:{name}"
+
+    def acquire_lock(self, name, owner, ttl):
+        key = self._lock_key(name)
+        if self.client.set(key, owner, nx=True, px=int(ttl * 1000)):
+            return True
+        return self.refresh_lock(name, owner, ttl)
+
+    def refresh_lock(self, name, owner, ttl):
+        return bool(self.client.eval(_REDIS_REFRESH, 1, self._lock_key(name), owner, int(ttl * 1000)))
+
+    def release_lock(self, name, owner):
+        return bool(self.client.eval(_REDIS_RELEASE, 1, self._lock_key(name), owner))
+
+    def lock_owner(self, name):
+        owner = self.client.get(self._lock_key(name))
+        return owner.decode() if isinstance(owner, bytes) else owner
+
+    def publish(self, channel, message):
+        self.client.publish(f"{self.prefix}channel:{channel}", dumps(message))
+
+    async def subscribe(self, channel):
+        if self._async_client is None:
+            self._async_client = lazy.get("redis.asyncio").Redis.from_url(self.url)
+        pubsub = self._async_client.pubsub()
+        await pubsub.subscribe(f"{self.prefix}channel:{channel}")
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    yield loads(message["data"])
+        finally:
+            await pubsub.unsubscribe()
+            await pubsub.close()
+
+    def close(self):
+        self.client.close()
+
+
+def create_state(url: Optional[str] = None) -> SharedState:
+    """Backend for SHARED_STATE_URL: unset (one worker), sqlite[:///path] or redis://..."""
+    url = (url if url is not None else os.getenv("SHARED_STATE_URL", "")).strip()
+    if not url:
+        return LocalState()
+    if url == "sqlite" or url.startswith("sqlite:"):
+        # sqlite:///relative/path.db or sqlite:////absolute/path.db, as in SQLAlchemy
+        path = url.split("://", 1)[1] if "://" in url else ""
+        path = path[1:] if path.startswith("/") else path
+        return SQLiteState(Path(path) if path else DEFAULT_SQLITE_PATH)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisState(url)
+    raise ValueError(f"Unsupported SHARED_STATE_URL: {url}")
+
+
+class Lease:
+    """A held lock that refreshes itself in the background until released"""
+
+    def __init__(self, state: SharedState, name: str, ttl: float = 30):
+        self.state = state
+        self.name = name
+        self.ttl = ttl
+        self.owner = f"{WORKER_ID}:{uuid.uuid4().hex[:8]}"
+        self._task: Optional[asyncio.Task] = None
+
+    async def acquire(self) -> bool:
+        if not await asyncio.to_thread(self.state.acquire_lock, self.name, self.owner, self.ttl):
+            return False
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        return True
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(self.ttl / 3)
+            try:
+                held = await asyncio.to_thread(self.state.refresh_lock, self.name, self.owner, self.ttl)
+            except Exception as e:
+                print(f"Error refreshing lock {self.name}: {str(e)}")
+                continue
+            if not held:
+                print(f"Warning: lost lock {self.name}")
+                return
+
+    async def release(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        await asyncio.to_thread(self.state.release_lock, self.name, self.owner)
@@ -0,0 +1,180 @@
+import os
+import json
+import math
+import asyncio
+import hashlib
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from lazy_imports import lazy
+from media import content_digest
+from render_bundle import ENTRY_POINT, REMOTION_DIR, code_version, npm_command, use_bundle
+
+STILLS_CACHE_DIR = Path(__file__).parent / "cache" / "stills"
+STILL_WIDTH = 480
+# Each still launches its own headless browser; keep a few in flight at most
+STILL_CONCURRENCY = 3
+
+
+def scene_midpoint_frame(scene: dict, fps: int) -> int:
+    """Representative frame for a scene: its midpoint, past the entrance animations"""
+    start = scene.get("start", 0) * fps
+    duration = scene.get("duration", 0) * fps
+    return max(0, int(math.floor(start + duration / 2)))
+
+
+def _subtitles_at(subtitles: List[dict], seconds: float) -> List[dict]:
+    """Subtitles visible at ``seconds``; they change the still, so they belong in its hash"""
+    visible = []
+    for subtitle in subtitles:
+        words = [w for line in subtitle.get("lines") or [] for w in line.get("words", [])]
+        words += subtitle.get("words") or []
+        starts = [w.get("start", 0) for w in words] + [i.get("start", 0) for i in subtitle.get("items") or []]
+        start = min(starts) if starts else 0
+        if start <= seconds < subtitle.get("container_end", 0):
+            visible.append(subtitle)
+    return visible
+
+
+def scene_hash(final_config: dict, scene: dict, frame: int, version: str) -> str:
+    """Hash of everything that decides how a scene's still looks
+
+    Covers the scene, the subtitles on screen at ``frame``, project settings,
+    the Remotion code version and the content of the scene's assets, so editing
+    one scene or regenerating one asset only invalidates that scene's still.
+    """
+    settings = final_config.get("project_settings") or {}
+    fps = settings.get("fps", 30)
+    asset_digests = {}
+    for element in scene.get("elements", []):
+        local_path = element.get("local_path")
+        if local_path:
+            asset_path = REMOTION_DIR / "public" / local_path
+            asset_digests[local_path] = content_digest(asset_path) if asset_path.is_file() else None
+
+    digest = hashlib.sha256()
+    digest.update(json.dumps({
+        "scene": scene,
+        "subtitles": _subtitles_at(final_config.get("subtitles", []), frame / fps),
+        "settings": settings,
+        "assets": asset_digests,
+        "frame": frame,
+        "width": STILL_WIDTH,
+        "version": version,
+    }, sort_keys=True).encode())
+    return digest.hexdigest()[:16]
+
+
+def still_path(digest: str) -> Path:
+    return STILLS_CACHE_DIR / f"{digest}.webp"
+
+
+def _png_to_webp(png_path: Path, target: Path):
+    Image = lazy.get("PIL.Image")
+    with Image.open(png_path) as img:
+        img.thumbnail((STILL_WIDTH, STILL_WIDTH))
+        tmp_path = target.with_suffix(".tmp")
+        img.convert("RGB").save(tmp_path, format="WEBP", quality=80, method=4)
+    os.replace(tmp_path, target)
+
+
+def still_scale(final_config: dict) -> float:
+    """Remotion --scale that renders the composition's long side at STILL_WIDTH"""
+    settings = final_config.get("project_settings") or {}
+    long_side = max(settings.get("width", 1920), settings.get("height", 1080))
+    return min(1.0, STILL_WIDTH / long_side)
+
+
+async def _render_still(spawn, serve_url: str, props_file: Path, frame: int, digest: str, scale: float) -> Optional[str]:
+    """Render one frame and store it as a WebP; returns an error message on failure"""
+    png_path = STILLS_CACHE_DIR / f"{digest}.png"
+    # Rasterizing at thumbnail size, not 1080p, saves Chrome ~16x the pixels
+    process = await spawn(
+        npm_command(), "run", "still", "--",
+        serve_url, "MainComposition", str(png_path),
+        f"--frame={frame}", "--props", str(props_file), f"--scale={scale:.4f}",
+        cwd=str(REMOTION_DIR),
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+    )
+    output, _ = await process.communicate()
+    if process.returncode != 0 or not png_path.exists():
+        return output.decode(errors="replace")[-500:] or "Still was not created"
+    try:
+        await asyncio.to_thread(_png_to_webp, png_path, still_path(digest))
+    finally:
+        png_path.unlink(missing_ok=True)
+    return None
+
+
+def plan_scene_stills(final_config: dict, scene_ids: Optional[List[str]] = None) -> List[Dict]:
+    """One entry per scene with its midpoint frame, scene hash and whether it is cached
+
+    Stills are cached by scene hash, so unchanged scenes (in this project or any
+    other) are served from disk and only edited scenes need rendering. Hashes
+    the scenes' assets, so call it through ``asyncio.to_thread`` from the loop.
+    """
+    settings = final_config.get("project_settings") or {}
+    fps = settings.get("fps", 30)
+    version = code_version()
+    results = []
+    for scene in final_config.get("scenes", []):
+        if scene_ids is not None and scene.get("id") not in scene_ids:
+            continue
+        frame = scene_midpoint_frame(scene, fps)
+        digest = scene_hash(final_config, scene, frame, version)
+        results.append({"scene_id": scene.get("id"), "frame": frame, "hash": digest, "cached": still_path(digest).exists()})
+    return results
+
+
+def still_browsers(stills: List[Dict], max_concurrent: int) -> int:
+    """Browsers a stills job should reserve in the render queue"""
+    missing = sum(1 for entry in stills if not entry["cached"])
+    return max(1, min(STILL_CONCURRENCY, missing, max_concurrent))
+
+
+async def render_missing_stills(
+    final_config: dict,
+    stills: List[Dict],
+    log: Callable[[str], Awaitable[None]],
+    spawn: Callable[..., Awaitable[asyncio.subprocess.Process]],
+    concurrency: int = 1,
+) -> List[Dict]:
+    """Render the uncached entries of ``plan_scene_stills``; failures are recorded per entry
+
+    ``spawn`` starts the Remotion processes (the render queue passes
+    ``RenderJob.spawn`` so cancelling the job kills them). At most
+    ``concurrency`` stills render at once; the job must have reserved that
+    many browsers (see ``still_browsers``).
+    """
+    missing = [entry for entry in stills if not entry["cached"]]
+    if not missing:
+        return stills
+
+    STILLS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    fps = (final_config.get("project_settings") or {}).get("fps", 30)
+    # Audio is irrelevant for a still and its path may not be servable yet
+    video_data = {k: v for k, v in final_config.items() if k != "audio_path"}
+    end_frame = max(math.ceil((s.get("start", 0) + s.get("duration", 0)) * fps) for s in final_config.get("scenes", []))
+    props_file = STILLS_CACHE_DIR / f"props-{os.getpid()}-{id(missing)}.json"
+    with open(props_file, "w") as f:
+        json.dump({"videoData": video_data, "durationInFrames": max(1, end_frame)}, f)
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    scale = still_scale(final_config)
+
+    async def _render(serve_url: str, entry: dict):
+        async with semaphore:
+            error = await _render_still(spawn, serve_url, props_file, entry["frame"], entry["hash"], scale)
+            if error:
+                entry["error"] = error
+                await log(f"Warning: still for scene {entry['scene_id']} failed: {error}")
+
+    try:
+        async with use_bundle(log) as (bundle_dir, _, _):
+            serve_url = str(bundle_dir) if bundle_dir else ENTRY_POINT
+            await log(f"🖼️ Rendering {len(missing)} scene still(s), {len(stills) - len(missing)} cached")
+            await asyncio.gather(*(_render(serve_url, entry) for entry in missing))
+    finally:
+        props_file.unlink(missing_ok=True)
+    return stills
@@ -0,0 +1,180 @@
+import os
+import json
+import shutil
+import asyncio
+import tempfile
+import contextlib
+from pathlib import Path
+from typing import IO, Any, Callable, Iterator, Optional
+
+try:
+    import orjson
+except ImportError:  # optional speedup; the stdlib encoder produces the same JSON
+    orjson = None
+
+# fsync file (and directory) contents before the rename publishes them; set
+# STORAGE_FSYNC=0 to trade crash durability for latency on slow disks
+FSYNC_DEFAULT = os.getenv("STORAGE_FSYNC", "1") != "0"
+# Seconds a coalesced write may lag behind the first change that requested it
+COALESCE_DELAY = float(os.getenv("STORAGE_COALESCE_SECONDS", "0.25"))
+
+
+def dumps(data: Any, pretty: bool = False) -> bytes:
+    """Encode JSON compactly (orjson when installed); ``pretty`` for files people read"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0)
+        except TypeError:
+            # orjson is stricter (e.g. non-str keys); fall back to the stdlib
+            pass
+    if pretty:
+        return json.dumps(data, indent=2).encode()
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+def loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def read_json(path: Path) -> Any:
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+
+def _fsync_dir(directory: Path):
+    """Persist the rename itself; a no-op where directories cannot be opened (Windows)"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+@contextlib.contextmanager
+def atomic_writer(path: Path, fsync: Optional[bool] = None) -> Iterator[IO[bytes]]:
+    """Binary file that replaces ``path`` when the block exits cleanly
+
+    Media files may be hard links shared with other projects (``link_file``,
+    dedupe), so anything written to a managed path must go through a new
+    inode: writing through the old one would change every link to it.
+    """
+    path = Path(path)
+    fsync = FSYNC_DEFAULT if fsync is None else fsync
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            yield f
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+    if fsync:
+        _fsync_dir(path.parent)
+
+
+def atomic_write_bytes(path: Path, data: bytes, fsync: Optional[bool] = None):
+    """Write via a temp file in the same directory and rename it over ``path``
+
+    Readers and crashes see either the old file or the new one, never a torn
+    write. With ``fsync`` the data is on disk before the rename makes it visible.
+    """
+    with atomic_writer(path, fsync=fsync) as f:
+        f.write(data)
+
+
+def atomic_write_json(path: Path, data: Any, pretty: bool = False, fsync: Optional[bool] = None):
+    """Atomically write ``data`` as JSON, compact unless ``pretty``"""
+    atomic_write_bytes(path, dumps(data, pretty=pretty), fsync=fsync)
+
+
+def link_file(source: Path, target: Path) -> bool:
+    """Publish ``source`` at ``target`` as a hard link, copying where links are unavailable
+
+    The link is made under a temp name and renamed over ``target``, so a file
+    already there (which may be linked from elsewhere) is replaced rather than
+    written through. Returns False when ``target`` already holds this file.
+    """
+    source, target = Path(source), Path(target)
+    try:
+        source_stat = source.stat()
+        target_stat = target.stat()
+        if os.path.samestat(source_stat, target_stat):
+            return False
+        # A copy2 fallback keeps the mtime, so a matching size and mtime is the same copy
+        if (target_stat.st_size, target_stat.st_mtime_ns) == (source_stat.st_size, source_stat.st_mtime_ns):
+            return False
+    except FileNotFoundError:
+        pass
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target.with_name(f".{target.name}.{os.getpid()}.link.tmp")
+    tmp_path.unlink(missing_ok=True)
+    try:
+        os.link(source, tmp_path)
+    except OSError:
+        shutil.copy2(source, tmp_path)
+    os.replace(tmp_path, target)
+    return True
+
+
+class WriteCoalescer:
+    """Collapse bursts of save requests into one write
+
+    ``request()`` called on the event loop schedules a single write ``delay``
+    seconds after the first pending request; further requests until then are
+    absorbed. Outside an event loop (scripts, worker threads) it writes
+    immediately, and ``flush()`` forces any pending write out now.
+    """
+
+    def __init__(self, write: Callable[[], None], delay: float = COALESCE_DELAY):
+        self._write = write
+        self.delay = delay
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self.requested = 0
+        self.written = 0
+
+    @property
+    def pending(self) -> bool:
+        return self._handle is not None
+
+    def request(self):
+        self.requested += 1
+        if self.delay <= 0:
+            self._run()
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._run()
+            return
+        if self._handle is None:
+            self._handle = loop.call_later(self.delay, self._run)
+
+    def flush(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._run()
+
+    def _run(self):
+        self._handle = None
+        try:
+            self._write()
+            self.written += 1
+        except Exception as e:
+            print(f"Error writing coalesced state: {str(e)}")
+
+    def stats(self) -> dict:
+        return {"requested": self.requested, "written": self.written, "pending": self.pending}
@@ -0,0 +1,416 @@
+import os
+import time
+import shutil
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from journal import sha256_file
+from render_bundle import REMOTION_DIR
+from storage import atomic_write_json, read_json
+
+MB = 1024 * 1024
+BACKEND_DIR = Path(__file__).parent
+CACHE_DIR = BACKEND_DIR / "cache"
+PUBLIC_DIR = REMOTION_DIR / "public"
+# Configs shipped with the repo; the public files they use are never swept
+BUILTIN_CONFIGS = (REMOTION_DIR / "props.json", REMOTION_DIR / "src" / "final_render.json")
+MANIFEST_PATH = CACHE_DIR / "storage_manifest.json"
+
+# Seconds between background sweeps (0 disables the background task)
+GC_INTERVAL = float(os.getenv("STORAGE_GC_INTERVAL", "3600"))
+# Unreferenced files younger than this may belong to a generation still in flight
+ORPHAN_GRACE = float(os.getenv("STORAGE_ORPHAN_GRACE_SECONDS", "3600"))
+# Directories of projects missing from the registry are moved aside, not deleted,
+# and only removed after this many seconds in projects/.quarantine
+QUARANTINE_SECONDS = float(os.getenv("STORAGE_QUARANTINE_SECONDS", str(7 * 24 * 3600)))
+QUARANTINE_DIR_NAME = ".quarantine"
+# Hard-link byte-identical assets, audio and videos to one copy on disk
+DEDUPE = os.getenv("STORAGE_DEDUPE", "1") != "0"
+# Disk quotas for render outputs (finals, drafts, stills, thumbnails); 0 = unlimited
+RENDER_QUOTA = int(float(os.getenv("STORAGE_RENDER_QUOTA_MB", "0")) * MB)
+PROJECT_RENDER_QUOTA = int(float(os.getenv("STORAGE_PROJECT_RENDER_QUOTA_MB", "0")) * MB)
+# Files used or written more recently than this may still be in use: never evicted or relinked
+SETTLE_SECONDS = 600
+# Reads closer together than this do not refresh a file's access time again
+TOUCH_RESOLUTION = 60
+
+
+def config_refs(config: dict) -> Set[str]:
+    """Paths relative to remotion/public that a render config uses"""
+    refs = set()
+    for scene in config.get("scenes") or []:
+        for element in scene.get("elements") or [] if isinstance(scene, dict) else []:
+            if isinstance(element, dict) and element.get("local_path"):
+                refs.add(str(element["local_path"]))
+    audio_path = config.get("audio_path")
+    if audio_path:
+        refs.add(f"audio/{Path(str(audio_path)).name}")
+    for page in (config.get("atlas") or {}).get("pages") or []:
+        refs.add(page["src"])
+    return refs
+
+
+def _read_config(path: Path) -> Optional[dict]:
+    try:
+        data = read_json(path)
+    except (OSError, ValueError):
+        return None
+    if isinstance(data, dict) and isinstance(data.get("videoData"), dict):
+        return data["videoData"]
+    return data if isinstance(data, dict) else None
+
+
+def touch(path: Path):
+    """Record a read of a render output, which is what LRU eviction orders by
+
+    Sets the access time explicitly, so it works on noatime/relatime mounts
+    and is visible to every worker.
+    """
+    try:
+        stat = os.stat(path)
+        now = time.time()
+        if now - stat.st_atime > TOUCH_RESOLUTION:
+            os.utime(path, (now, stat.st_mtime))
+    except OSError:
+        pass
+
+
+class StorageManager:
+    """Content hashes, reference counts, dedup, orphan sweeps and render quotas
+
+    Assets and audio live in a project directory and again in remotion/public,
+    where Remotion can serve them. Public files are reference-counted by the
+    render configs of live projects (plus the configs shipped with the repo);
+    a file nobody references is an orphan. Byte-identical files are hard-linked
+    to one inode, so the second copy costs no space. Render outputs are
+    derived data and are evicted least-recently-used when over quota.
+    """
+
+    def __init__(self, projects_dir: Path, live_projects: Callable[[], Iterable[str]],
+                 on_evict: Optional[Callable[[Path], None]] = None):
+        self.projects_dir = Path(projects_dir)
+        self.live_projects = live_projects
+        self.on_evict = on_evict or (lambda path: None)
+        # path -> [size, mtime_ns, sha256], so unchanged files are not rehashed
+        self._hashes: Dict[str, list] = {}
+        if MANIFEST_PATH.exists():
+            try:
+                self._hashes = read_json(MANIFEST_PATH).get("hashes", {})
+            except (OSError, ValueError):
+                self._hashes = {}
+
+    def content_hash(self, path: Path, stat: Optional[os.stat_result] = None) -> Optional[str]:
+        stat = stat or path.stat()
+        key = str(path)
+        cached = self._hashes.get(key)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+        digest = sha256_file(path)
+        try:
+            # Hashing is not a use; keep the access time LRU eviction orders by
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        except OSError:
+            pass
+        if digest:
+            self._hashes[key] = [stat.st_size, stat.st_mtime_ns, digest]
+        return digest
+
+    def _save_manifest(self, files: Iterable[Path]):
+        keep = {str(path) for path in files}
+        self._hashes = {key: value for key, value in self._hashes.items() if key in keep}
+        atomic_write_json(MANIFEST_PATH, {"hashes": self._hashes}, fsync=False)
+
+    def _project_dirs(self) -> List[Path]:
+        if not self.projects_dir.exists():
+            return []
+        return [
+            entry for entry in self.projects_dir.iterdir()
+            if entry.is_dir() and not entry.name.startswith(".") and (entry / "input_script.json").exists()
+        ]
+
+    def _media_files(self) -> List[Path]:
+        """Every asset, audio and video file under management"""
+        files = []
+        for project_dir in self._project_dirs():
+            for sub in ("assets", "audio", "output"):
+                if (project_dir / sub).exists():
+                    files.extend(p for p in (project_dir / sub).rglob("*") if p.is_file() and not p.name.endswith((".json", ".tmp")))
+        for sub in ("assets", "audio"):
+            if (PUBLIC_DIR / sub).exists():
+                files.extend(p for p in (PUBLIC_DIR / sub).iterdir() if p.is_file() and not p.name.endswith(".tmp"))
+        latest = REMOTION_DIR / "out" / "video.mp4"
+        if latest.exists():
+            files.append(latest)
+        return files
+
+    def public_refcounts(self, exclude: Optional[str] = None) -> Dict[str, int]:
+        """How many render configs use each remotion/public path"""
+        counts: Dict[str, int] = {}
+        configs = [_read_config(path) for path in BUILTIN_CONFIGS if path.exists()]
+        for project_id in self.live_projects():
+            if project_id != exclude:
+                path = self.projects_dir / project_id / "final_render.json"
+                if path.exists():
+                    configs.append(_read_config(path))
+        for config in configs:
+            for ref in config_refs(config or {}):
+                counts[ref] = counts.get(ref, 0) + 1
+        return counts
+
+    def inventory(self) -> Dict:
+        """Content hashes, reference counts and disk usage of every managed file"""
+        refcounts = self.public_refcounts()
+        files = self._media_files()
+        by_hash: Dict[str, Dict] = {}
+        inodes = set()
+        apparent = on_disk = 0
+        for path in files:
+            stat = path.stat()
+            digest = self.content_hash(path, stat)
+            apparent += stat.st_size
+            if (stat.st_dev, stat.st_ino) not in inodes:
+                inodes.add((stat.st_dev, stat.st_ino))
+                on_disk += stat.st_size
+            entry = by_hash.setdefault(digest, {"sha256": digest, "size": stat.st_size, "paths": [], "refs": 0, "inodes": set()})
+            entry["paths"].append(self._display(path))
+            entry["inodes"].add((stat.st_dev, stat.st_ino))
+            if path.parent.parent == PUBLIC_DIR:
+                entry["refs"] += refcounts.get(f"{path.parent.name}/{path.name}", 0)
+            else:
+                # A project's own copy is referenced by that project
+                entry["refs"] += 1
+        self._save_manifest(files)
+        # Contents stored more than once on disk (hard links share one copy)
+        duplicated = [entry for entry in by_hash.values() if len(entry["inodes"]) > 1]
+        for entry in by_hash.values():
+            entry["copies"] = len(entry.pop("inodes"))
+        return {
+            "files": len(files),
+            "unique_contents": len(by_hash),
+            "duplicated_contents": len(duplicated),
+            "duplicate_bytes": sum(entry["size"] * (entry["copies"] - 1) for entry in duplicated),
+            "apparent_bytes": apparent,
+            "disk_bytes": on_disk,
+            "render_bytes": sum(unit["size"] for unit in self._render_units()),
+            "render_quota_bytes": RENDER_QUOTA or None,
+            "contents": sorted(by_hash.values(), key=lambda entry: -entry["size"]),
+        }
+
+    @staticmethod
+    def _display(path: Path) -> str:
+        for root in (REMOTION_DIR.parent, BACKEND_DIR):
+            try:
+                return str(path.resolve().relative_to(root.resolve()))
+            except ValueError:
+                continue
+        return str(path)
+
+    def dedupe(self) -> Dict:
+        """Hard-link byte-identical files on the same device to one inode"""
+        groups: Dict[tuple, List[tuple]] = {}
+        settled = time.time() - SETTLE_SECONDS
+        for path in self._media_files():
+            stat = path.stat()
+            if stat.st_mtime > settled:
+                continue
+            digest = self.content_hash(path, stat)
+            if digest:
+                groups.setdefault((stat.st_dev, digest), []).append((path, stat))
+        linked, saved = 0, 0
+        for (_, digest), members in groups.items():
+            # Keep the inode with the most links; the others become links to it
+            members.sort(key=lambda member: (-member[1].st_nlink, str(member[0])))
+            keep_path, keep_stat = members[0]
+            for path, stat in members[1:]:
+                if stat.st_ino == keep_stat.st_ino:
+                    continue
+                # Link under a temp name and rename over the duplicate, so readers never see it missing
+                tmp_path = path.with_name(f".{path.name}.dedupe.tmp")
+                tmp_path.unlink(missing_ok=True)
+                try:
+                    os.link(keep_path, tmp_path)
+                except OSError:
+                    # Hard links unsupported here; nothing to gain for this group
+                    break
+                os.replace(tmp_path, path)
+                if stat.st_nlink == 1:
+                    saved += stat.st_size
+                self._hashes[str(path)] = [keep_stat.st_size, keep_stat.st_mtime_ns, digest]
+                linked += 1
+        return {"linked": linked, "bytes_saved": saved}
+
+    def _remove(self, path: Path) -> int:
+        try:
+            if path.is_dir():
+                size = sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+                shutil.rmtree(path, ignore_errors=True)
+                return size
+            size = path.stat().st_size
+            path.unlink()
+            return size
+        except FileNotFoundError:
+            return 0
+
+    def sweep_orphans(self, grace: float = ORPHAN_GRACE, dry_run: bool = False) -> Dict:
+        """Delete unreferenced public files and stale temp files; quarantine directories of unregistered projects"""
+        cutoff = time.time() - grace
+        live = set(self.live_projects())
+        refcounts = self.public_refcounts()
+        orphans: List[Path] = []
+
+        for sub in ("assets", "audio"):
+            directory = PUBLIC_DIR / sub
+            if directory.exists():
+                for path in directory.iterdir():
+                    if path.is_file() and not refcounts.get(f"{sub}/{path.name}") and path.stat().st_mtime < cutoff:
+                        orphans.append(path)
+        atlas_dir = PUBLIC_DIR / "atlases"
+        if atlas_dir.exists():
+            orphans.extend(
+                path for path in atlas_dir.iterdir()
+                if path.is_dir() and path.name not in live and path.stat().st_mtime < cutoff
+            )
+        # A project missing from the registry may be a registry problem, not a deletion
+        unregistered = [
+            path for path in self._project_dirs()
+            if path.name not in live and path.stat().st_mtime < cutoff
+        ]
+        quarantine = self.projects_dir / QUARANTINE_DIR_NAME
+        if quarantine.exists():
+            expired = time.time() - QUARANTINE_SECONDS
+            orphans.extend(path for path in quarantine.iterdir() if path.stat().st_mtime < expired)
+        # Temp files left by writes interrupted mid-rename
+        for root in [PUBLIC_DIR / "assets", PUBLIC_DIR / "audio"] + [p / sub for p in self._project_dirs() for sub in ("assets", "audio", "output")]:
+            if root.exists():
+                orphans.extend(path for path in root.glob(".*.tmp") if path.stat().st_mtime < cutoff)
+        # Per-job props and partial output of final renders the process died during
+        for project_dir in self._project_dirs():
+            output = project_dir / "output"
+            if output.exists():
+                orphans.extend(
+                    path for pattern in ("render_props.*.json", "video.*.rendering.mp4")
+                    for path in output.glob(pattern) if path.stat().st_mtime < cutoff
+                )
+
+        freed = 0 if dry_run else sum(self._remove(path) for path in orphans)
+        quarantined = unregistered if dry_run else [self._quarantine(path) for path in unregistered]
+        return {
+            "removed": [self._display(path) for path in orphans],
+            "quarantined": [self._display(path) for path in quarantined],
+            "bytes_freed": freed,
+            "dry_run": dry_run,
+        }
+
+    def _quarantine(self, path: Path) -> Path:
+        """Move an unregistered project directory to projects/.quarantine; restore by moving it back"""
+        quarantine = self.projects_dir / QUARANTINE_DIR_NAME
+        quarantine.mkdir(exist_ok=True)
+        target = quarantine / f"{path.name}-{time.strftime('%Y%m%d-%H%M%S')}"
+        path.rename(target)
+        # Retention counts from the move, not from the project's last write
+        os.utime(target)
+        print(f"Quarantined unregistered project directory {path.name} -> {self._display(target)}")
+        return target
+
+    def release_project(self, project_id: str, config: Optional[dict]) -> List[str]:
+        """Delete the public files only a (deleted) project's config referenced"""
+        if not config:
+            return []
+        remaining = self.public_refcounts(exclude=project_id)
+        removed = []
+        for ref in config_refs(config):
+            path = PUBLIC_DIR / ref
+            if not remaining.get(ref) and not ref.startswith("atlases/") and path.is_file():
+                self._remove(path)
+                removed.append(ref)
+        return removed
+
+    def _render_units(self) -> List[Dict]:
+        """Render outputs grouped into what is evicted together
+
+        A draft's video and its props file go together, as do hard links of one
+        file (a final render and its remotion/out/video.mp4 link).
+        """
+        units: Dict[str, Dict] = {}
+        by_inode: Dict[tuple, str] = {}
+
+        def add(key: str, path: Path, project_id: Optional[str]):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                return
+            inode = (stat.st_dev, stat.st_ino)
+            key = by_inode.setdefault(inode, key)
+            unit = units.setdefault(key, {"paths": [], "size": 0, "last_used": 0.0, "project_id": project_id, "inodes": set()})
+            unit["paths"].append(path)
+            if inode not in unit["inodes"]:
+                unit["inodes"].add(inode)
+                unit["size"] += stat.st_size
+            unit["last_used"] = max(unit["last_used"], stat.st_atime, stat.st_mtime)
+            unit["project_id"] = unit["project_id"] or project_id
+
+        for project_dir in self._project_dirs():
+            output = project_dir / "output"
+            if (output / "video.mp4").exists():
+                add(f"{project_dir.name}:final", output / "video.mp4", project_dir.name)
+            if (output / "drafts").exists():
+                for path in (output / "drafts").iterdir():
+                    if path.is_file() and not path.name.endswith(".tmp"):
+                        add(f"{project_dir.name}:draft:{path.name.split('.')[0]}", path, project_dir.name)
+        latest = REMOTION_DIR / "out" / "video.mp4"
+        if latest.exists():
+            add("latest", latest, None)
+        for cache in ("stills", "thumbs"):
+            if (CACHE_DIR / cache).exists():
+                for path in (CACHE_DIR / cache).iterdir():
+                    if path.is_file():
+                        add(f"{cache}:{path.name}", path, None)
+        return list(units.values())
+
+    def _evict(self, units: List[Dict], quota: int, now: float, dry_run: bool) -> List[Dict]:
+        total = sum(unit["size"] for unit in units)
+        evicted = []
+        for unit in sorted(units, key=lambda unit: unit["last_used"]):
+            if total <= quota:
+                break
+            if now - unit["last_used"] < SETTLE_SECONDS or unit.get("evicted"):
+                continue
+            if not dry_run:
+                for path in unit["paths"]:
+                    self._remove(path)
+                    self.on_evict(path)
+            unit["evicted"] = True
+            total -= unit["size"]
+            evicted.append(unit)
+        return evicted
+
+    def enforce_quotas(self, dry_run: bool = False) -> Dict:
+        """Evict least-recently-used render outputs until every quota is met"""
+        now = time.time()
+        units = self._render_units()
+        evicted = []
+        if PROJECT_RENDER_QUOTA:
+            per_project: Dict[str, List[Dict]] = {}
+            for unit in units:
+                if unit["project_id"]:
+                    per_project.setdefault(unit["project_id"], []).append(unit)
+            for project_units in per_project.values():
+                evicted += self._evict(project_units, PROJECT_RENDER_QUOTA, now, dry_run)
+        if RENDER_QUOTA:
+            evicted += self._evict([unit for unit in units if not unit.get("evicted")], RENDER_QUOTA, now, dry_run)
+        return {
+            "evicted": [self._display(path) for unit in evicted for path in unit["paths"]],
+            "bytes_freed": sum(unit["size"] for unit in evicted),
+            "render_bytes": sum(unit["size"] for unit in units if not unit.get("evicted")),
+            "dry_run": dry_run,
+        }
+
+    def collect(self, dry_run: bool = False) -> Dict:
+        """One full pass: sweep orphans, dedupe what is left, then enforce quotas"""
+        started = time.perf_counter()
+        report = {"orphans": self.sweep_orphans(dry_run=dry_run)}
+        report["dedupe"] = self.dedupe() if DEDUPE and not dry_run else {"linked": 0, "bytes_saved": 0}
+        report["quotas"] = self.enforce_quotas(dry_run=dry_run)
+        self._save_manifest(self._media_files())
+        report["seconds"] = round(time.perf_counter() - started, 3)
+        return report
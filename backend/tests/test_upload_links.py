@@ -0,0 +1,35 @@
+"""Uploads replace files in remotion/public rather than writing through them
+
+``link_file`` and dedupe make public and project media hard links of one
+inode; writing into an existing path would change every project linked to it.
+"""
+
+import os
+import sys
+import json
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.testclient import TestClient
+
+import main
+from storage import atomic_write_bytes, link_file
+
+
+def test_upload_does_not_change_linked_project_audio(tmp_path, monkeypatch):
+    public_dir = tmp_path / "public"
+    project_audio = tmp_path / "projects" / "p1" / "audio" / "voice.mp3"
+    atomic_write_bytes(project_audio, b"project one audio", fsync=False)
+    link_file(project_audio, public_dir / "audio" / "voice.mp3")
+    assert os.path.samefile(project_audio, public_dir / "audio" / "voice.mp3")
+    monkeypatch.setattr(main, "public_dir", public_dir)
+
+    response = TestClient(main.app).post("/api/upload", files={
+        "audio": ("voice.mp3", b"someone else's upload", "audio/mpeg"),
+        "script": ("script.json", json.dumps({"scenes": [], "subtitles": []}).encode(), "application/json"),
+    })
+
+    assert response.status_code != 500, response.text
+    assert (public_dir / "audio" / "voice.mp3").read_bytes() == b"someone else's upload"
+    assert project_audio.read_bytes() == b"project one audio"
@@ -0,0 +1,133 @@
+import math
+from bisect import bisect_right
+from typing import Dict, List, Optional, Tuple
+
+
+def to_frame(seconds: float, fps: float) -> int:
+    """Convert seconds to the first frame at which a Remotion <Sequence> starting there is visible
+
+    Remotion shows a sequence when ``frame >= from``; layers pass ``seconds * fps``
+    as ``from``, so the first visible integer frame is the ceiling. Rounding
+    first keeps float noise (0.1 * 30 = 3.0000000000000004) on the right side.
+    """
+    return int(math.ceil(round(seconds * fps, 6)))
+
+
+def build_interval_table(intervals: List[Tuple[int, int, object]]) -> Dict[str, list]:
+    """Build a stabbing-query table from half-open [start, end) frame intervals
+
+    Returns ``{"bounds": [...], "active": [[...], ...]}`` where ``active[i]`` lists
+    the payloads live on frames ``bounds[i] <= frame < bounds[i + 1]``. The
+    active set on any frame is then one binary search away, regardless of how
+    many intervals overlap the timeline.
+    """
+    points = sorted({p for start, end, _ in intervals if end > start for p in (start, end)})
+    if not points:
+        return {"bounds": [], "active": []}
+
+    # Sweep: bucket additions/removals by boundary, then walk the boundaries once
+    opens: Dict[int, list] = {}
+    closes: Dict[int, list] = {}
+    for order, (start, end, payload) in enumerate(intervals):
+        if end <= start:
+            continue
+        opens.setdefault(start, []).append((order, payload))
+        closes.setdefault(end, []).append(order)
+
+    live: Dict[int, object] = {}
+    active = []
+    for point in points:
+        for order in closes.get(point, []):
+            live.pop(order, None)
+        for order, payload in opens.get(point, []):
+            live[order] = payload
+        active.append([live[k] for k in sorted(live)])
+
+    return {"bounds": points, "active": active}
+
+
+def lookup(table: Dict[str, list], frame: int) -> list:
+    """Return the payloads active on ``frame`` in O(log n)"""
+    bounds = table.get("bounds") or []
+    i = bisect_right(bounds, frame) - 1
+    if i < 0:
+        return []
+    return table["active"][i]
+
+
+def _first_word_start(subtitle: dict) -> Optional[float]:
+    """Start of the first word of the first line, which TextLayer anchors containers to"""
+    lines = subtitle.get("lines") or []
+    if lines and lines[0].get("words"):
+        return lines[0]["words"][0].get("start")
+    return None
+
+
+def _scene_for_time(scenes: List[dict], scene_starts: List[float], seconds: float) -> Optional[int]:
+    """Index of the first scene whose [start, start + duration) contains ``seconds``"""
+    # Scenes are usually sorted and contiguous, so check the bisected candidate first
+    if scene_starts:
+        i = bisect_right(scene_starts, seconds) - 1
+        if i >= 0:
+            scene = scenes[i]
+            if scene.get("start", 0) <= seconds < scene.get("start", 0) + scene.get("duration", 0):
+                return i
+    for idx, scene in enumerate(scenes):
+        if scene.get("start", 0) <= seconds < scene.get("start", 0) + scene.get("duration", 0):
+            return idx
+    return None
+
+
+def build_timeline_index(scenes: List[dict], subtitles: List[dict], fps: float) -> Dict:
+    """Precompute frame-accurate scene, subtitle and word lookup tables
+
+    Mirrors the timing the Remotion layers use today: a scene is live on
+    ``[start, start + duration)`` and a subtitle container from its first word
+    to ``container_end``. The ``words`` table covers the children TextLayer
+    mounts one by one: ``words`` of word_by_word subtitles and ``items`` of
+    vertical_list ones, as ``[subtitle, index]`` pairs into that list. Their
+    Sequences are nested in the container's, so their start is offset by the
+    container start, and they never outlive the container.
+    """
+    scene_intervals = []
+    for idx, scene in enumerate(scenes):
+        start = scene.get("start", 0)
+        scene_intervals.append(
+            (to_frame(start, fps), to_frame(start + scene.get("duration", 0), fps), idx)
+        )
+
+    scene_starts = [scene.get("start", 0) for scene in scenes]
+    sorted_starts = scene_starts == sorted(scene_starts)
+
+    subtitle_intervals = []
+    word_intervals = []
+    subtitle_scene = []
+    for sub_idx, subtitle in enumerate(subtitles):
+        first_start = _first_word_start(subtitle)
+        container_end = subtitle.get("container_end", 0)
+        if first_start is None:
+            subtitle_scene.append(None)
+            continue
+
+        container_end_frame = to_frame(container_end, fps)
+        subtitle_intervals.append((to_frame(first_start, fps), container_end_frame, sub_idx))
+        subtitle_scene.append(_scene_for_time(scenes, scene_starts if sorted_starts else [], first_start))
+
+        mode = subtitle.get("mode")
+        if mode == "word_by_word":
+            for word_idx, word in enumerate(subtitle.get("words") or []):
+                end = min(to_frame(first_start + word["end"], fps), container_end_frame)
+                word_intervals.append((to_frame(first_start + word["start"], fps), end, [sub_idx, word_idx]))
+        elif mode == "vertical_list":
+            for item_idx, item in enumerate(subtitle.get("items") or []):
+                word_intervals.append(
+                    (to_frame(first_start + item["start"], fps), container_end_frame, [sub_idx, item_idx])
+                )
+
+    return {
+        "fps": fps,
+        "scenes": build_interval_table(scene_intervals),
+        "subtitles": build_interval_table(subtitle_intervals),
+        "words": build_interval_table(word_intervals),
+        "subtitle_scene": subtitle_scene,
+    }
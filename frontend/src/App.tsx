@@ -12,7 +12,7 @@ interface AppState {
   audioFile: File | null;
   scriptFile: File | null;
   logs: string[];
-  assets: Array<{ name: string; path: string }>;
+  assets: Array<{ name: string; path: string; thumbnail?: string }>;
   generatedCount: number;
   totalCount: number;
   error: string | null;
@@ -177,6 +177,28 @@ function App() {
     fetchProjects();
   }, []);
 
+  // Status updates arrive over Server-Sent Events only when the project changes
+  const watchProject = (projectId: string) => {
+    const events = new EventSource(`/api/projects/${projectId}/events`);
+    events.addEventListener('project', (event) => {
+      const statusData = JSON.parse((event as MessageEvent).data);
+
+      setState((prev) => ({
+        ...prev,
+        status: statusData.status === 'completed' ? 'ready' : statusData.status,
+        error: statusData.error,
+      }));
+
+      if (statusData.status === 'completed' || statusData.status === 'failed') {
+        events.close();
+        if (statusData.status === 'completed') {
+          fetchAssets();
+        }
+      }
+    });
+    events.addEventListener('deleted', () => events.close());
+  };
+
   const handleStartGeneration = async () => {
     if (!state.audioFile || !state.scriptFile) {
       setState((prev) => ({
@@ -246,24 +268,8 @@ function App() {
         throw new Error('Generation failed');
       }
 
-      // Poll for project status
-      const pollInterval = setInterval(async () => {
-        const statusRes = await fetch(`/api/projects/${projectId}`);
-        const statusData = await statusRes.json();
-
-        setState((prev) => ({
-          ...prev,
-          status: statusData.status === 'completed' ? 'ready' : statusData.status,
-          error: statusData.error,
-        }));
-
-        if (statusData.status === 'completed' || statusData.status === 'failed') {
-          clearInterval(pollInterval);
-          if (statusData.status === 'completed') {
-            fetchAssets();
-          }
-        }
-      }, 1000);
+      // Follow project status until generation finishes
+      watchProject(projectId);
     } catch (err) {
       setState((prev) => ({
         ...prev,
@@ -297,24 +303,8 @@ function App() {
         throw new Error('Retry failed');
       }
 
-      // Poll for project status
-      const pollInterval = setInterval(async () => {
-        const statusRes = await fetch(`/api/projects/${state.projectId}`);
-        const statusData = await statusRes.json();
-
-        setState((prev) => ({
-          ...prev,
-          status: statusData.status === 'completed' ? 'ready' : statusData.status,
-          error: statusData.error,
-        }));
-
-        if (statusData.status === 'completed' || statusData.status === 'failed') {
-          clearInterval(pollInterval);
-          if (statusData.status === 'completed') {
-            fetchAssets();
-          }
-        }
-      }, 1000);
+      // Follow project status until generation finishes
+      watchProject(state.projectId);
     } catch (err) {
       setState((prev) => ({
         ...prev,
@@ -328,21 +318,10 @@ function App() {
     if (!state.projectId) return;
     
     try {
-      const res = await fetch(`/api/projects/${state.projectId}/render-config`);
+      // Content-hashed URLs are immutable, so repeat views are served from cache
+      const res = await fetch(`/api/projects/${state.projectId}/assets`);
       const data = await res.json();
-      
-      // Extract assets from the render config
-      const assets = [];
-      if (data.visual_track) {
-        data.visual_track.forEach((scene: any) => {
-          if (scene.avatar?.asset) {
-            assets.push({ name: scene.avatar.asset, path: `/assets/${scene.avatar.asset}` });
-          }
-          if (scene.prop?.asset) {
-            assets.push({ name: scene.prop.asset, path: `/assets/${scene.prop.asset}` });
-          }
-        });
-      }
+      const assets = data.assets || [];
       
       setState((prev) => ({
         ...prev,
@@ -378,7 +357,21 @@ function App() {
         throw new Error(error.error || 'Render failed');
       }
 
-      const data = await res.json();
+      // Renders are queued; poll the job until it finishes
+      let data = await res.json();
+      if (data.job_id) {
+        let job = data;
+        while (job.status === 'queued' || job.status === 'running') {
+          await new Promise((resolve) => setTimeout(resolve, 2000));
+          const jobRes = await fetch(`/api/render-jobs/${data.job_id}`);
+          job = await jobRes.json();
+        }
+        if (job.status !== 'succeeded') {
+          throw new Error(job.error || `Render ${job.status}`);
+        }
+        data = job.result;
+      }
+
       setState((prev) => ({
         ...prev,
         status: 'ready',
@@ -3,6 +3,7 @@ import { Image as ImageIcon } from 'lucide-react';
 interface Asset {
   name: string;
   path: string;
+  thumbnail?: string;
 }
 
 interface AssetGridProps {
@@ -32,8 +33,9 @@ export default function AssetGrid({ assets }: AssetGridProps) {
               className="relative group overflow-hidden rounded-lg bg-gray-100 aspect-square"
             >
               <img
-                src={asset.path}
+                src={asset.thumbnail || asset.path}
                 alt={asset.name}
+                loading="lazy"
                 className="w-full h-full object-cover group-hover:scale-105 transition"
               />
               <div className="absolute inset-0 bg-black bg-opacity-0 group-hover:bg-opacity-50 transition flex items-end">
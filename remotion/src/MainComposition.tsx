@@ -1,11 +1,10 @@
 import { AbsoluteFill, useCurrentFrame, useVideoConfig, Audio, staticFile } from "remotion";
 import { VisualLayer } from "./layers/VisualLayer";
 import { TextLayer } from "./layers/TextLayer";
-import videoData from "../props.json";
-import { VideoData } from "./types";
+import { RenderProps, VideoData } from "./types";
 import { validateLayoutsOrThrow } from "./validation/LayoutValidator";
 
-export const MainComposition = () => {
+export const MainComposition: React.FC<RenderProps> = ({ videoData }) => {
   const frame = useCurrentFrame();
   const { fps } = useVideoConfig();
 
@@ -36,9 +35,9 @@ export const MainComposition = () => {
           borderRadius: "10px"
         }}>
           <h2>Layout Validation Error</h2>
-          <p>{error instanceof Error ? error.message : 'Invalid layout found in props.json'}</p>
+          <p>{error instanceof Error ? error.message : 'Invalid layout found in render props'}</p>
           <p style={{ fontSize: "16px", marginTop: "20px" }}>
-            Please check your props.json file and use only the available layouts.
+            Please check the render props and use only the available layouts.
           </p>
         </div>
       </AbsoluteFill>
@@ -46,7 +45,7 @@ export const MainComposition = () => {
   }
   
   if (!data || !data.scenes || !data.subtitles) {
-    console.error('Invalid props.json structure. Expected new schema with scenes and subtitles.');
+    console.error('Invalid render props structure. Expected new schema with scenes and subtitles.');
     return (
       <AbsoluteFill style={{ backgroundColor: "#f0f0f0", display: "flex", alignItems: "center", justifyContent: "center" }}>
         <div style={{ fontSize: 24, color: "#333", textAlign: "center" }}>
@@ -61,10 +60,10 @@ export const MainComposition = () => {
   return (
     <AbsoluteFill style={{ backgroundColor: "#f0f0f0" }}>
       {/* Visual Assets Layer */}
-      <VisualLayer scenes={data.scenes} />
+      <VisualLayer scenes={data.scenes} timeline={data.timeline} motion={data.motion} atlas={data.atlas} />
       
       {/* Text/Kinetic Typography Layer */}
-      <TextLayer subtitles={data.subtitles} scenes={data.scenes} />
+      <TextLayer subtitles={data.subtitles} scenes={data.scenes} timeline={data.timeline} motion={data.motion} />
       
       {/* Audio Layer */}
       {data.audio_path && (
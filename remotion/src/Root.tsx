@@ -1,27 +1,22 @@
 import { Composition } from 'remotion';
 import { Video, VideoProps } from './Video';
-import * as renderData from '../props.json';
+import { calculateVideoMetadata, EMPTY_VIDEO_DATA } from './calculateMetadata';
 
 export const RemotionRoot: React.FC = () => {
-  // Calculate duration from scenes
-  const fps = 30;
-  const scenes = (renderData as any).scenes || [];
-  const durationInSeconds = scenes.reduce((acc: number, scene: any) => acc + (scene.duration || 0), 0);
-  // Default to 18s (540 frames) if no scenes or 0 duration
-  const durationInFrames = Math.max(1, Math.ceil(durationInSeconds * fps)) || 540;
-
+  // Duration, fps and size come from the input props at render time
   return (
     <>
       <Composition
         id="Video"
         component={Video}
-        durationInFrames={durationInFrames}
-        fps={fps}
+        durationInFrames={540}
+        fps={30}
         width={1920}
         height={1080}
         defaultProps={{
-          videoData: renderData as any
+          videoData: EMPTY_VIDEO_DATA as any
         }}
+        calculateMetadata={calculateVideoMetadata as any}
       />
     </>
   );
@@ -0,0 +1,33 @@
+import { CalculateMetadataFunction } from "remotion";
+import { RenderProps, VideoData } from "./types";
+
+const DEFAULT_FPS = 30;
+const DEFAULT_WIDTH = 1920;
+const DEFAULT_HEIGHT = 1080;
+
+// Placeholder used by the Studio and as defaultProps; real data arrives at
+// render time through --props, so the bundle never embeds project data
+export const EMPTY_VIDEO_DATA: VideoData = {
+  project_settings: { fps: DEFAULT_FPS, width: DEFAULT_WIDTH, height: DEFAULT_HEIGHT },
+  scenes: [],
+  subtitles: [],
+};
+
+/**
+ * Derives composition size and length from the runtime props. The backend
+ * passes durationInFrames (from the audio length); otherwise the scenes'
+ * total duration is used.
+ */
+export const calculateVideoMetadata: CalculateMetadataFunction<RenderProps> = ({ props }) => {
+  const settings = props.videoData?.project_settings;
+  const fps = settings?.fps || DEFAULT_FPS;
+  const scenes = props.videoData?.scenes || [];
+  const durationInSeconds = scenes.reduce((acc, scene) => acc + (scene.duration || 0), 0);
+
+  return {
+    fps,
+    width: settings?.width || DEFAULT_WIDTH,
+    height: settings?.height || DEFAULT_HEIGHT,
+    durationInFrames: props.durationInFrames || Math.max(1, Math.ceil(durationInSeconds * fps)),
+  };
+};
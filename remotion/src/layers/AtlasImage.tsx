@@ -0,0 +1,43 @@
+import { useCallback, useEffect, useRef, useState } from "react";
+import { continueRender, delayRender, staticFile } from "remotion";
+import { AtlasIndex, AtlasRect } from "../types";
+
+/**
+ * Draws one packed asset from a texture atlas page with object-fit: contain.
+ * The outer SVG letterboxes the rect into the box; the nested SVG's viewBox
+ * crops the page to the rect, so neighbouring sprites never show.
+ */
+export const AtlasImage = ({ atlas, rect }: { atlas: AtlasIndex; rect: AtlasRect }) => {
+  const page = atlas.pages[rect.page];
+  const src = staticFile(page.src);
+  // Held until the <image> that paints the sprite has loaded, so a frame is never captured blank
+  const [handle] = useState(() => delayRender(`Loading atlas page ${page.src}`));
+  const released = useRef(false);
+
+  const release = useCallback(() => {
+    if (!released.current) {
+      released.current = true;
+      continueRender(handle);
+    }
+  }, [handle]);
+
+  // Unmounted before the page loaded: do not hold up the render
+  useEffect(() => release, [release]);
+
+  return (
+    <svg width="100%" height="100%" viewBox={`0 0 ${rect.w} ${rect.h}`} preserveAspectRatio="xMidYMid meet">
+      <svg width={rect.w} height={rect.h} viewBox={`${rect.x} ${rect.y} ${rect.w} ${rect.h}`}>
+        <image
+          href={src}
+          width={page.width}
+          height={page.height}
+          onLoad={release}
+          onError={(e) => {
+            console.error(`Failed to load atlas page: ${src}`, e);
+            release();
+          }}
+        />
+      </svg>
+    </svg>
+  );
+};
@@ -1,31 +1,59 @@
 import { AbsoluteFill, Sequence, useCurrentFrame, useVideoConfig, spring } from "remotion";
 import { TEXT_STYLES } from "../config/TextStyles";
 import { LAYOUTS } from "../config/Layouts";
-import { Subtitle, Scene, Element } from "../types";
+import { Subtitle, Scene, Element, TimelineIndex, MotionTables } from "../types";
+import { lookupActive, usableTimeline } from "../utils/timeline";
+import { sampleTable, usableMotion } from "../utils/motion";
 
 interface TextLayerProps {
   subtitles: Subtitle[];
   scenes: Scene[];
+  timeline?: TimelineIndex;
+  motion?: MotionTables;
 }
 
-export const TextLayer: React.FC<TextLayerProps> = ({ subtitles, scenes }) => {
+export const TextLayer: React.FC<TextLayerProps> = ({ subtitles, scenes, timeline, motion }) => {
   const { fps } = useVideoConfig();
   const frame = useCurrentFrame();
 
+  // Precomputed text spring when the backend built one for this fps
+  const springTable = usableMotion(motion, fps)?.springs.text;
+  const textSpring = (f: number) =>
+    springTable ? sampleTable(springTable, f) : spring({ frame: f, fps, config: { stiffness: 200, damping: 10 } });
+
   // Guard against undefined subtitles
   if (!subtitles || !Array.isArray(subtitles)) {
     return null;
   }
 
+  // Only mount the subtitles live on this frame when the backend index is available
+  const timelineIndex = usableTimeline(timeline, fps);
+  const visibleSubtitles = timelineIndex
+    ? lookupActive(timelineIndex.subtitles, frame)
+    : subtitles.map((_, i) => i);
+  // Likewise for the words/items a subtitle times one by one; configs built
+  // before this table held [subtitle, index] pairs fall back to mounting all
+  const liveWords = timelineIndex ? lookupActive(timelineIndex.words, frame) : null;
+  const liveChildren = liveWords && liveWords.every((entry) => entry.length === 2) ? liveWords : null;
+  const childIndices = (subtitleIndex: number, children: unknown[] | undefined): number[] =>
+    liveChildren
+      ? liveChildren.filter(([s]) => s === subtitleIndex).map(([, i]) => i)
+      : (children ?? []).map((_, i) => i);
+
   return (
     <AbsoluteFill>
-      {subtitles.map((subtitle: Subtitle, index) => {
+      {visibleSubtitles.map((subtitleIndex) => {
+        const subtitle: Subtitle = subtitles[subtitleIndex];
+
         // Find which Visual Scene is active for this subtitle
-        const currentScene = scenes.find(
-          (s) => subtitle.lines?.[0]?.words?.[0] && 
-                 subtitle.lines[0].words[0].start >= s.start && 
-                 subtitle.lines[0].words[0].start < (s.start + s.duration)
-        );
+        const sceneIndex = timelineIndex?.subtitle_scene[subtitleIndex];
+        const currentScene = timelineIndex
+          ? (sceneIndex === null || sceneIndex === undefined ? undefined : scenes[sceneIndex])
+          : scenes.find(
+              (s) => subtitle.lines?.[0]?.words?.[0] && 
+                     subtitle.lines[0].words[0].start >= s.start && 
+                     subtitle.lines[0].words[0].start < (s.start + s.duration)
+            );
 
         // Get the layout for that scene
         const layoutName = currentScene?.layout;
@@ -44,11 +72,7 @@ export const TextLayer: React.FC<TextLayerProps> = ({ subtitles, scenes }) => {
         const durationFrames = (subtitle.container_end - firstWordStart) * fps;
 
         // Animation
-        const spr = spring({
-          frame: frame - startFrame,
-          fps,
-          config: { stiffness: 200, damping: 10 }
-        });
+        const spr = textSpring(frame - startFrame);
 
         // Style logic
         const isTextOnly = layoutName === "text_full_center";
@@ -98,7 +122,8 @@ export const TextLayer: React.FC<TextLayerProps> = ({ subtitles, scenes }) => {
               ))}
               
               {/* Handle word_by_word mode */}
-              {subtitle.mode === "word_by_word" && subtitle.words?.map((word, wordIndex) => {
+              {subtitle.mode === "word_by_word" && childIndices(subtitleIndex, subtitle.words).map((wordIndex) => {
+                const word = subtitle.words![wordIndex];
                 const isHighlight = subtitle.style?.includes("highlight");
                 let color = "#333";
                 if (subtitle.style === "highlight_red") color = "#d92323";
@@ -110,11 +135,7 @@ export const TextLayer: React.FC<TextLayerProps> = ({ subtitles, scenes }) => {
                 const wordDurationFrames = (word.end - word.start) * fps;
                 
                 // Individual animation for each word
-                const wordSpr = spring({
-                  frame: frame - wordStartFrame,
-                  fps,
-                  config: { stiffness: 200, damping: 10 }
-                });
+                const wordSpr = textSpring(frame - wordStartFrame);
                 
                 return (
                   <Sequence 
@@ -141,7 +162,8 @@ export const TextLayer: React.FC<TextLayerProps> = ({ subtitles, scenes }) => {
               })}
               
               {/* Handle items for vertical_list mode */}
-              {subtitle.mode === "vertical_list" && subtitle.items?.map((item, itemIndex) => {
+              {subtitle.mode === "vertical_list" && childIndices(subtitleIndex, subtitle.items).map((itemIndex) => {
+                const item = subtitle.items![itemIndex];
                 const isHighlight = subtitle.style?.includes("highlight");
                 let color = "#333";
                 if (subtitle.style === "highlight_red") color = "#d92323";
@@ -153,11 +175,7 @@ export const TextLayer: React.FC<TextLayerProps> = ({ subtitles, scenes }) => {
                 const itemDurationFrames = (subtitle.container_end - item.start) * fps;
                 
                 // Individual animation for each item
-                const itemSpr = spring({
-                  frame: frame - itemStartFrame,
-                  fps,
-                  config: { stiffness: 200, damping: 10 }
-                });
+                const itemSpr = textSpring(frame - itemStartFrame);
                 
                 return (
                   <Sequence 
@@ -1,15 +1,21 @@
 import { AbsoluteFill, Sequence, useVideoConfig, useCurrentFrame, spring, Img, staticFile } from "remotion";
 import { LAYOUTS } from "../config/Layouts";
 import { ENTRANCES, IDLES } from "../config/Animations";
-import { Scene, Element } from "../types";
+import { Scene, Element, TimelineIndex, MotionTables, AtlasIndex } from "../types";
+import { lookupActive, usableTimeline } from "../utils/timeline";
+import { sampleTable, tableTransform, usableMotion } from "../utils/motion";
+import { AtlasImage } from "./AtlasImage";
 
 // Helper Component for Physics
-const AnimatedAsset = ({ src, style, anim, idleAnim, delayFrames }: {
+const AnimatedAsset = ({ src, style, anim, idleAnim, delayFrames, motion, atlas, localPath }: {
   src: string;
   style: React.CSSProperties;
   anim: string;
   idleAnim: string;
   delayFrames: number;
+  motion: MotionTables | null;
+  atlas?: AtlasIndex;
+  localPath: string;
 }) => {
   const frame = useCurrentFrame();
   const { fps } = useVideoConfig();
@@ -17,35 +23,58 @@ const AnimatedAsset = ({ src, style, anim, idleAnim, delayFrames }: {
   // Apply delay
   const delayedFrame = Math.max(0, frame - delayFrames);
   
-  // Physics Spring
-  const spr = spring({ frame: delayedFrame, fps, config: { damping: 12, stiffness: 150 } });
-  
-  // Math Transforms
-  const getEnter = ENTRANCES[anim as keyof typeof ENTRANCES] || ENTRANCES.pop;
-  const getIdle = IDLES[idleAnim as keyof typeof IDLES] || IDLES.breathe;
+  // Curves precomputed by the backend when available, otherwise the physics per frame
+  const enterTable = motion && (motion.entrances[anim] || motion.entrances.pop);
+  const idleTable = motion && (motion.idles[idleAnim] || motion.idles.breathe);
+  let spr: number;
+  let enter: string;
+  let idle: string;
+  if (motion && enterTable && idleTable) {
+    spr = sampleTable(motion.springs.asset, delayedFrame);
+    enter = tableTransform(enterTable, delayedFrame, "%");
+    idle = tableTransform(idleTable, frame, "px");
+  } else {
+    spr = spring({ frame: delayedFrame, fps, config: { damping: 12, stiffness: 150 } });
+    enter = (ENTRANCES[anim as keyof typeof ENTRANCES] || ENTRANCES.pop)(spr);
+    idle = (IDLES[idleAnim as keyof typeof IDLES] || IDLES.breathe)(frame);
+  }
 
   return (
     <div style={{
       ...style,
-      transform: `${style.transform || ''} ${getEnter(spr)} ${getIdle(frame)}`,
+      transform: `${style.transform || ''} ${enter} ${idle}`,
       transformOrigin: anim === "drop_down" ? "top center" : "bottom center",
       opacity: spr
     }}>
-      <Img src={src} style={{ width: "100%", height: "100%", objectFit: "contain" }} />
+      {/* Packed assets draw from a shared atlas page instead of fetching their own PNG */}
+      {atlas?.rects[localPath]
+        ? <AtlasImage atlas={atlas} rect={atlas.rects[localPath]} />
+        : <Img src={src} style={{ width: "100%", height: "100%", objectFit: "contain" }} />}
     </div>
   );
 };
 
 interface VisualLayerProps {
   scenes: Scene[];
+  timeline?: TimelineIndex;
+  motion?: MotionTables;
+  atlas?: AtlasIndex;
 }
 
-export const VisualLayer: React.FC<VisualLayerProps> = ({ scenes }) => {
+export const VisualLayer: React.FC<VisualLayerProps> = ({ scenes, timeline, motion, atlas }) => {
   const { fps } = useVideoConfig();
+  const frame = useCurrentFrame();
+  const motionTables = usableMotion(motion, fps);
+
+  // Only mount the scenes live on this frame when the backend index is available
+  const timelineIndex = usableTimeline(timeline, fps);
+  const visibleScenes = timelineIndex
+    ? lookupActive(timelineIndex.scenes, frame).map((i) => scenes[i])
+    : scenes;
 
   return (
     <AbsoluteFill>
-      {scenes.map((scene: Scene, sceneIndex: number) => {
+      {visibleScenes.map((scene: Scene) => {
         const layout = LAYOUTS[scene.layout];
         
         // Skip if no valid layout
@@ -71,6 +100,9 @@ export const VisualLayer: React.FC<VisualLayerProps> = ({ scenes }) => {
                     anim={element.anim_enter || "pop"}
                     idleAnim={element.anim_idle || "breathe"}
                     delayFrames={0}
+                    motion={motionTables}
+                    atlas={atlas}
+                    localPath={rawPath}
                   />
                 );
               })}
@@ -92,6 +124,9 @@ export const VisualLayer: React.FC<VisualLayerProps> = ({ scenes }) => {
                     anim={element.anim_enter || "pop"}
                     idleAnim={element.anim_idle || "breathe"}
                     delayFrames={0}
+                    motion={motionTables}
+                    atlas={atlas}
+                    localPath={rawPath}
                   />
                 );
               })}
@@ -113,6 +148,9 @@ export const VisualLayer: React.FC<VisualLayerProps> = ({ scenes }) => {
                     anim={element.anim_enter || "pop"}
                     idleAnim={element.anim_idle || "breathe"}
                     delayFrames={0}
+                    motion={motionTables}
+                    atlas={atlas}
+                    localPath={rawPath}
                   />
                 );
               })}
@@ -134,6 +172,9 @@ export const VisualLayer: React.FC<VisualLayerProps> = ({ scenes }) => {
                     anim={element.anim_enter || "pop"}
                     idleAnim={element.anim_idle || "breathe"}
                     delayFrames={0}
+                    motion={motionTables}
+                    atlas={atlas}
+                    localPath={rawPath}
                   />
                 );
               })}
@@ -39,9 +39,61 @@ export interface Subtitle {
   style?: string;
 }
 
+// Precomputed by the backend (timeline.py): active[i] holds the entries live
+// on frames bounds[i] <= frame < bounds[i + 1]
+export interface IntervalTable<T> {
+  bounds: number[];
+  active: T[][];
+}
+
+export interface TimelineIndex {
+  fps: number;
+  scenes: IntervalTable<number>;
+  subtitles: IntervalTable<number>;
+  // [subtitle, index] into subtitle.words (word_by_word) or subtitle.items (vertical_list)
+  words: IntervalTable<[number, number]>;
+  subtitle_scene: Array<number | null>;
+}
+
+// Precomputed by the backend (motion.py): per-frame values of each transform
+// channel; frames past the end of a table hold its last value
+export type MotionChannels = Partial<Record<"translateX" | "translateY" | "scale" | "rotate", number[]>>;
+
+export interface MotionTables {
+  fps: number;
+  springs: { asset: number[]; text?: number[] };
+  entrances: Record<string, MotionChannels>;  // translate in %
+  idles: Record<string, MotionChannels>;      // translate in px, rotate in deg
+  idle_frames: number;
+}
+
+// Texture atlas built by the backend (atlas.py); rects are keyed by element local_path
+export interface AtlasRect {
+  page: number;
+  x: number;
+  y: number;
+  w: number;
+  h: number;
+}
+
+export interface AtlasIndex {
+  pages: Array<{ src: string; width: number; height: number }>;
+  padding: number;
+  rects: Record<string, AtlasRect>;
+}
+
 export interface VideoData {
   project_settings?: { fps: number; width?: number; height?: number };
   scenes: Scene[];
   subtitles: Subtitle[];
   audio_path?: string;
+  timeline?: TimelineIndex;
+  motion?: MotionTables;
+  atlas?: AtlasIndex;
 }
+
+// Input props for the render compositions, supplied at runtime via --props
+export type RenderProps = {
+  videoData: VideoData;
+  durationInFrames?: number;
+};
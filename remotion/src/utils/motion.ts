@@ -0,0 +1,33 @@
+import { MotionChannels, MotionTables } from "../types";
+
+/**
+ * Reads a precomputed curve at a (possibly fractional) frame, interpolating
+ * between entries and holding the first/last value outside the table.
+ */
+export function sampleTable(values: number[], frame: number): number {
+  if (frame <= 0) return values[0];
+  const last = values.length - 1;
+  if (frame >= last) return values[last];
+  const i = Math.floor(frame);
+  return values[i] + (values[i + 1] - values[i]) * (frame - i);
+}
+
+/**
+ * CSS transform for a preset's channels, in the order Animations.ts writes them.
+ */
+export function tableTransform(channels: MotionChannels, frame: number, translateUnit: string): string {
+  const parts: string[] = [];
+  if (channels.translateX) parts.push(`translateX(${sampleTable(channels.translateX, frame)}${translateUnit})`);
+  if (channels.translateY) parts.push(`translateY(${sampleTable(channels.translateY, frame)}${translateUnit})`);
+  if (channels.scale) parts.push(`scale(${sampleTable(channels.scale, frame)})`);
+  if (channels.rotate) parts.push(`rotate(${sampleTable(channels.rotate, frame)}deg)`);
+  return parts.join(" ");
+}
+
+/**
+ * The tables are only valid at the fps they were built for; callers fall back
+ * to evaluating spring() and the animation presets when missing or stale.
+ */
+export function usableMotion(motion: MotionTables | undefined, fps: number): MotionTables | null {
+  return motion && motion.fps === fps ? motion : null;
+}
@@ -0,0 +1,30 @@
+import { IntervalTable, TimelineIndex } from "../types";
+
+/**
+ * Returns the entries active on a frame with a binary search over the
+ * precomputed boundaries, instead of scanning every scene or word.
+ */
+export function lookupActive<T>(table: IntervalTable<T>, frame: number): T[] {
+  const { bounds, active } = table;
+  let lo = 0;
+  let hi = bounds.length - 1;
+  let found = -1;
+  while (lo <= hi) {
+    const mid = (lo + hi) >> 1;
+    if (bounds[mid] <= frame) {
+      found = mid;
+      lo = mid + 1;
+    } else {
+      hi = mid - 1;
+    }
+  }
+  return found < 0 ? [] : active[found];
+}
+
+/**
+ * The index is only valid at the fps it was built for; callers fall back to
+ * scanning when it is missing or stale.
+ */
+export function usableTimeline(timeline: TimelineIndex | undefined, fps: number): TimelineIndex | null {
+  return timeline && timeline.fps === fps ? timeline : null;
+}